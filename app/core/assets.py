@@ -0,0 +1,121 @@
+"""
+Static assets: fingerprinted URLs and long-lived, precompressed responses.
+build_assets.py copies every file under app/static to app/static/dist with a
+content hash in its name, writes .gz (and .br, if brotli is installed)
+siblings for text assets, and records the mapping in a manifest.
+Templates link assets through static_url(), which returns the fingerprinted
+URL when the manifest has one. Without a build, the plain /static URLs are used.
+"""
+import hashlib
+import json
+import mimetypes
+import os
+from typing import Dict, Optional
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+STATIC_DIR = "app/static"
+STATIC_URL = "/static/"
+DIST_DIRNAME = "dist"
+MANIFEST_PATH = os.path.join(STATIC_DIR, DIST_DIRNAME, "manifest.json")
+
+# Fingerprinted files never change, so clients and CDNs may keep them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# (Accept-Encoding token, file suffix) in order of preference
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _load_manifest() -> Dict[str, str]:
+    try:
+        with open(MANIFEST_PATH, encoding="utf-8") as manifest_file:
+            return json.load(manifest_file)
+    except FileNotFoundError:
+        return {}
+
+
+_manifest = _load_manifest()
+
+# Changes whenever a new build is deployed; used in page validators (ETags)
+ASSETS_VERSION = hashlib.blake2b(
+    json.dumps(_manifest, sort_keys=True).encode(), digest_size=4
+).hexdigest()
+
+
+def static_url(path: Optional[str]) -> str:
+    """
+    URL for a static asset, fingerprinted if the asset was built.
+
+    Args:
+        path: Asset path relative to app/static ("css/main.css") or its
+              /static URL ("/static/css/main.css")
+
+    Returns:
+        URL to link in templates
+    """
+    if not path:
+        return ""
+    relative = path[len(STATIC_URL):] if path.startswith(STATIC_URL) else path.lstrip("/")
+    built = _manifest.get(relative)
+    if built is None:
+        return STATIC_URL + relative
+    return f"{STATIC_URL}{DIST_DIRNAME}/{built}"
+
+
+def _guess_type(path: str) -> str:
+    media_type, _ = mimetypes.guess_type(path)
+    media_type = media_type or "application/octet-stream"
+    if media_type.startswith("text/") or media_type == "application/javascript":
+        media_type += "; charset=utf-8"
+    return media_type
+
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    """Content codings from an Accept-Encoding header, minus any refused with q=0."""
+    accepted = set()
+    for token in accept_encoding.split(","):
+        name, _, params = token.partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if name.strip():
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class AssetFiles(StaticFiles):
+    """
+    StaticFiles that serves built (fingerprinted) assets with immutable
+    Cache-Control headers, choosing a precompressed .br/.gz sibling when
+    the client accepts it. Other files are served as before.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        normalized = path.replace(os.sep, "/")
+        if not normalized.startswith(DIST_DIRNAME + "/") or normalized.endswith(".json"):
+            return await super().get_response(path, scope)
+
+        accepted = _accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+
+        response = None
+        for encoding, suffix in PRECOMPRESSED:
+            if encoding not in accepted:
+                continue
+            full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            if stat_result is None:
+                continue
+            response = self.file_response(full_path, stat_result, scope)
+            # Describe the original file, sent with a content coding
+            response.headers["Content-Encoding"] = encoding
+            response.headers["Content-Type"] = _guess_type(path)
+            break
+
+        if response is None:
+            response = await super().get_response(path, scope)
+
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
@@ -0,0 +1,136 @@
+"""
+Conditional GET support for catalog pages.
+Catalog pages only change when the catalog's content or availability, the
+visitor's cart count, the templates or the built assets change, so they carry
+a weak ETag built from those (plus the URL itself). A request whose
+If-None-Match still matches is answered with 304 straight from the middleware,
+before any route handler, database session or template render.
+
+Handlers call record_catalog() with the catalog they render from, and the
+response ETag is built from that catalog's version. If the catalog reloads
+mid-request, the page is still labelled with the version it was rendered
+from. Responses from handlers that record nothing get no ETag.
+
+Must be added inside SessionMiddleware (i.e. registered before it), since it
+reads the cart count from the session.
+"""
+import hashlib
+from typing import Iterable, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.assets import ASSETS_VERSION
+from app.core.templating import TEMPLATES_VERSION
+from app.services import catalog_cache
+from app.services.catalog_cache import Catalog
+
+# Pages mention the visitor's cart count, so shared caches must not store them
+CACHE_CONTROL = "private, no-cache"
+
+
+def _cart_count(session: dict) -> Optional[int]:
+    """Cart count known from the session alone, or None if it needs a cart store lookup."""
+    if "cart" in session:
+        return None
+    if "cart_count" in session:
+        return session["cart_count"]
+    return None if "cart_id" in session else 0
+
+
+def _resource_key(scope: Scope) -> str:
+    """Short digest of the path and query string, so each URL gets its own validators."""
+    digest = hashlib.blake2b(scope["path"].encode(), digest_size=4)
+    digest.update(b"?" + scope.get("query_string", b""))
+    return digest.hexdigest()
+
+
+def record_catalog(request: Request, catalog: Catalog) -> None:
+    """
+    Record the catalog a handler renders the page from, before rendering it,
+    so the response ETag names the version the page was built from.
+    """
+    request.state.etag_catalog_version = catalog.render_version
+
+
+def _recorded_catalog_version(scope: Scope) -> Optional[str]:
+    return scope.get("state", {}).get("etag_catalog_version")
+
+
+def _make_etag(scope: Scope, session: dict, catalog_version: Optional[str]) -> Optional[str]:
+    cart_count = _cart_count(session)
+    if catalog_version is None or cart_count is None:
+        return None
+    return f'W/"{catalog_version}-{cart_count}-{TEMPLATES_VERSION}{ASSETS_VERSION}-{_resource_key(scope)}"'
+
+
+def _etag_matches(etag: str, if_none_match: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/ prefixes are ignored
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class ConditionalGetMiddleware:
+    """
+    Adds weak ETags to GET/HEAD responses for the given paths and answers
+    matching If-None-Match requests with 304 Not Modified.
+
+    Args:
+        app: ASGI application to wrap
+        paths: Exact paths to handle (e.g. "/products")
+        prefixes: Path prefixes to handle (e.g. "/category/")
+    """
+
+    def __init__(self, app: ASGIApp, paths: Iterable[str] = (), prefixes: Iterable[str] = ()):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.prefixes = tuple(prefixes)
+
+    def _handles(self, scope: Scope) -> bool:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            return False
+        path = scope["path"]
+        return path in self.paths or path.startswith(self.prefixes)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self._handles(scope):
+            await self.app(scope, receive, send)
+            return
+
+        session = scope.get("session", {})
+        if_none_match = Headers(scope=scope).get("if-none-match")
+
+        catalog = catalog_cache.peek_catalog()
+        etag = _make_etag(scope, session, catalog.render_version if catalog else None)
+        if etag is not None and if_none_match and _etag_matches(etag, if_none_match):
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [
+                    (b"etag", etag.encode()),
+                    (b"cache-control", CACHE_CONTROL.encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_etag(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                # Built from the catalog the handler rendered, not whatever is cached now
+                response_etag = _make_etag(scope, session, _recorded_catalog_version(scope))
+                if response_etag is not None:
+                    headers = MutableHeaders(scope=message)
+                    headers["ETag"] = response_etag
+                    headers["Cache-Control"] = CACHE_CONTROL
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
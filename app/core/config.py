@@ -0,0 +1,168 @@
+"""
+Application configuration.
+Settings are read from environment variables (or the .env file) with sensible defaults.
+"""
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Catalog cache: how long (in seconds) product snapshots are served before a reload.
+# Product writes made through the app invalidate the cache immediately and orders
+# patch its stock levels in place; the TTL bounds staleness for writes made by
+# other processes (e.g. add_products.py).
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", "300"))
+
+# How often (in seconds) each worker polls the stock generation counter, which
+# every stock release bumps. When it moved, the worker reloads its stock levels,
+# so stock released by other processes (reconcile_payments.py cancelling unpaid
+# orders, other workers) shows up within this interval instead of CATALOG_CACHE_TTL.
+CATALOG_STOCK_CHECK_INTERVAL = float(os.getenv("CATALOG_STOCK_CHECK_INTERVAL", "5"))
+
+# Search backend for /search: "memory" (in-process inverted index),
+# "fts5" (SQLite FTS5 table ranked with bm25) or "ilike" (plain LIKE scan)
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "memory").lower()
+
+# Search suggestions (/search/suggest): default and maximum number of suggestions,
+# number of prefixes memoized, and browser/CDN cache lifetime in seconds
+SUGGEST_LIMIT = int(os.getenv("SUGGEST_LIMIT", "8"))
+SUGGEST_MAX_LIMIT = int(os.getenv("SUGGEST_MAX_LIMIT", "20"))
+SUGGEST_CACHE_SIZE = int(os.getenv("SUGGEST_CACHE_SIZE", "4096"))
+SUGGEST_CACHE_MAX_AGE = int(os.getenv("SUGGEST_CACHE_MAX_AGE", "300"))
+
+# Product listings (/products, category pages, /api/products): keyset pagination
+# page size by default and the largest page a client may ask for
+PRODUCTS_PAGE_SIZE = int(os.getenv("PRODUCTS_PAGE_SIZE", "24"))
+PRODUCTS_MAX_PAGE_SIZE = int(os.getenv("PRODUCTS_MAX_PAGE_SIZE", "100"))
+
+# Rendered HTML fragments (product grids, featured products, search results)
+# kept per catalog version and shared by every visitor
+FRAGMENT_CACHE_SIZE = int(os.getenv("FRAGMENT_CACHE_SIZE", "512"))
+
+# Templates: compiled template bytecode is cached on disk so restarted workers
+# skip compilation (TEMPLATE_CACHE_DIR defaults to a per-user temp directory).
+# TEMPLATE_PRECOMPILE loads every template at startup instead of on first request;
+# TEMPLATE_AUTO_RELOAD=false stops checking template files for changes on each render.
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", "")
+TEMPLATE_PRECOMPILE = os.getenv("TEMPLATE_PRECOMPILE", "true").lower() in ("1", "true", "yes")
+TEMPLATE_AUTO_RELOAD = os.getenv("TEMPLATE_AUTO_RELOAD", "true").lower() in ("1", "true", "yes")
+
+# Cart storage: "sqlite" (carts table, shared by all workers) or "memory"
+# (per-process LRU holding at most CART_MEMORY_MAX_CARTS carts).
+# Either way the session cookie only carries an opaque cart id.
+CART_BACKEND = os.getenv("CART_BACKEND", "sqlite").lower()
+CART_MEMORY_MAX_CARTS = int(os.getenv("CART_MEMORY_MAX_CARTS", "10000"))
+# The carts table is pruned at startup and every CART_PRUNE_INTERVAL seconds:
+# carts untouched for CART_MAX_AGE days are deleted, then all but the
+# CART_SQLITE_MAX_CARTS most recently updated (0 disables either bound).
+CART_MAX_AGE = float(os.getenv("CART_MAX_AGE", "30"))
+CART_SQLITE_MAX_CARTS = int(os.getenv("CART_SQLITE_MAX_CARTS", "100000"))
+CART_PRUNE_INTERVAL = float(os.getenv("CART_PRUNE_INTERVAL", "3600"))
+
+# Razorpay gateway calls. SDK calls run on a dedicated thread pool
+# (RAZORPAY_EXECUTOR_WORKERS) over one keep-alive HTTP session holding up to
+# RAZORPAY_POOL_MAXSIZE connections; at most RAZORPAY_MAX_CONCURRENCY calls are in
+# flight per worker. Timeouts are in seconds: connect/read per HTTP request, and
+# RAZORPAY_CALL_TIMEOUT for a whole call including time queued for a thread.
+# RAZORPAY_BASE_URL can point at fake_razorpay_server.py for load tests.
+RAZORPAY_BASE_URL = os.getenv("RAZORPAY_BASE_URL", "https://api.razorpay.com")
+RAZORPAY_EXECUTOR_WORKERS = int(os.getenv("RAZORPAY_EXECUTOR_WORKERS", "16"))
+RAZORPAY_POOL_MAXSIZE = int(os.getenv("RAZORPAY_POOL_MAXSIZE", "16"))
+RAZORPAY_MAX_CONCURRENCY = int(os.getenv("RAZORPAY_MAX_CONCURRENCY", "64"))
+RAZORPAY_CONNECT_TIMEOUT = float(os.getenv("RAZORPAY_CONNECT_TIMEOUT", "3.05"))
+RAZORPAY_READ_TIMEOUT = float(os.getenv("RAZORPAY_READ_TIMEOUT", "10"))
+RAZORPAY_CALL_TIMEOUT = float(os.getenv("RAZORPAY_CALL_TIMEOUT", "15"))
+
+# Razorpay webhooks (/payment/webhook) are signed with RAZORPAY_WEBHOOK_SECRET, set
+# when creating the webhook in the Razorpay dashboard; without it the endpoint answers 503.
+# Events are stored as they arrive and applied to orders by a background consumer,
+# at most WEBHOOK_BATCH_SIZE events per transaction, polling every WEBHOOK_POLL_INTERVAL
+# seconds when idle.
+RAZORPAY_WEBHOOK_SECRET = os.getenv("RAZORPAY_WEBHOOK_SECRET", "")
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "200"))
+WEBHOOK_POLL_INTERVAL = float(os.getenv("WEBHOOK_POLL_INTERVAL", "1"))
+
+# Razorpay checkout: a pending online order holds its stock until it is paid or
+# cancelled. Each web worker cancels orders still unpaid CHECKOUT_PENDING_EXPIRE
+# minutes after checkout, checking the gateway first (the same reconciliation as
+# reconcile_payments.py), every CHECKOUT_SWEEP_INTERVAL seconds. Repeated
+# /checkout/create-order calls for an unchanged cart reuse the session's pending
+# order (while it is younger than half the expiry), and each client address may
+# call it at most CHECKOUT_RATE_LIMIT times per CHECKOUT_RATE_WINDOW seconds per
+# worker (behind a reverse proxy every request shares the proxy's address, so
+# raise the limit there).
+CHECKOUT_PENDING_EXPIRE = float(os.getenv("CHECKOUT_PENDING_EXPIRE", "30"))
+CHECKOUT_SWEEP_INTERVAL = float(os.getenv("CHECKOUT_SWEEP_INTERVAL", "60"))
+CHECKOUT_RATE_LIMIT = int(os.getenv("CHECKOUT_RATE_LIMIT", "20"))
+CHECKOUT_RATE_WINDOW = float(os.getenv("CHECKOUT_RATE_WINDOW", "60"))
+
+# Payment reconciliation (reconcile_payments.py): unpaid Razorpay orders older than
+# RECONCILE_MIN_AGE minutes are checked against the gateway, RECONCILE_CHUNK_SIZE
+# orders per transaction with RECONCILE_CONCURRENCY gateway requests in flight.
+# Orders with no successful payment after RECONCILE_EXPIRE_AFTER minutes are
+# cancelled and their stock released (0 never cancels); web workers see the released
+# stock within CATALOG_STOCK_CHECK_INTERVAL seconds. Progress is saved to
+# RECONCILE_CHECKPOINT so an interrupted run resumes where it stopped.
+RECONCILE_CHUNK_SIZE = int(os.getenv("RECONCILE_CHUNK_SIZE", "200"))
+RECONCILE_CONCURRENCY = int(os.getenv("RECONCILE_CONCURRENCY", "8"))
+RECONCILE_MIN_AGE = float(os.getenv("RECONCILE_MIN_AGE", "15"))
+RECONCILE_EXPIRE_AFTER = float(os.getenv("RECONCILE_EXPIRE_AFTER", "1440"))
+RECONCILE_CHECKPOINT = os.getenv("RECONCILE_CHECKPOINT", "reconcile_checkpoint.json")
+
+# Order notification emails. Orders write a message to the email outbox in the
+# same transaction; a background worker sends them over one reused SMTP connection.
+# Notifications are off unless ORDER_EMAIL_TO (or SMTP_USERNAME) is set.
+# Without SMTP_USERNAME no login is attempted, e.g. for debug_smtp_server.py.
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME", "")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() in ("1", "true", "yes")
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+# Close the SMTP connection after this many seconds without messages
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", "60"))
+# Notifications go to the shop itself: each address defaults to the other / the SMTP login
+ORDER_EMAIL_TO = os.getenv("ORDER_EMAIL_TO", "") or os.getenv("ORDER_EMAIL_FROM", "") or SMTP_USERNAME
+ORDER_EMAIL_FROM = os.getenv("ORDER_EMAIL_FROM", "") or SMTP_USERNAME or ORDER_EMAIL_TO
+
+# Outbox worker: messages claimed per batch, idle poll interval (seconds),
+# attempts before a message is marked failed, and retry backoff (seconds,
+# doubled per attempt up to the maximum)
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "2"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", "5"))
+OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", "900"))
+
+# Database
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./protein_perks.db")
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL", DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+)
+
+# Connection pool, applied to both the sync and the async engine (per worker).
+# DB_POOL_TIMEOUT is how long a request waits for a free connection before failing;
+# DB_POOL_RECYCLE replaces connections older than this many seconds (-1 disables).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# SQLite PRAGMAs applied to every new connection (set a value to "" to skip it).
+# WAL lets readers proceed while a checkout writes; synchronous=NORMAL is durable
+# under WAL except for the last transactions on power loss; mmap/cache sizes are
+# in bytes / KiB (negative cache_size means KiB).
+SQLITE_PRAGMAS = {
+    name: value
+    for name, value in {
+        "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "mmap_size": os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+        "cache_size": os.getenv("SQLITE_CACHE_SIZE", str(-64 * 1024)),
+        "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+        "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT", "5000"),
+    }.items()
+    if value
+}
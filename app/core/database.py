@@ -1,14 +1,125 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from typing import AsyncIterator, Callable, Dict, Iterator
 
-DATABASE_URL = "sqlite:///./protein_perks.db"
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.config import (
+    DATABASE_URL,
+    ASYNC_DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    SQLITE_PRAGMAS,
+)
+from app.core.pool_metrics import PoolMetrics, instrumented_pool, track_checkouts
+
+POOL_SETTINGS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
+
+
+def sqlite_pragma_listener(pragmas: Dict[str, str]) -> Callable:
+    """
+    Build a "connect" event listener that applies PRAGMAs to each new SQLite connection.
+    
+    Args:
+        pragmas: Mapping of PRAGMA name to value, e.g. {"journal_mode": "WAL"}
+    
+    Returns:
+        Listener for event.listen(engine, "connect", ...)
+    """
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+    return apply_pragmas
+
+
+sync_pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
 
 engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
+    DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=instrumented_pool(QueuePool, sync_pool_metrics),
+    **POOL_SETTINGS
 )
+track_checkouts(engine, sync_pool_metrics)
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", sqlite_pragma_listener(SQLITE_PRAGMAS))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for route handlers declared with async def, so database
+# waits don't block the event loop. Objects stay usable after commit
+# because lazy loads are not possible on an AsyncSession.
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=instrumented_pool(AsyncAdaptedQueuePool, async_pool_metrics),
+    **POOL_SETTINGS
+)
+track_checkouts(async_engine.sync_engine, async_pool_metrics)
+if async_engine.dialect.name == "sqlite":
+    event.listen(async_engine.sync_engine, "connect", sqlite_pragma_listener(SQLITE_PRAGMAS))
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+def get_db() -> Iterator[Session]:
+    """
+    FastAPI dependency yielding one pooled session per request.
+    The connection is only checked out once the session runs a query,
+    and is returned to the pool when the request finishes.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Async variant of get_db for async route handlers."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_pool_metrics() -> dict:
+    """
+    Report connection pool usage for both engines.
+    
+    Returns:
+        Dict keyed by engine name with pool configuration, live status and counters
+    """
+    report = {}
+    for metrics, pool in (
+        (sync_pool_metrics, engine.pool),
+        (async_pool_metrics, async_engine.sync_engine.pool),
+    ):
+        report[metrics.name] = {
+            "pool_size": pool.size(),
+            "max_overflow": DB_MAX_OVERFLOW,
+            "overflow": pool.overflow(),
+            "checked_in": pool.checkedin(),
+            **metrics.snapshot(),
+        }
+    return report
+
+
 Base = declarative_base()
 
 
@@ -19,10 +130,19 @@ def init_db():
     """
     from app.models.product import Product
     from app.models.order import Order, OrderItem
+    from app.models.cart import Cart
+    from app.models.outbox import OutboxMessage
+    from app.models.payment_event import PaymentEvent, PaymentEventCursor
+    from app.models.stock_generation import StockGeneration
     
     # Create all tables
     Base.metadata.create_all(bind=engine)
     
+    # create_all skips existing tables, so add indexes declared since they were created
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    
     # Check if products already exist
     db = SessionLocal()
     existing_products = db.query(Product).count()
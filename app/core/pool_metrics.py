@@ -0,0 +1,100 @@
+"""
+Connection pool instrumentation.
+Counts checkouts and records how long callers wait for a pooled connection,
+so pool size and overflow can be tuned per worker.
+"""
+import threading
+import time
+from typing import Type
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+
+class PoolMetrics:
+    """Counters for one connection pool."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.checkins = 0
+            self.peak_checked_out = 0
+            self.waits = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self.timeouts = 0
+
+    def record_wait(self, seconds: float, timed_out: bool) -> None:
+        with self._lock:
+            self.waits += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def record_checkout(self) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checkouts - self.checkins)
+
+    def record_checkin(self) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checked_out": self.checkouts - self.checkins,
+                "peak_checked_out": self.peak_checked_out,
+                "wait_count": self.waits,
+                "wait_avg_ms": self.total_wait / self.waits * 1000 if self.waits else 0.0,
+                "wait_max_ms": self.max_wait * 1000,
+                "timeouts": self.timeouts,
+            }
+
+
+def instrumented_pool(pool_class: Type[Pool], metrics: PoolMetrics) -> Type[Pool]:
+    """
+    Subclass a pool class so that acquiring a connection records its wait time.
+    Metrics live on the class, so they survive the pool being recreated on dispose().
+    
+    Args:
+        pool_class: Pool class to extend (e.g. QueuePool)
+        metrics: PoolMetrics to record into
+    
+    Returns:
+        Instrumented pool class
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return pool_class._do_get(self)
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            metrics.record_wait(time.perf_counter() - start, timed_out)
+
+    return type(f"Instrumented{pool_class.__name__}", (pool_class,), {"_do_get": _do_get, "metrics": metrics})
+
+
+def track_checkouts(bind: Engine, metrics: PoolMetrics) -> None:
+    """Count connects, checkouts and checkins on an engine's pool."""
+    event.listen(bind, "connect", lambda *args: metrics.record_connect())
+    event.listen(bind, "checkout", lambda *args: metrics.record_checkout())
+    event.listen(bind, "checkin", lambda *args: metrics.record_checkin())
@@ -0,0 +1,65 @@
+"""
+Shared Jinja2 templates for every router.
+One environment means one in-memory template cache per worker, and the
+filesystem bytecode cache lets a restarted worker load compiled templates
+instead of parsing and compiling them again.
+"""
+import hashlib
+import os
+import time
+
+from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
+
+from app.core.assets import static_url
+from app.core.config import TEMPLATE_AUTO_RELOAD, TEMPLATE_CACHE_DIR
+
+TEMPLATES_DIR = "app/templates"
+
+
+def _templates_version() -> str:
+    """Digest of every template file, so page validators change when templates are deployed."""
+    digest = hashlib.blake2b(digest_size=4)
+    for root, _, files in sorted(os.walk(TEMPLATES_DIR)):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            with open(path, "rb") as template_file:
+                digest.update(path.encode())
+                digest.update(template_file.read())
+    return digest.hexdigest()
+
+
+TEMPLATES_VERSION = _templates_version()
+
+
+def _bytecode_cache() -> FileSystemBytecodeCache:
+    if TEMPLATE_CACHE_DIR:
+        os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+        return FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+    return FileSystemBytecodeCache()
+
+
+templates = Jinja2Templates(
+    directory=TEMPLATES_DIR,
+    bytecode_cache=_bytecode_cache(),
+    auto_reload=TEMPLATE_AUTO_RELOAD,
+    # Keep every template of the app in memory
+    cache_size=-1,
+)
+templates.env.globals["static_url"] = static_url
+
+
+def precompile_templates() -> int:
+    """
+    Load every template so the first request doesn't pay for compiling it.
+    Templates already in the bytecode cache are loaded from there.
+
+    Returns:
+        Number of templates loaded
+    """
+    start = time.perf_counter()
+    names = templates.env.list_templates(extensions=["html"])
+    for name in names:
+        templates.env.get_template(name)
+    print(f"📄 Loaded {len(names)} templates in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return len(names)
@@ -1,23 +1,43 @@
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 
 from app.routes.cart import router as cart_router
 from app.routes.home import router as home_router
-from app.routes.products import router as products_router
+from app.routes.products import CATEGORY_TITLES, router as products_router
 from app.routes.checkout import router as checkout_router
 from app.routes.payment import router as payment_router
-from app.core.database import init_db
+from app.core.assets import STATIC_DIR, AssetFiles
+from app.core.conditional_get import ConditionalGetMiddleware
+from app.core.config import TEMPLATE_PRECOMPILE
+from app.core.database import async_engine, init_db
+from app.core.templating import precompile_templates
 from app.routes.search_routes import router as search_router
+from app.routes.metrics import router as metrics_router
+from app.services import (
+    cart_store,
+    outbox_service,
+    payment_service,
+    reconciliation_service,
+    search_engine,
+    webhook_service,
+)
 
 
 app = FastAPI(title="Protein Perks - Premium Supplements Store")
 
+# ETags / 304s for catalog pages. Added before SessionMiddleware so that the
+# session middleware wraps it and the session is available to it
+app.add_middleware(
+    ConditionalGetMiddleware,
+    paths=["/", "/products", "/search"] + [f"/{slug}" for slug in CATEGORY_TITLES],
+    prefixes=["/category/"]
+)
+
 # Session middleware for cart management
 app.add_middleware(SessionMiddleware, secret_key="proteinperks_secret_key_2024")
 
-# Static files
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+# Static files (built assets under /static/dist get immutable, precompressed responses)
+app.mount("/static", AssetFiles(directory=STATIC_DIR), name="static")
 
 
 
@@ -28,6 +48,7 @@ app.include_router(cart_router)
 app.include_router(checkout_router)
 app.include_router(payment_router)
 app.include_router(search_router)
+app.include_router(metrics_router)
 
 
 @app.on_event("startup")
@@ -35,8 +56,22 @@ async def startup_event():
     """Initialize database on startup"""
     print("🚀 Starting Protein Perks...")
     init_db()
+    search_engine.init_search()
+    if TEMPLATE_PRECOMPILE:
+        precompile_templates()
+    outbox_service.start_worker()
+    webhook_service.start_consumer()
+    reconciliation_service.start_sweeper()
+    cart_store.start_pruner()
     print("✅ Application ready!")
 
 
-
-
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers and close pooled database and gateway connections"""
+    outbox_service.stop_worker()
+    webhook_service.stop_consumer()
+    reconciliation_service.stop_sweeper()
+    cart_store.stop_pruner()
+    payment_service.shutdown()
+    await async_engine.dispose()
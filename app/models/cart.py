@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, Float, String, Text, DateTime, Index
+from datetime import datetime
+from app.core.database import Base
+
+
+class Cart(Base):
+    """
+    Cart model for server-side shopping carts.
+    The session cookie only stores the cart id; line items live here.
+    """
+    __tablename__ = "carts"
+    __table_args__ = (
+        # Pruning abandoned carts: oldest first
+        Index("ix_carts_updated_at", "updated_at"),
+    )
+
+    id = Column(String(64), primary_key=True)  # Opaque cart id stored in the session
+    items = Column(Text, nullable=False, default="{}")  # JSON {product_id: quantity}
+    
+    # Running summary, maintained incrementally as items change
+    item_count = Column(Integer, nullable=False, default=0)
+    total = Column(Float, nullable=False, default=0.0)
+    catalog_version = Column(String(32), nullable=True)  # Catalog the total was priced against
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Cart {self.id}>"
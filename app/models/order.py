@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -10,6 +10,15 @@ class Order(Base):
     Contains customer information, payment details, and order status.
     """
     __tablename__ = "orders"
+    __table_args__ = (
+        # Order history lookups: filter by email, newest first
+        Index("ix_orders_customer_email_created_at", "customer_email", "created_at"),
+        # Payment verification and webhooks find orders by their Razorpay order
+        Index("ix_orders_razorpay_order_id", "razorpay_order_id"),
+        # Reconciliation and the pending order sweeper scan unpaid orders; this keeps
+        # the scan proportional to them rather than to the whole order history
+        Index("ix_orders_order_status_payment_status", "order_status", "payment_status"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     
@@ -30,7 +39,7 @@ class Order(Base):
     razorpay_order_id = Column(String(100), nullable=True)
     razorpay_payment_id = Column(String(100), nullable=True)
     razorpay_signature = Column(String(200), nullable=True)
-    payment_status = Column(String(50), default="pending")  # pending, success, failed
+    payment_status = Column(String(50), default="pending")  # pending, success, failed, paid_after_cancel
     
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -51,7 +60,7 @@ class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
     
     # Product Information (snapshot at time of order)
     product_id = Column(Integer, nullable=False)
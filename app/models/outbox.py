@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from datetime import datetime
+from app.core.database import Base
+
+
+class OutboxMessage(Base):
+    """
+    Email waiting to be sent by the outbox worker.
+    Written in the same transaction as the change it reports (e.g. a new order),
+    so a message exists if and only if that change was committed.
+    """
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # The worker claims due messages: status + next_attempt_at
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)  # e.g. order_notification
+    recipient = Column(String(200), nullable=False)
+    subject = Column(String(200), nullable=False)
+    body = Column(Text, nullable=False)
+
+    # Delivery state
+    status = Column(String(20), nullable=False, default="pending")  # pending, sending, sent, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)  # Also the lease expiry while sending
+    last_error = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    def __repr__(self):
+        return f"<OutboxMessage #{self.id} {self.kind} {self.status}>"
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+
+class PaymentEvent(Base):
+    """
+    Razorpay webhook event, stored exactly as received.
+    Append-only: rows are never updated. Consumers track how far they have
+    read in payment_event_cursors, so redelivered events (same event_id)
+    are dropped on insert.
+    """
+    __tablename__ = "payment_events"
+
+    id = Column(Integer, primary_key=True)
+    event_id = Column(String(100), nullable=False, unique=True)  # X-Razorpay-Event-Id
+    event = Column(String(100), nullable=False)  # e.g. payment.captured, order.paid
+    razorpay_order_id = Column(String(100), nullable=True)
+    razorpay_payment_id = Column(String(100), nullable=True)
+    payload = Column(Text, nullable=False)  # Raw request body
+    received_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<PaymentEvent #{self.id} {self.event} {self.razorpay_order_id}>"
+
+
+class PaymentEventCursor(Base):
+    """Position of a payment event consumer: the last payment_events.id it applied."""
+    __tablename__ = "payment_event_cursors"
+
+    consumer = Column(String(50), primary_key=True)
+    last_event_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<PaymentEventCursor {self.consumer} @ {self.last_event_id}>"
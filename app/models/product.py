@@ -11,7 +11,7 @@ class Product(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(200), nullable=False)
     brand = Column(String(100), nullable=False)
-    category = Column(String(50), nullable=False)  # protein, oats, muesli, peanut
+    category = Column(String(50), nullable=False, index=True)  # protein, oats, muesli, peanut
     description = Column(Text, nullable=True)  # Product description
     price = Column(Integer, nullable=False)  # Price in rupees
     weight = Column(String(50), nullable=False)  # e.g., "1kg", "500g"
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+
+class StockGeneration(Base):
+    """
+    Single-row counter bumped in the same transaction as every stock release.
+    Web workers poll it (catalog_cache) to notice stock put back by other
+    processes, e.g. orders cancelled by reconcile_payments.py.
+    """
+    __tablename__ = "stock_generation"
+
+    id = Column(Integer, primary_key=True)
+    generation = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<StockGeneration {self.generation}>"
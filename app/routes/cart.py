@@ -2,15 +2,16 @@
 Cart Routes - Handle shopping cart operations.
 Provides both page rendering and JSON API endpoints.
 """
-from fastapi import APIRouter, Request, Form
+from fastapi import APIRouter, Depends, Request, Form
 from fastapi.responses import RedirectResponse, HTMLResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
 
-from app.core.database import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db
+from app.core.templating import templates
 from app.services import cart_service
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 
 @router.post("/cart/add")
@@ -20,8 +21,8 @@ async def add_to_cart_api(request: Request, product_id: int = Form(...), quantit
     Returns JSON response for AJAX calls.
     """
     try:
-        cart_service.add_to_cart(request.session, product_id, quantity)
-        cart_count = cart_service.get_cart_count(request.session)
+        await cart_service.add_to_cart_async(request.session, product_id, quantity)
+        cart_count = await cart_service.get_cart_count_async(request.session)
         
         return JSONResponse({
             "success": True,
@@ -36,26 +37,22 @@ async def add_to_cart_api(request: Request, product_id: int = Form(...), quantit
 
 
 @router.get("/cart", response_class=HTMLResponse)
-async def view_cart(request: Request):
+async def view_cart(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Display shopping cart page with all items.
     """
-    db = SessionLocal()
-    try:
-        cart_items, total = cart_service.get_cart_items(request.session, db)
-        cart_count = cart_service.get_cart_count(request.session)
-        
-        return templates.TemplateResponse(
-            "cart.html",
-            {
-                "request": request,
-                "cart_items": cart_items,
-                "total": total,
-                "cart_count": cart_count
-            }
-        )
-    finally:
-        db.close()
+    cart_items, total = await cart_service.get_cart_items_async(request.session, db)
+    cart_count = await cart_service.get_cart_count_async(request.session)
+    
+    return templates.TemplateResponse(
+        "cart.html",
+        {
+            "request": request,
+            "cart_items": cart_items,
+            "total": total,
+            "cart_count": cart_count
+        }
+    )
 
 
 @router.post("/cart/update")
@@ -64,22 +61,15 @@ async def update_cart_quantity(request: Request, product_id: int = Form(...), qu
     Update quantity of a product in cart.
     """
     try:
-        cart_service.update_quantity(request.session, product_id, quantity)
+        # Running totals are maintained by the cart, no product lookups needed
+        cart_count, total = await cart_service.update_quantity_async(request.session, product_id, quantity)
         
-        # Recalculate totals
-        db = SessionLocal()
-        try:
-            cart_items, total = cart_service.get_cart_items(request.session, db)
-            cart_count = cart_service.get_cart_count(request.session)
-            
-            return JSONResponse({
-                "success": True,
-                "message": "Cart updated",
-                "total": total,
-                "cart_count": cart_count
-            })
-        finally:
-            db.close()
+        return JSONResponse({
+            "success": True,
+            "message": "Cart updated",
+            "total": total,
+            "cart_count": cart_count
+        })
     except Exception as e:
         return JSONResponse({
             "success": False,
@@ -93,22 +83,15 @@ async def remove_from_cart_api(request: Request, product_id: int = Form(...)):
     Remove a product from cart.
     """
     try:
-        cart_service.remove_from_cart(request.session, product_id)
+        # Running totals are maintained by the cart, no product lookups needed
+        cart_count, total = await cart_service.remove_from_cart_async(request.session, product_id)
         
-        # Recalculate totals
-        db = SessionLocal()
-        try:
-            cart_items, total = cart_service.get_cart_items(request.session, db)
-            cart_count = cart_service.get_cart_count(request.session)
-            
-            return JSONResponse({
-                "success": True,
-                "message": "Product removed from cart",
-                "total": total,
-                "cart_count": cart_count
-            })
-        finally:
-            db.close()
+        return JSONResponse({
+            "success": True,
+            "message": "Product removed from cart",
+            "total": total,
+            "cart_count": cart_count
+        })
     except Exception as e:
         return JSONResponse({
             "success": False,
@@ -121,6 +104,6 @@ async def get_cart_count_api(request: Request):
     """
     Get current cart item count.
     """
-    cart_count = cart_service.get_cart_count(request.session)
+    cart_count = await cart_service.get_cart_count_async(request.session)
     return JSONResponse({"cart_count": cart_count})
 
@@ -1,54 +1,208 @@
 """
 Checkout Routes - Handle checkout flow and order creation
+
+A Razorpay checkout saves a pending order that holds its stock until it is
+paid or expires (see reconciliation_service.PendingOrderSweeper). The session
+remembers its pending order: paying again for the same cart reuses it, and a
+changed cart (or a manual payment) cancels it before stock is reserved again.
 """
+import hashlib
+from datetime import datetime, timedelta
+from typing import List
 
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
 
-from app.core.database import SessionLocal
-from app.services import cart_service, order_service
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import CHECKOUT_PENDING_EXPIRE, CHECKOUT_RATE_LIMIT, CHECKOUT_RATE_WINDOW
+from app.core.database import get_async_db
+from app.core.templating import templates
+from app.services import cart_service, order_service, payment_service
+from app.services.payment_service import PaymentGatewayError
+from app.services.stock_service import OutOfStockError
+from app.utils.rate_limit import RateLimiter
 
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 COD_CHARGE = 80
 
+# Per client address, since a new session (and so a new cart) is free to get
+create_order_limiter = RateLimiter(CHECKOUT_RATE_LIMIT, CHECKOUT_RATE_WINDOW)
+
+
+def _cart_signature(cart_items: List[dict], total: float) -> str:
+    """
+    What a pending order was created for: a digest of each product's quantity
+    and the total, fixed-size so the session cookie doesn't grow with the cart.
+    """
+    items = sorted((item["product"].id, item["quantity"]) for item in cart_items)
+    signature = ",".join(f"{product_id}x{quantity}" for product_id, quantity in items) + f"={total}"
+    return hashlib.blake2b(signature.encode(), digest_size=16).hexdigest()
+
+
+def _client_address(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def _razorpay_checkout_response(pending: dict) -> JSONResponse:
+    return JSONResponse({
+        "success": True,
+        "order_id": pending["razorpay_order_id"],
+        "amount": pending["amount"],
+        "currency": pending["currency"],
+        "key_id": payment_service.get_razorpay_key_id()
+    })
+
+
+async def _release_pending_order(pending: dict, db: AsyncSession) -> None:
+    """
+    Cancel a pending order the session no longer needs, releasing its stock.
+    Left for the sweeper if the gateway can't be reached or has a payment for
+    it that didn't fail (the customer may have paid in another tab).
+    """
+    try:
+        payments = await payment_service.fetch_order_payments_async(pending["razorpay_order_id"])
+    except PaymentGatewayError as e:
+        print("⚠️ Could not check pending order before replacing it:", e)
+        return
+
+    if all(payment.get("status") == "failed" for payment in payments):
+        await order_service.cancel_unpaid_orders_async(db, [pending["order_id"]])
+
 
 # ===============================
 # CHECKOUT PAGE
 # ===============================
 
 @router.get("/checkout", response_class=HTMLResponse)
-async def checkout_page(request: Request):
+async def checkout_page(request: Request, db: AsyncSession = Depends(get_async_db)):
+
+    cart_items, total = await cart_service.get_cart_items_async(
+        request.session, db
+    )
+
+    if not cart_items:
+        return RedirectResponse("/cart", status_code=302)
+
+    cart_count = await cart_service.get_cart_count_async(request.session)
+
+    return templates.TemplateResponse(
+        "checkout.html",
+        {
+            "request": request,
+            "cart_items": cart_items,
+            "total": total,
+            "cart_count": cart_count,
+            "cod_charge": COD_CHARGE
+        }
+    )
+
+
+# ===============================
+# CREATE RAZORPAY ORDER
+# ===============================
+
+@router.post("/checkout/create-order")
+async def create_order(request: Request, db: AsyncSession = Depends(get_async_db)):
+
+    form = await request.form()
+
+    if not payment_service.razorpay_client:
+        return JSONResponse({
+            "success": False,
+            "message": "Online payment is not available"
+        }, status_code=503)
+
+    cart_items, total = await cart_service.get_cart_items_async(
+        request.session, db
+    )
+
+    if not cart_items:
+        return JSONResponse({
+            "success": False,
+            "message": "Cart is empty"
+        }, status_code=400)
+
+    if not create_order_limiter.allow(_client_address(request)):
+        return JSONResponse({
+            "success": False,
+            "message": "Too many checkout attempts, please try again in a minute"
+        }, status_code=429)
 
-    db = SessionLocal()
 
+    customer_data = {
+        "name": form.get("name"),
+        "email": form.get("email"),
+        "phone": form.get("phone"),
+        "address": form.get("address"),
+        "city": form.get("city"),
+        "state": form.get("state"),
+        "pincode": form.get("pincode")
+    }
+
+
+    # Paying again for the same cart reuses the pending order and the stock it holds,
+    # while it is young enough to leave time to pay before it expires
+    cart_signature = _cart_signature(cart_items, total)
+    pending = request.session.pop("pending_checkout", None)
+    if pending and pending["cart"] == cart_signature:
+        reuse_after = datetime.utcnow() - timedelta(minutes=CHECKOUT_PENDING_EXPIRE / 2)
+        if await order_service.renew_pending_order_async(db, pending["order_id"], customer_data, reuse_after):
+            request.session["pending_checkout"] = pending
+            return _razorpay_checkout_response(pending)
+
+
+    # Don't hold a pooled database connection while waiting on the gateway
+    await db.close()
+
+    if pending:
+        await _release_pending_order(pending, db)
+
+    # Runs on the gateway thread pool; the event loop keeps serving other requests
     try:
+        razorpay_order = await payment_service.create_razorpay_order_async(total)
 
-        cart_items, total = cart_service.get_cart_items(
-            request.session, db
-        )
+    except PaymentGatewayError as e:
 
-        if not cart_items:
-            return RedirectResponse("/cart", status_code=302)
-
-        cart_count = cart_service.get_cart_count(request.session)
-
-        return templates.TemplateResponse(
-            "checkout.html",
-            {
-                "request": request,
-                "cart_items": cart_items,
-                "total": total,
-                "cart_count": cart_count,
-                "cod_charge": COD_CHARGE
-            }
+        print("❌ RAZORPAY ERROR:", e)
+
+        return JSONResponse({
+            "success": False,
+            "message": "Payment gateway unavailable, please try again"
+        }, status_code=502)
+
+
+    # Save the order as pending now, so it is paid by /payment/verify or,
+    # if the customer never returns, by the Razorpay webhook
+    try:
+        order = await order_service.create_order_bulk_async(
+            db=db,
+            customer_data=customer_data,
+            cart_items=cart_items,
+            payment_info={"order_id": razorpay_order["id"], "payment_id": None, "signature": None}
         )
 
-    finally:
-        db.close()
+    except OutOfStockError as e:
+
+        return JSONResponse({
+            "success": False,
+            "message": str(e),
+            "out_of_stock": [shortage._asdict() for shortage in e.shortages]
+        }, status_code=409)
+
+
+    pending = {
+        "order_id": order.id,
+        "razorpay_order_id": razorpay_order["id"],
+        "amount": razorpay_order["amount"],
+        "currency": razorpay_order["currency"],
+        "cart": cart_signature
+    }
+    request.session["pending_checkout"] = pending
+
+    return _razorpay_checkout_response(pending)
 
 
 # ===============================
@@ -56,19 +210,17 @@ async def checkout_page(request: Request):
 # ===============================
 
 @router.post("/checkout/place-order")
-async def place_order(request: Request):
+async def place_order(request: Request, db: AsyncSession = Depends(get_async_db)):
 
     print("🔥 PLACE ORDER API HIT")
 
     form = await request.form()
     print("📨 FORM:", dict(form))
 
-    db = SessionLocal()
-
     try:
 
         # Get cart
-        cart_items, total = cart_service.get_cart_items(
+        cart_items, total = await cart_service.get_cart_items_async(
             request.session, db
         )
 
@@ -95,6 +247,13 @@ async def place_order(request: Request):
         print("👤 CUSTOMER:", customer_data)
 
 
+        # An abandoned online checkout would otherwise hold the same stock
+        pending = request.session.pop("pending_checkout", None)
+        if pending:
+            await db.close()
+            await _release_pending_order(pending, db)
+
+
         # Payment info (manual UPI / COD)
         payment_info = {
             "order_id": None,
@@ -104,7 +263,7 @@ async def place_order(request: Request):
 
 
         # Create order in DB
-        order = order_service.create_order(
+        order = await order_service.create_order_bulk_async(
             db=db,
             customer_data=customer_data,
             cart_items=cart_items,
@@ -115,7 +274,7 @@ async def place_order(request: Request):
 
 
         # Clear cart
-        cart_service.clear_cart(request.session)
+        await cart_service.clear_cart_async(request.session)
 
 
         return JSONResponse({
@@ -125,6 +284,17 @@ async def place_order(request: Request):
         })
 
 
+    except OutOfStockError as e:
+
+        print("⚠️ OUT OF STOCK:", e)
+
+        return JSONResponse({
+            "success": False,
+            "message": str(e),
+            "out_of_stock": [shortage._asdict() for shortage in e.shortages]
+        }, status_code=409)
+
+
     except Exception as e:
 
         print("❌ ERROR:", e)
@@ -133,7 +303,3 @@ async def place_order(request: Request):
             "success": False,
             "message": str(e)
         }, status_code=500)
-
-
-    finally:
-        db.close()
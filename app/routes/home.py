@@ -1,31 +1,32 @@
 from fastapi import APIRouter, Request
-from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
 
-from app.core.database import SessionLocal
-from app.models.product import Product
-from app.services import cart_service
+from app.core.conditional_get import record_catalog
+from app.core.templating import templates
+from app.services import cart_service, catalog_cache, fragment_cache
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 @router.get("/", response_class=HTMLResponse)
 def home(request: Request):
     """Landing page with featured products"""
-    db = SessionLocal()
-    try:
-        # Get featured products (first 4 products)
-        featured_products = db.query(Product).limit(4).all()
-        cart_count = cart_service.get_cart_count(request.session)
-        
-        return templates.TemplateResponse(
-            "index.html",
-            {
-                "request": request,
-                "featured_products": featured_products,
-                "cart_count": cart_count
-            }
+    catalog = catalog_cache.get_catalog()
+    record_catalog(request, catalog)
+    
+    # Featured products (first 4 products), rendered once per catalog version
+    featured_html = fragment_cache.get_or_render(
+        "featured", catalog, None,
+        lambda: templates.get_template("partials/featured_products.html").render(
+            featured_products=catalog.products[:4]
         )
-    finally:
-        db.close()
-
+    )
+    cart_count = cart_service.get_cart_count(request.session)
+    
+    return templates.TemplateResponse(
+        "index.html",
+        {
+            "request": request,
+            "featured_html": featured_html,
+            "cart_count": cart_count
+        }
+    )
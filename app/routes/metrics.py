@@ -0,0 +1,26 @@
+"""
+Metrics Routes - Operational counters for tuning workers.
+"""
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.core.database import get_pool_metrics
+from app.services import fragment_cache
+
+router = APIRouter()
+
+
+@router.get("/metrics/db-pool")
+async def db_pool_metrics():
+    """
+    Connection pool usage for this worker: checkouts, peak concurrency and wait times.
+    """
+    return JSONResponse(get_pool_metrics())
+
+
+@router.get("/metrics/fragment-cache")
+async def fragment_cache_metrics():
+    """
+    Rendered fragment cache for this worker: size and hit/miss counters.
+    """
+    return JSONResponse(fragment_cache.stats())
@@ -1,15 +1,16 @@
 """
 Payment Routes - Handle payment verification and order completion.
 """
-from fastapi import APIRouter, Request, Form
+from fastapi import APIRouter, Depends, Request, Form
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
 
-from app.core.database import SessionLocal
-from app.services import cart_service, payment_service, order_service
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db
+from app.core.templating import templates
+from app.services import cart_service, payment_service, order_service, webhook_service
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 
 @router.post("/payment/verify")
@@ -17,12 +18,12 @@ async def verify_payment(
     request: Request,
     razorpay_order_id: str = Form(...),
     razorpay_payment_id: str = Form(...),
-    razorpay_signature: str = Form(...)
+    razorpay_signature: str = Form(...),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Verify Razorpay payment and create order in database.
+    Verify Razorpay payment and mark the pending order (created by /checkout/create-order) as paid.
     """
-    db = SessionLocal()
     try:
         # Verify payment signature
         is_valid = payment_service.verify_payment_signature(
@@ -37,80 +38,107 @@ async def verify_payment(
                 "message": "Payment verification failed"
             }, status_code=400)
         
-        # Get customer data from session
-        customer_data = request.session.get("customer_data")
-        if not customer_data:
+        # A webhook may already have marked the order paid; that's fine
+        payment = await order_service.mark_order_paid_async(
+            db,
+            razorpay_order_id,
+            razorpay_payment_id,
+            razorpay_signature
+        )
+        
+        if payment is None:
             return JSONResponse({
                 "success": False,
-                "message": "Customer data not found"
-            }, status_code=400)
+                "message": "Order not found"
+            }, status_code=404)
         
-        # Get cart items
-        cart_items, total = cart_service.get_cart_items(request.session, db)
-        
-        if not cart_items:
+        # The order expired and released its stock before the payment arrived
+        if payment.payment_status == order_service.PAID_AFTER_CANCEL:
+            request.session.pop("pending_checkout", None)
             return JSONResponse({
                 "success": False,
-                "message": "Cart is empty"
-            }, status_code=400)
+                "message": "This order expired before your payment arrived, so it was cancelled. "
+                           "Your payment will be refunded; please place the order again."
+            }, status_code=409)
         
-        # Create order in database
-        payment_info = {
-            "order_id": razorpay_order_id,
-            "payment_id": razorpay_payment_id,
-            "signature": razorpay_signature
-        }
-        
-        order = order_service.create_order(
-            db=db,
-            customer_data=customer_data,
-            cart_items=cart_items,
-            payment_info=payment_info
-        )
-        
-        # Clear cart after successful order
-        cart_service.clear_cart(request.session)
+        order_id = payment.order_id
         
-        # Clear customer data
-        request.session.pop("customer_data", None)
+        # Clear cart and the paid pending checkout after successful payment
+        await cart_service.clear_cart_async(request.session)
+        request.session.pop("pending_checkout", None)
         
         return JSONResponse({
             "success": True,
-            "order_id": order.id,
-            "redirect_url": f"/payment/success?order_id={order.id}"
+            "order_id": order_id,
+            "redirect_url": f"/payment/success?order_id={order_id}"
         })
         
     except Exception as e:
         return JSONResponse({
             "success": False,
-            "message": f"Order creation failed: {str(e)}"
+            "message": f"Payment update failed: {str(e)}"
         }, status_code=500)
-    finally:
-        db.close()
 
 
-@router.get("/payment/success", response_class=HTMLResponse)
-async def payment_success(request: Request, order_id: int):
+@router.post("/payment/webhook")
+async def payment_webhook(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
-    Display order confirmation page after successful payment.
+    Receive Razorpay webhooks.
+    The event is verified and stored, then acknowledged; orders are updated
+    by the background webhook consumer.
     """
-    db = SessionLocal()
+    if not webhook_service.webhook_verifier:
+        return JSONResponse({
+            "success": False,
+            "message": "Webhooks are not configured"
+        }, status_code=503)
+    
+    body = await request.body()
+    signature = request.headers.get("X-Razorpay-Signature", "")
+    
+    if not webhook_service.webhook_verifier.verify_message(body, signature):
+        return JSONResponse({
+            "success": False,
+            "message": "Invalid signature"
+        }, status_code=400)
+    
     try:
-        order = order_service.get_order_by_id(db, order_id)
-        
-        if not order:
-            return RedirectResponse("/", status_code=302)
-        
-        return templates.TemplateResponse(
-            "success.html",
-            {
-                "request": request,
-                "order": order,
-                "cart_count": 0  # Cart is cleared after order
-            }
+        stored = await webhook_service.record_event_async(
+            db, request.headers.get("X-Razorpay-Event-Id", ""), body
         )
-    finally:
-        db.close()
+    except ValueError as e:
+        return JSONResponse({
+            "success": False,
+            "message": str(e)
+        }, status_code=400)
+    
+    if stored:
+        webhook_service.notify_consumer()
+    
+    return JSONResponse({
+        "success": True,
+        "duplicate": not stored
+    })
+
+
+@router.get("/payment/success", response_class=HTMLResponse)
+async def payment_success(request: Request, order_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Display order confirmation page after successful payment.
+    """
+    order = await order_service.get_order_by_id_async(db, order_id)
+    
+    if not order:
+        return RedirectResponse("/", status_code=302)
+    
+    return templates.TemplateResponse(
+        "success.html",
+        {
+            "request": request,
+            "order": order,
+            "cart_count": 0  # Cart is cleared after order
+        }
+    )
 
 
 @router.get("/payment/failure", response_class=HTMLResponse)
@@ -122,6 +150,6 @@ async def payment_failure(request: Request):
         "failure.html",
         {
             "request": request,
-            "cart_count": cart_service.get_cart_count(request.session)
+            "cart_count": await cart_service.get_cart_count_async(request.session)
         }
     )
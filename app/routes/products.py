@@ -1,81 +1,154 @@
-from fastapi import APIRouter, Request
-from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from dataclasses import asdict
+from typing import Optional
+from urllib.parse import urlencode
 
-from app.core.database import SessionLocal
-from app.models.product import Product
-from app.services import cart_service
-from app.models.product import Product
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import HTMLResponse, JSONResponse
+from markupsafe import Markup
 
-router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
-
-# ---------------- ALL PRODUCTS ----------------
-@router.get("/products", response_class=HTMLResponse)
-def all_products(request: Request):
+from app.core.conditional_get import record_catalog
+from app.core.config import PRODUCTS_MAX_PAGE_SIZE, PRODUCTS_PAGE_SIZE
+from app.core.templating import templates
+from app.services import cart_service, catalog_cache, fragment_cache, product_listing
+from app.services.product_listing import InvalidCursorError
 
-    db = SessionLocal()
-    products = db.query(Product).all()
-    cart_count = cart_service.get_cart_count(request.session)
-    db.close()
+router = APIRouter()
 
-    return templates.TemplateResponse(
-        "products.html",
-        {"request": request, "products": products, "title": "All Products", "cart_count": cart_count}
+# Shared listing query parameters: ?sort=id|price&after=<cursor>&limit=<n>
+SortParam = Query("id", pattern="^(id|price)$")
+LimitParam = Query(PRODUCTS_PAGE_SIZE, ge=1, le=PRODUCTS_MAX_PAGE_SIZE)
+
+
+# Category slug -> page title. Each slug is also served at its legacy path (/protein, ...)
+CATEGORY_TITLES = {
+    "protein": "Protein",
+    "oats": "Oats",
+    "muesli": "Muesli",
+    "peanut": "Peanut Butter",
+}
+
+def _render_grid(request: Request, category: Optional[str], sort: str, after: Optional[str], limit: int) -> Markup:
+    """
+    Product grid HTML for one keyset page, from the fragment cache when possible.
+    The grid doesn't depend on the visitor, so it is shared by every request.
+    
+    Raises:
+        InvalidCursorError: if after is malformed
+    """
+    catalog = catalog_cache.get_catalog()
+    record_catalog(request, catalog)
+    
+    def render() -> str:
+        page = product_listing.get_page(catalog, category, sort, after, limit)
+        
+        next_url = None
+        if page.next_cursor:
+            next_url = f"{request.url.path}?{urlencode({'sort': sort, 'after': page.next_cursor, 'limit': limit})}"
+        
+        return templates.get_template("partials/product_grid.html").render(
+            products=page.products, stock=catalog.stock, next_url=next_url
+        )
+    
+    # The next page link points at the path being served (legacy alias or /category/...)
+    return fragment_cache.get_or_render(
+        "grid", catalog, (request.url.path, category, sort, after, limit), render
     )
 
 
-# ---------------- PROTEIN ----------------
-@router.get("/protein", response_class=HTMLResponse)
-def protein(request: Request):
-    db = SessionLocal()
-    products = db.query(Product).filter(Product.category == "protein").all()
-    cart_count = cart_service.get_cart_count(request.session)
-    db.close()
-
-    return templates.TemplateResponse(
-        "products.html",
-        {"request": request, "products": products, "title": "Protein", "cart_count": cart_count}
-    )
+def _render_listing(
+    request: Request,
+    category: Optional[str],
+    title: str,
+    sort: str,
+    after: Optional[str],
+    limit: int
+):
+    """Render one keyset page of a listing: the cached grid plus the per-visitor page shell."""
+    try:
+        grid_html = _render_grid(request, category, sort, after, limit)
+    except InvalidCursorError as e:
+        return HTMLResponse(str(e), status_code=400)
 
-
-# ---------------- OATS ----------------
-@router.get("/oats", response_class=HTMLResponse)
-def oats(request: Request):
-    db = SessionLocal()
-    products = db.query(Product).filter(Product.category == "oats").all()
     cart_count = cart_service.get_cart_count(request.session)
-    db.close()
 
     return templates.TemplateResponse(
         "products.html",
-        {"request": request, "products": products, "title": "Oats", "cart_count": cart_count}
+        {
+            "request": request,
+            "grid_html": grid_html,
+            "title": title,
+            "cart_count": cart_count
+        }
     )
 
 
-# ---------------- MUESLI ----------------
-@router.get("/muesli", response_class=HTMLResponse)
-def muesli(request: Request):
-    db = SessionLocal()
-    products = db.query(Product).filter(Product.category == "muesli").all()
-    cart_count = cart_service.get_cart_count(request.session)
-    db.close()
-
-    return templates.TemplateResponse(
-        "products.html",
-        {"request": request, "products": products, "title": "Muesli", "cart_count": cart_count}
-    )
-
+# ---------------- PRODUCTS API ----------------
+@router.get("/api/products")
+def products_api(
+    category: Optional[str] = None,
+    sort: str = SortParam,
+    after: Optional[str] = None,
+    limit: int = LimitParam
+):
+    """
+    One keyset page of products as JSON, for infinite scroll.
+    Pass the returned next_cursor as ?after= to get the following page.
+    """
+    catalog = catalog_cache.get_catalog()
+    try:
+        page = product_listing.get_page(catalog, category, sort, after, limit)
+    except InvalidCursorError as e:
+        return JSONResponse({"success": False, "message": str(e)}, status_code=400)
+
+    return JSONResponse({
+        "products": [{**asdict(product), "stock": catalog.stock.get(product.id)} for product in page.products],
+        "next_cursor": page.next_cursor
+    })
 
-# ---------------- PEANUT BUTTER ----------------
-@router.get("/peanut", response_class=HTMLResponse)
-def peanut_butter(request: Request):
-    db = SessionLocal()
-    products = db.query(Product).filter(Product.category == "peanut").all()
-    cart_count = cart_service.get_cart_count(request.session)
-    db.close()
 
-    return templates.TemplateResponse(
-        "products.html",
-        {"request": request, "products": products, "title": "Peanut Butter", "cart_count": cart_count}
+# ---------------- ALL PRODUCTS ----------------
+@router.get("/products", response_class=HTMLResponse)
+def all_products(
+    request: Request,
+    sort: str = SortParam,
+    after: Optional[str] = None,
+    limit: int = LimitParam
+):
+    return _render_listing(request, None, "All Products", sort, after, limit)
+
+
+# ---------------- CATEGORIES ----------------
+@router.get("/category/{slug}", response_class=HTMLResponse)
+def category_page(
+    request: Request,
+    slug: str,
+    sort: str = SortParam,
+    after: Optional[str] = None,
+    limit: int = LimitParam
+):
+    """Listing for one category, served from the catalog's category map."""
+    title = CATEGORY_TITLES.get(slug)
+    if title is None:
+        if slug not in catalog_cache.get_catalog().by_category:
+            return HTMLResponse("Category not found", status_code=404)
+        title = slug.replace("-", " ").title()
+
+    return _render_listing(request, slug, title, sort, after, limit)
+
+
+def _legacy_category_route(slug: str):
+    def legacy_category_page(
+        request: Request,
+        sort: str = SortParam,
+        after: Optional[str] = None,
+        limit: int = LimitParam
+    ):
+        return category_page(request, slug, sort, after, limit)
+    return legacy_category_page
+
+
+for _slug in CATEGORY_TITLES:
+    router.add_api_route(
+        f"/{_slug}", _legacy_category_route(_slug),
+        methods=["GET"], response_class=HTMLResponse, name=f"category_{_slug}"
     )
@@ -1,35 +1,47 @@
-from fastapi import APIRouter, Request
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy import or_
-from app.core.database import SessionLocal
-from app.models.product import Product
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import HTMLResponse, JSONResponse
+from app.core.config import SUGGEST_CACHE_MAX_AGE, SUGGEST_LIMIT
+from sqlalchemy.orm import Session
+from app.core.conditional_get import record_catalog
+from app.core.database import get_db
+from app.core.templating import templates
+from app.services import catalog_cache, fragment_cache, search_engine, suggest_service
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("/search", response_class=HTMLResponse, name="search_products")
-def search_products(request: Request, q: str = ""):
-    db = SessionLocal()
+def search_products(request: Request, q: str = "", db: Session = Depends(get_db)):
+    # Results only depend on the catalog and the query words, so the rendered
+    # grid is cached; a repeated search skips both the search and the render
+    query_key = " ".join(q.lower().split())
+    catalog = catalog_cache.get_catalog(db)
+    record_catalog(request, catalog)
 
-    if q:
-        products = db.query(Product).filter(
-            or_(
-                Product.name.ilike(f"%{q}%"),
-                Product.brand.ilike(f"%{q}%")
-            )
-        ).all()
-    else:
-        products = []
+    def render() -> str:
+        products = search_engine.search(q, db) if query_key else []
+        return templates.get_template("partials/product_grid.html").render(products=products, stock=catalog.stock)
 
-    db.close()
+    grid_html = fragment_cache.get_or_render("search", catalog, query_key, render)
 
     return templates.TemplateResponse(
         "products.html",
         {
             "request": request,
-            "products": products,
+            "grid_html": grid_html,
             "query": q
         }
-    )
\ No newline at end of file
+    )
+
+
+@router.get("/search/suggest", name="search_suggest")
+def search_suggest(q: str = "", limit: int = SUGGEST_LIMIT):
+    """
+    Typeahead suggestions for the search box.
+    Served from the in-memory suggestion trie without templates. The database is only
+    read when the catalog cache itself reloads (TTL expiry or a product change).
+    """
+    return JSONResponse(
+        {"query": q, "suggestions": suggest_service.suggest(q, limit)},
+        headers={"Cache-Control": f"public, max-age={SUGGEST_CACHE_MAX_AGE}"}
+    )
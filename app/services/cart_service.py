@@ -1,20 +1,180 @@
 """
 Cart Service - Business logic for shopping cart operations.
-Handles cart management using session-based storage.
+Handles cart management using a server-side cart store; the session only
+holds an opaque cart id and the cart item count for the header badge.
+Each cart keeps a running count and total that are updated incrementally
+as items change, and re-priced when the catalog version changes.
+
+Functions ending in _async are equivalents for async route handlers.
 """
-from typing import Dict, List, Optional
+import secrets
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.models.product import Product
+from app.services import catalog_cache
+from app.services.catalog_cache import Catalog
+from app.services.cart_store import CartData, get_cart_store
 
 
-def get_cart_from_session(session: dict) -> Dict[int, int]:
+def get_cart_id(session: dict, create: bool = False) -> Optional[str]:
     """
-    Get cart from session storage.
-    Returns dict with product_id as key and quantity as value.
+    Get the cart id stored in the session.
+    
+    Args:
+        session: Request session object
+        create: Generate and store a new id if the session has none
+    
+    Returns:
+        Cart id, or None if the session has no cart and create is False
     """
-    if "cart" not in session:
-        session["cart"] = {}
-    return session["cart"]
+    cart_id = session.get("cart_id")
+    if cart_id is None and create:
+        cart_id = secrets.token_urlsafe(16)
+        session["cart_id"] = cart_id
+    return cart_id
+
+
+def _reprice(cart: CartData, catalog: Catalog) -> None:
+    """Recompute the cart total against a catalog."""
+    total = 0.0
+    for product_id_str, quantity in cart.items.items():
+        product = catalog.get_product(int(product_id_str))
+        if product:
+            total += product.price * quantity
+    cart.total = total
+    cart.catalog_version = catalog.version
+
+
+def _pop_legacy_cart(session: dict, catalog: Catalog) -> Optional[CartData]:
+    """Take a cart serialized into the cookie (before server-side storage) out of the session."""
+    legacy_cart = session.pop("cart", None)
+    if not legacy_cart:
+        return None
+    cart = CartData(items=dict(legacy_cart), count=sum(legacy_cart.values()))
+    _reprice(cart, catalog)
+    return cart
+
+
+def load_cart(session: dict) -> CartData:
+    """
+    Load this session's cart from the cart store.
+    Changes must be written back with save_cart.
+    
+    Args:
+        session: Request session object
+    
+    Returns:
+        CartData (empty if the session has no cart yet)
+    """
+    if "cart" in session:
+        cart = _pop_legacy_cart(session, catalog_cache.get_catalog())
+        if cart:
+            save_cart(session, cart)
+            return cart
+    
+    cart_id = get_cart_id(session)
+    cart = get_cart_store().load(cart_id) if cart_id is not None else None
+    cart = cart or CartData()
+    session["cart_count"] = cart.count
+    return cart
+
+
+async def load_cart_async(session: dict) -> CartData:
+    """Async variant of load_cart."""
+    if "cart" in session:
+        cart = _pop_legacy_cart(session, await catalog_cache.get_catalog_async())
+        if cart:
+            await save_cart_async(session, cart)
+            return cart
+    
+    cart_id = get_cart_id(session)
+    cart = await get_cart_store().load_async(cart_id) if cart_id is not None else None
+    cart = cart or CartData()
+    session["cart_count"] = cart.count
+    return cart
+
+
+def get_cart_from_session(session: dict) -> Dict[str, int]:
+    """
+    Get cart line items.
+    Returns dict with product_id (str) as key and quantity as value.
+    """
+    return load_cart(session).items
+
+
+def save_cart(session: dict, cart: CartData) -> None:
+    """
+    Write a cart back to the cart store, creating a cart id if needed.
+    
+    Args:
+        session: Request session object
+        cart: Cart as returned by load_cart
+    """
+    get_cart_store().save(get_cart_id(session, create=True), cart)
+    session["cart_count"] = cart.count
+
+
+async def save_cart_async(session: dict, cart: CartData) -> None:
+    """Async variant of save_cart."""
+    await get_cart_store().save_async(get_cart_id(session, create=True), cart)
+    session["cart_count"] = cart.count
+
+
+# ---------------- CART CHANGES ----------------
+# Each helper applies a change to a loaded cart and returns whether it changed,
+# so the sync and async entry points only differ in how they load and save.
+# Updates and removals return the cart's summary too, so a request reads the cart once.
+
+def _set_quantity(cart: CartData, product_key: str, quantity: int, catalog: Catalog) -> None:
+    """Set a line quantity (0 or less removes it), keeping count and total in step."""
+    previous = cart.items.get(product_key, 0)
+    
+    if quantity > 0:
+        cart.items[product_key] = quantity
+    else:
+        cart.items.pop(product_key, None)
+        quantity = 0
+    
+    cart.count += quantity - previous
+    
+    if cart.catalog_version == catalog.version:
+        product = catalog.get_product(int(product_key))
+        if product:
+            cart.total += product.price * (quantity - previous)
+    else:
+        # Prices may have changed since the total was computed
+        _reprice(cart, catalog)
+
+
+def _add(cart: CartData, product_id: int, quantity: int, catalog: Catalog) -> bool:
+    # Convert to string for JSON serialization
+    product_key = str(product_id)
+    _set_quantity(cart, product_key, cart.items.get(product_key, 0) + quantity, catalog)
+    return True
+
+
+def _update(cart: CartData, product_id: int, quantity: int, catalog: Catalog) -> bool:
+    product_key = str(product_id)
+    if product_key not in cart.items:
+        return False
+    _set_quantity(cart, product_key, quantity, catalog)
+    return True
+
+
+def _remove(cart: CartData, product_id: int, catalog: Catalog) -> bool:
+    product_key = str(product_id)
+    if product_key not in cart.items:
+        return False
+    _set_quantity(cart, product_key, 0, catalog)
+    return True
+
+
+def _reprice_if_stale(cart: CartData, catalog: Catalog) -> bool:
+    """Reprice the cart if the catalog changed since its total was computed; returns whether it did."""
+    if cart.items and cart.catalog_version != catalog.version:
+        _reprice(cart, catalog)
+        return True
+    return False
 
 
 def add_to_cart(session: dict, product_id: int, quantity: int = 1) -> bool:
@@ -30,94 +190,117 @@ def add_to_cart(session: dict, product_id: int, quantity: int = 1) -> bool:
     Returns:
         True if successful
     """
-    cart = get_cart_from_session(session)
-    
-    # Convert to string for JSON serialization
-    product_key = str(product_id)
-    
-    if product_key in cart:
-        cart[product_key] += quantity
-    else:
-        cart[product_key] = quantity
-    
-    session["cart"] = cart
+    cart = load_cart(session)
+    _add(cart, product_id, quantity, catalog_cache.get_catalog())
+    save_cart(session, cart)
     return True
 
 
-def update_quantity(session: dict, product_id: int, quantity: int) -> bool:
+async def add_to_cart_async(session: dict, product_id: int, quantity: int = 1) -> bool:
+    """Async variant of add_to_cart."""
+    cart = await load_cart_async(session)
+    _add(cart, product_id, quantity, await catalog_cache.get_catalog_async())
+    await save_cart_async(session, cart)
+    return True
+
+
+def update_quantity(session: dict, product_id: int, quantity: int) -> Tuple[int, float]:
     """
     Update quantity of a product in cart.
     
     Args:
         session: Request session object
-        product_id: ID of product to update
-        quantity: New quantity (must be > 0)
+        product_id: ID of product to update (ignored if not in the cart)
+        quantity: New quantity (0 or negative removes the item)
     
     Returns:
-        True if successful, False if product not in cart
+        Tuple of (item_count, total_amount) after the update, as get_cart_summary
     """
-    cart = get_cart_from_session(session)
-    product_key = str(product_id)
-    
-    if product_key not in cart:
-        return False
-    
-    if quantity <= 0:
-        # Remove item if quantity is 0 or negative
-        del cart[product_key]
-    else:
-        cart[product_key] = quantity
-    
-    session["cart"] = cart
-    return True
+    cart = load_cart(session)
+    catalog = catalog_cache.get_catalog()
+    changed = _update(cart, product_id, quantity, catalog)
+    if _reprice_if_stale(cart, catalog) or changed:
+        save_cart(session, cart)
+    return cart.count, cart.total
+
 
+async def update_quantity_async(session: dict, product_id: int, quantity: int) -> Tuple[int, float]:
+    """Async variant of update_quantity."""
+    cart = await load_cart_async(session)
+    catalog = await catalog_cache.get_catalog_async()
+    changed = _update(cart, product_id, quantity, catalog)
+    if _reprice_if_stale(cart, catalog) or changed:
+        await save_cart_async(session, cart)
+    return cart.count, cart.total
 
-def remove_from_cart(session: dict, product_id: int) -> bool:
+
+def remove_from_cart(session: dict, product_id: int) -> Tuple[int, float]:
     """
     Remove a product from cart completely.
     
     Args:
         session: Request session object
-        product_id: ID of product to remove
+        product_id: ID of product to remove (ignored if not in the cart)
     
     Returns:
-        True if successful, False if product not in cart
+        Tuple of (item_count, total_amount) after the removal, as get_cart_summary
     """
-    cart = get_cart_from_session(session)
-    product_key = str(product_id)
-    
-    if product_key in cart:
-        del cart[product_key]
-        session["cart"] = cart
-        return True
-    
-    return False
+    cart = load_cart(session)
+    catalog = catalog_cache.get_catalog()
+    changed = _remove(cart, product_id, catalog)
+    if _reprice_if_stale(cart, catalog) or changed:
+        save_cart(session, cart)
+    return cart.count, cart.total
 
 
-def get_cart_items(session: dict, db: Session) -> tuple[List[dict], float]:
+async def remove_from_cart_async(session: dict, product_id: int) -> Tuple[int, float]:
+    """Async variant of remove_from_cart."""
+    cart = await load_cart_async(session)
+    catalog = await catalog_cache.get_catalog_async()
+    changed = _remove(cart, product_id, catalog)
+    if _reprice_if_stale(cart, catalog) or changed:
+        await save_cart_async(session, cart)
+    return cart.count, cart.total
+
+
+# ---------------- CART READS ----------------
+
+def get_cart_summary(session: dict) -> Tuple[int, float]:
     """
-    Get all cart items with product details and calculate total.
+    Get cart item count and total from the running summary.
+    The total is only recomputed if the catalog changed since it was last priced.
     
     Args:
         session: Request session object
-        db: Database session
     
     Returns:
-        Tuple of (cart_items_list, total_amount)
-        Each cart item is a dict with product details and quantity
+        Tuple of (item_count, total_amount)
     """
-    cart = get_cart_from_session(session)
+    cart = load_cart(session)
     
-    if not cart:
-        return [], 0.0
+    if _reprice_if_stale(cart, catalog_cache.get_catalog()):
+        save_cart(session, cart)
     
+    return cart.count, cart.total
+
+
+async def get_cart_summary_async(session: dict) -> Tuple[int, float]:
+    """Async variant of get_cart_summary."""
+    cart = await load_cart_async(session)
+    
+    if _reprice_if_stale(cart, await catalog_cache.get_catalog_async()):
+        await save_cart_async(session, cart)
+    
+    return cart.count, cart.total
+
+
+def _build_cart_items(cart: Dict[str, int], catalog: Catalog) -> tuple[List[dict], float]:
     cart_items = []
     total = 0.0
     
     for product_id_str, quantity in cart.items():
-        product_id = int(product_id_str)
-        product = db.query(Product).filter(Product.id == product_id).first()
-        
+        product = catalog.get_product(int(product_id_str))
+    
         if product:
             subtotal = product.price * quantity
             cart_items.append({
@@ -130,9 +313,41 @@ def get_cart_items(session: dict, db: Session) -> tuple[List[dict], float]:
     return cart_items, total
 
 
+def get_cart_items(session: dict, db: Session) -> tuple[List[dict], float]:
+    """
+    Get all cart items with product details and calculate total.
+    Products are resolved from the catalog cache.
+    
+    Args:
+        session: Request session object
+        db: Database session (only used if the catalog cache needs a reload)
+    
+    Returns:
+        Tuple of (cart_items_list, total_amount)
+        Each cart item is a dict with product details and quantity
+    """
+    cart = get_cart_from_session(session)
+    
+    if not cart:
+        return [], 0.0
+    
+    return _build_cart_items(cart, catalog_cache.get_catalog(db))
+
+
+async def get_cart_items_async(session: dict, db: AsyncSession) -> tuple[List[dict], float]:
+    """Async variant of get_cart_items."""
+    cart = (await load_cart_async(session)).items
+    
+    if not cart:
+        return [], 0.0
+    
+    return _build_cart_items(cart, await catalog_cache.get_catalog_async(db))
+
+
 def get_cart_count(session: dict) -> int:
     """
     Get total number of items in cart.
+    Read from the count mirrored into the session, so it costs no store access.
     
     Args:
         session: Request session object
@@ -140,8 +355,16 @@ def get_cart_count(session: dict) -> int:
     Returns:
         Total item count
     """
-    cart = get_cart_from_session(session)
-    return sum(cart.values())
+    if "cart_count" not in session or "cart" in session:
+        return load_cart(session).count
+    return session["cart_count"]
+
+
+async def get_cart_count_async(session: dict) -> int:
+    """Async variant of get_cart_count."""
+    if "cart_count" not in session or "cart" in session:
+        return (await load_cart_async(session)).count
+    return session["cart_count"]
 
 
 def clear_cart(session: dict) -> None:
@@ -151,4 +374,17 @@ def clear_cart(session: dict) -> None:
     Args:
         session: Request session object
     """
-    session["cart"] = {}
+    session.pop("cart", None)
+    session["cart_count"] = 0
+    cart_id = get_cart_id(session)
+    if cart_id is not None:
+        get_cart_store().delete(cart_id)
+
+
+async def clear_cart_async(session: dict) -> None:
+    """Async variant of clear_cart."""
+    session.pop("cart", None)
+    session["cart_count"] = 0
+    cart_id = get_cart_id(session)
+    if cart_id is not None:
+        await get_cart_store().delete_async(cart_id)
@@ -0,0 +1,269 @@
+"""
+Cart Store - Pluggable server-side storage for shopping carts.
+Carts are keyed by an opaque id kept in the session, so the session cookie
+stays the same size however many items the cart holds.
+
+Both backends are bounded: the memory store evicts least recently used carts,
+and a background CartPruner deletes abandoned rows from the carts table.
+"""
+import json
+import threading
+import traceback
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import (
+    CART_BACKEND,
+    CART_MAX_AGE,
+    CART_MEMORY_MAX_CARTS,
+    CART_PRUNE_INTERVAL,
+    CART_SQLITE_MAX_CARTS,
+)
+from app.core.database import async_engine, engine
+from app.models.cart import Cart
+from app.utils.lru import LRUCache
+
+CART_BACKENDS = ("sqlite", "memory")
+
+
+@dataclass
+class CartData:
+    """
+    A stored cart: line items plus a running summary.
+    
+    Attributes:
+        items: Mapping of product id (str) to quantity
+        count: Sum of all quantities
+        total: Cart value priced against catalog_version
+        catalog_version: Catalog version the total was computed with
+    """
+    items: Dict[str, int] = field(default_factory=dict)
+    count: int = 0
+    total: float = 0.0
+    catalog_version: Optional[str] = None
+
+
+class CartStore:
+    """Interface for cart storage backends."""
+
+    def load(self, cart_id: str) -> Optional[CartData]:
+        raise NotImplementedError
+
+    def save(self, cart_id: str, cart: CartData) -> None:
+        raise NotImplementedError
+
+    def delete(self, cart_id: str) -> None:
+        raise NotImplementedError
+
+    def prune(self) -> int:
+        """Delete abandoned carts; returns how many. Self-bounding backends have nothing to do."""
+        return 0
+
+    # Async variants for async route handlers. Backends that don't do I/O
+    # can rely on these defaults, which call the sync methods directly.
+
+    async def load_async(self, cart_id: str) -> Optional[CartData]:
+        return self.load(cart_id)
+
+    async def save_async(self, cart_id: str, cart: CartData) -> None:
+        self.save(cart_id, cart)
+
+    async def delete_async(self, cart_id: str) -> None:
+        self.delete(cart_id)
+
+
+class MemoryCartStore(CartStore):
+    """
+    Per-process cart storage with least-recently-used eviction.
+    Carts are lost on restart and not shared between workers.
+    """
+
+    def __init__(self, max_carts: int = CART_MEMORY_MAX_CARTS):
+        self._carts = LRUCache(max_carts)
+
+    def load(self, cart_id: str) -> Optional[CartData]:
+        cart = self._carts.get(cart_id)
+        # Hand out copies so callers can't mutate the stored cart without saving
+        return replace(cart, items=dict(cart.items)) if cart else None
+
+    def save(self, cart_id: str, cart: CartData) -> None:
+        self._carts.set(cart_id, replace(cart, items=dict(cart.items)))
+
+    def delete(self, cart_id: str) -> None:
+        self._carts.pop(cart_id)
+
+
+class SQLiteCartStore(CartStore):
+    """
+    Cart storage in the carts table, shared by every worker using the database.
+    Carts untouched for max_age days, and all but the max_carts most recently
+    updated, are removed by prune().
+    """
+
+    def __init__(
+        self,
+        bind: Engine = engine,
+        async_bind: AsyncEngine = async_engine,
+        max_age: float = CART_MAX_AGE,
+        max_carts: int = CART_SQLITE_MAX_CARTS
+    ):
+        self.engine = bind
+        self.async_engine = async_bind
+        self.max_age = max_age
+        self.max_carts = max_carts
+
+    @staticmethod
+    def _select(cart_id: str):
+        return (
+            select(Cart.items, Cart.item_count, Cart.total, Cart.catalog_version)
+            .where(Cart.id == cart_id)
+        )
+
+    @staticmethod
+    def _from_row(row) -> Optional[CartData]:
+        if row is None:
+            return None
+        return CartData(
+            items=json.loads(row.items), count=row.item_count,
+            total=row.total, catalog_version=row.catalog_version
+        )
+
+    @staticmethod
+    def _upsert(cart_id: str, cart: CartData):
+        statement = sqlite_insert(Cart).values(
+            id=cart_id,
+            items=json.dumps(cart.items),
+            item_count=cart.count,
+            total=cart.total,
+            catalog_version=cart.catalog_version,
+            updated_at=datetime.utcnow(),
+        )
+        columns = ["items", "item_count", "total", "catalog_version", "updated_at"]
+        return statement.on_conflict_do_update(
+            index_elements=[Cart.id],
+            set_={column: statement.excluded[column] for column in columns},
+        )
+
+    @staticmethod
+    def _delete(cart_id: str):
+        return Cart.__table__.delete().where(Cart.id == cart_id)
+
+    def _prune_statements(self) -> list:
+        """DELETEs for expired carts and for carts beyond max_carts (both walk ix_carts_updated_at)."""
+        carts = Cart.__table__
+        statements = []
+        if self.max_age > 0:
+            cutoff = datetime.utcnow() - timedelta(days=self.max_age)
+            statements.append(carts.delete().where(carts.c.updated_at < cutoff))
+        if self.max_carts > 0:
+            overflow = select(carts.c.id).order_by(carts.c.updated_at.desc()).offset(self.max_carts)
+            statements.append(carts.delete().where(carts.c.id.in_(overflow)))
+        return statements
+
+    def load(self, cart_id: str) -> Optional[CartData]:
+        with self.engine.connect() as conn:
+            return self._from_row(conn.execute(self._select(cart_id)).first())
+
+    def save(self, cart_id: str, cart: CartData) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(self._upsert(cart_id, cart))
+
+    def delete(self, cart_id: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(self._delete(cart_id))
+
+    def prune(self) -> int:
+        removed = 0
+        with self.engine.begin() as conn:
+            for statement in self._prune_statements():
+                removed += conn.execute(statement).rowcount
+        return removed
+
+    async def load_async(self, cart_id: str) -> Optional[CartData]:
+        async with self.async_engine.connect() as conn:
+            return self._from_row((await conn.execute(self._select(cart_id))).first())
+
+    async def save_async(self, cart_id: str, cart: CartData) -> None:
+        async with self.async_engine.begin() as conn:
+            await conn.execute(self._upsert(cart_id, cart))
+
+    async def delete_async(self, cart_id: str) -> None:
+        async with self.async_engine.begin() as conn:
+            await conn.execute(self._delete(cart_id))
+
+
+class CartPruner:
+    """Background thread calling store.prune() now and then every interval seconds."""
+
+    def __init__(self, store: CartStore, interval: float = CART_PRUNE_INTERVAL):
+        self.store = store
+        self.interval = interval
+        self.removed = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self) -> None:
+        while True:
+            try:
+                self.removed += self.store.prune()
+            except Exception:
+                traceback.print_exc()
+            if self._stop.wait(self.interval):
+                break
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="cart-pruner", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+_store: Optional[CartStore] = None
+_pruner: Optional[CartPruner] = None
+
+
+def get_cart_store() -> CartStore:
+    """
+    Get the cart store configured by CART_BACKEND.
+    
+    Returns:
+        Shared CartStore instance
+    """
+    global _store
+
+    if _store is None:
+        if CART_BACKEND == "memory":
+            _store = MemoryCartStore()
+        elif CART_BACKEND == "sqlite":
+            _store = SQLiteCartStore()
+        else:
+            raise ValueError(f"Unknown CART_BACKEND {CART_BACKEND!r}, expected one of {CART_BACKENDS}")
+    return _store
+
+
+def start_pruner() -> None:
+    """Start pruning this process's cart store (called at app startup)."""
+    global _pruner
+    store = get_cart_store()
+    if isinstance(store, SQLiteCartStore) and _pruner is None:
+        _pruner = CartPruner(store)
+        _pruner.start()
+
+
+def stop_pruner() -> None:
+    """Stop the cart pruner (called at app shutdown)."""
+    global _pruner
+    if _pruner is not None:
+        _pruner.stop()
+        _pruner = None
@@ -0,0 +1,411 @@
+"""
+Catalog Cache - In-process cache of the product catalog.
+Holds immutable product snapshots indexed by id and by category so that
+listing, cart and checkout requests don't need to touch the database.
+
+Stock is kept out of the snapshots and out of the catalog version: it changes
+with every order, while everything derived from the version (search index,
+suggestions, listings, rendered fragments, ETags, cart prices) only depends on
+product content. Stock levels live in a separate StockLevels lookup that order
+placement patches in place. Stock released elsewhere (another worker, or
+reconcile_payments.py cancelling unpaid orders) bumps the stock_generation
+row; every CATALOG_STOCK_CHECK_INTERVAL seconds one request polls it and, if
+it moved, reloads just the stock levels.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, fields
+from itertools import chain
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import CATALOG_CACHE_TTL, CATALOG_STOCK_CHECK_INTERVAL
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.models.product import Product
+from app.services.stock_service import current_generation_statement
+
+
+def _price_value(price) -> int:
+    """
+    Price in whole rupees. Some rows store it as text with thousands
+    separators (e.g. "15,549"), which SQLite accepts despite the Integer column.
+    
+    Raises:
+        ValueError: If the price isn't a whole number even without separators
+    """
+    if isinstance(price, int):
+        return price
+    return int(str(price).replace(",", ""))
+
+
+@dataclass(frozen=True)
+class ProductSnapshot:
+    """
+    Read-only copy of a Product row's content.
+    Exposes the same attributes as the model (except stock, see StockLevels)
+    so templates and services can use either.
+    """
+    id: int
+    name: str
+    brand: str
+    category: str
+    description: Optional[str]
+    price: int
+    weight: str
+    image: str
+
+    @classmethod
+    def from_model(cls, product: Product) -> "ProductSnapshot":
+        values = {field.name: getattr(product, field.name) for field in fields(cls)}
+        values["price"] = _price_value(values["price"])
+        return cls(**values)
+
+
+def _sold_out_digest(sold_out: Iterable[int]) -> str:
+    digest = hashlib.blake2b(digest_size=4)
+    for product_id in sorted(sold_out):
+        digest.update(product_id.to_bytes(8, "little", signed=True))
+    return digest.hexdigest()
+
+
+class StockLevels:
+    """
+    Current stock of every catalog product, updated in place.
+    
+    Attributes:
+        availability: Digest of which products are out of stock; changes only
+            when a product sells out or comes back, not on every order
+        generation: Stock generation the levels were last read at (None before any release)
+        checked_at: Monotonic timestamp of the last generation check
+    """
+
+    def __init__(self, levels: Mapping[int, Optional[int]], generation: Optional[int] = None):
+        self._levels: Dict[int, int] = {product_id: level or 0 for product_id, level in levels.items()}
+        self._sold_out = {product_id for product_id, level in self._levels.items() if level <= 0}
+        self.availability = _sold_out_digest(self._sold_out)
+        self.generation = generation
+        self.checked_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def get(self, product_id: int) -> int:
+        return self._levels.get(product_id, 0)
+
+    def in_stock(self, product_id: int) -> bool:
+        return self._levels.get(product_id, 0) > 0
+
+    def update(self, levels: Mapping[int, Optional[int]]) -> None:
+        """
+        Record new stock levels for some products (e.g. returned by a committed reservation).
+        Products that are not in the catalog are ignored.
+        """
+        with self._lock:
+            changed = False
+            for product_id, level in levels.items():
+                if product_id not in self._levels:
+                    continue
+                level = level or 0
+                self._levels[product_id] = level
+                if (level <= 0) != (product_id in self._sold_out):
+                    if level <= 0:
+                        self._sold_out.add(product_id)
+                    else:
+                        self._sold_out.discard(product_id)
+                    changed = True
+            if changed:
+                self.availability = _sold_out_digest(self._sold_out)
+
+    def refresh(self, levels: Mapping[int, Optional[int]], generation: Optional[int]) -> None:
+        """Record a generation check, with the levels re-read from the database if the generation moved."""
+        self.update(levels)
+        self.generation = generation
+        self.checked_at = time.monotonic()
+
+
+class Catalog:
+    """
+    Immutable view of the whole catalog's content at one point in time.
+    
+    Attributes:
+        products: All products ordered by id
+        by_id: Mapping of product id to snapshot
+        by_category: Mapping of category to products (ordered by id)
+        stock: Current StockLevels (the only part updated in place)
+        version: Content digest, changes whenever a product's content changes (not its stock)
+        loaded_at: Monotonic timestamp of the load
+    """
+
+    def __init__(
+        self,
+        products: Tuple[ProductSnapshot, ...],
+        stock: Mapping[int, Optional[int]],
+        stock_generation: Optional[int] = None
+    ):
+        self.products = products
+        self.stock = StockLevels(stock, stock_generation)
+        self.by_id: Mapping[int, ProductSnapshot] = MappingProxyType(
+            {product.id: product for product in products}
+        )
+
+        by_category: Dict[str, list] = {}
+        for product in products:
+            by_category.setdefault(product.category, []).append(product)
+        self.by_category: Mapping[str, Tuple[ProductSnapshot, ...]] = MappingProxyType(
+            {category: tuple(items) for category, items in by_category.items()}
+        )
+
+        digest = hashlib.blake2b(digest_size=8)
+        for product in products:
+            digest.update(repr(product).encode())
+        self.version = digest.hexdigest()
+        self.loaded_at = time.monotonic()
+
+    @property
+    def render_version(self) -> str:
+        """Version of what pages render from the catalog: content plus which products are in stock."""
+        return f"{self.version}-{self.stock.availability}"
+
+    def get_product(self, product_id: int) -> Optional[ProductSnapshot]:
+        return self.by_id.get(product_id)
+
+    def get_category(self, category: str) -> Tuple[ProductSnapshot, ...]:
+        return self.by_category.get(category, ())
+
+
+_catalog: Optional[Catalog] = None
+_lock = threading.Lock()
+# Held by the one request checking the stock generation; others keep serving the current levels
+_stock_lock = threading.Lock()
+_stock_levels_statement = select(Product.id, Product.stock)
+# Per event loop, so concurrent async reloads wait for one load instead of each running their own
+_async_locks: "WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = WeakKeyDictionary()
+
+
+def _build_catalog(products: Iterable[Product], stock_generation: Optional[int]) -> Catalog:
+    snapshots = []
+    stock = {}
+    for product in products:
+        snapshots.append(ProductSnapshot.from_model(product))
+        stock[product.id] = product.stock
+    return Catalog(tuple(snapshots), stock, stock_generation)
+
+
+def load_catalog(db: Session) -> Catalog:
+    """
+    Read every product from the database into a new Catalog.
+    
+    Args:
+        db: Database session
+    
+    Returns:
+        Freshly loaded Catalog
+    """
+    # Read the generation first: a release committed in between is picked up by the next check
+    stock_generation = db.scalar(current_generation_statement())
+    return _build_catalog(db.query(Product).order_by(Product.id).all(), stock_generation)
+
+
+async def load_catalog_async(db: AsyncSession) -> Catalog:
+    """
+    Async variant of load_catalog.
+    
+    Args:
+        db: Async database session
+    
+    Returns:
+        Freshly loaded Catalog
+    """
+    stock_generation = await db.scalar(current_generation_statement())
+    result = await db.execute(select(Product).order_by(Product.id))
+    return _build_catalog(result.scalars(), stock_generation)
+
+
+def _is_fresh(catalog: Optional[Catalog]) -> bool:
+    return catalog is not None and time.monotonic() - catalog.loaded_at < CATALOG_CACHE_TTL
+
+
+def _stock_check_due(catalog: Catalog) -> bool:
+    return time.monotonic() - catalog.stock.checked_at >= CATALOG_STOCK_CHECK_INTERVAL
+
+
+def _check_stock(catalog: Catalog, db: Optional[Session]) -> None:
+    """Refresh the catalog's stock levels if the stock generation moved since they were read."""
+    if not _stock_lock.acquire(blocking=False):
+        return
+    try:
+        if not _stock_check_due(catalog):
+            return
+        session = db if db is not None else SessionLocal()
+        try:
+            generation = session.scalar(current_generation_statement())
+            levels = {}
+            if generation != catalog.stock.generation:
+                levels = dict(session.execute(_stock_levels_statement).all())
+            catalog.stock.refresh(levels, generation)
+        finally:
+            if db is None:
+                session.close()
+    finally:
+        _stock_lock.release()
+
+
+async def _check_stock_async(catalog: Catalog, db: Optional[AsyncSession]) -> None:
+    """Async variant of _check_stock."""
+    if not _stock_lock.acquire(blocking=False):
+        return
+    try:
+        if not _stock_check_due(catalog):
+            return
+        session = db if db is not None else AsyncSessionLocal()
+        try:
+            generation = await session.scalar(current_generation_statement())
+            levels = {}
+            if generation != catalog.stock.generation:
+                levels = dict((await session.execute(_stock_levels_statement)).all())
+            catalog.stock.refresh(levels, generation)
+        finally:
+            if db is None:
+                await session.close()
+    finally:
+        _stock_lock.release()
+
+
+def get_catalog(db: Optional[Session] = None) -> Catalog:
+    """
+    Get the cached catalog, reloading it if it expired or was invalidated,
+    and its stock levels if a stock generation check is due and finds a release.
+    
+    Args:
+        db: Optional database session to use for a reload or stock check.
+            A short-lived session is opened if none is given.
+    
+    Returns:
+        Current Catalog
+    """
+    global _catalog
+
+    catalog = _catalog
+    if _is_fresh(catalog):
+        if _stock_check_due(catalog):
+            _check_stock(catalog, db)
+        return catalog
+
+    with _lock:
+        # Another thread may have reloaded while we waited for the lock
+        if _is_fresh(_catalog):
+            return _catalog
+
+        if db is not None:
+            _catalog = load_catalog(db)
+        else:
+            db = SessionLocal()
+            try:
+                _catalog = load_catalog(db)
+            finally:
+                db.close()
+
+        return _catalog
+
+
+def _get_async_lock() -> asyncio.Lock:
+    loop = asyncio.get_running_loop()
+    lock = _async_locks.get(loop)
+    if lock is None:
+        lock = _async_locks[loop] = asyncio.Lock()
+    return lock
+
+
+async def get_catalog_async(db: Optional[AsyncSession] = None) -> Catalog:
+    """
+    Async variant of get_catalog for async route handlers.
+    Concurrent reloads on the same event loop are coalesced into one.
+    
+    Args:
+        db: Optional async database session to use for a reload or stock check
+    
+    Returns:
+        Current Catalog
+    """
+    global _catalog
+
+    catalog = _catalog
+    if _is_fresh(catalog):
+        if _stock_check_due(catalog):
+            await _check_stock_async(catalog, db)
+        return catalog
+
+    async with _get_async_lock():
+        # Another task may have reloaded while we waited for the lock
+        if _is_fresh(_catalog):
+            return _catalog
+
+        if db is not None:
+            catalog = await load_catalog_async(db)
+        else:
+            async with AsyncSessionLocal() as db:
+                catalog = await load_catalog_async(db)
+
+        _catalog = catalog
+        return catalog
+
+
+def peek_catalog() -> Optional[Catalog]:
+    """
+    Get the cached catalog only if it is still fresh; never touches the database
+    (not even for a due stock check).
+    Used where a reload would defeat the purpose (e.g. answering a conditional GET).
+    
+    Returns:
+        Current Catalog, or None if it expired or was invalidated
+    """
+    catalog = _catalog
+    return catalog if _is_fresh(catalog) else None
+
+
+def update_stock(levels: Mapping[int, Optional[int]]) -> None:
+    """
+    Patch the cached catalog's stock after a committed stock change made by
+    this process (order placement, cancellation). The catalog version doesn't change.
+    
+    Args:
+        levels: Mapping of product id to its new stock level
+    """
+    catalog = _catalog
+    if catalog is not None and levels:
+        catalog.stock.update(levels)
+
+
+def invalidate() -> None:
+    """
+    Drop the cached catalog so the next read reloads it from the database.
+    Called automatically when a session commits changes to products. If only
+    stock changed, the reloaded catalog keeps its version and derived caches stay valid.
+    """
+    global _catalog
+    _catalog = None
+
+
+# ---------------- INVALIDATION HOOKS ----------------
+
+@event.listens_for(Session, "after_flush")
+def _track_product_writes(session, flush_context):
+    """Remember that this transaction wrote products (lists still hold pre-flush state here)."""
+    if any(isinstance(obj, Product) for obj in chain(session.new, session.dirty, session.deleted)):
+        session.info["catalog_dirty"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    if session.info.pop("catalog_dirty", False):
+        invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("catalog_dirty", None)
@@ -0,0 +1,52 @@
+"""
+Fragment Cache - Rendered HTML fragments shared by every visitor.
+Catalog-dependent parts of pages (product grids, featured products, search
+results) don't depend on who is looking at them, so they are rendered once
+per catalog version and stitched into the per-visitor page shell, which only
+adds the header with the visitor's cart badge.
+
+Keys always include the catalog's render version (content version plus which
+products are in stock): when either changes, fragments rendered before are
+never served again and age out of the LRU. Orders that only lower stock levels
+leave every fragment valid.
+"""
+from typing import Callable, Hashable
+
+from markupsafe import Markup
+
+from app.core.config import FRAGMENT_CACHE_SIZE
+from app.services.catalog_cache import Catalog
+from app.utils.lru import LRUCache
+
+_cache = LRUCache(maxsize=FRAGMENT_CACHE_SIZE)
+
+
+def get_or_render(name: str, catalog: Catalog, key: Hashable, render: Callable[[], str]) -> Markup:
+    """
+    Get a cached fragment, rendering and caching it on a miss.
+
+    Args:
+        name: Fragment name (e.g. "grid", "search")
+        catalog: Catalog the fragment is rendered from
+        key: Whatever else the fragment depends on (category, query, page...)
+        render: Produces the fragment HTML; only called on a miss
+
+    Returns:
+        Fragment HTML, safe to output unescaped in a template
+    """
+    cache_key = (name, catalog.render_version, key)
+    fragment = _cache.get(cache_key)
+    if fragment is None:
+        fragment = Markup(render())
+        _cache.set(cache_key, fragment)
+    return fragment
+
+
+def stats() -> dict:
+    """Size and hit/miss counters of the fragment cache."""
+    return _cache.stats()
+
+
+def clear() -> None:
+    """Drop every cached fragment."""
+    _cache.clear()
@@ -1,11 +1,85 @@
 """
 Order Service - Business logic for order management.
 Handles order creation and retrieval.
+Creating an order reserves stock for its items in the same transaction
+(see stock_service); if any item is short the order is not created.
+The order notification email is queued in that transaction too (see outbox_service).
+Razorpay orders are created as pending before payment; payment verification
+and webhooks move them to paid or failed (see PAYMENT STATUS).
+Functions ending in _async are equivalents for async route handlers.
 """
-from sqlalchemy.orm import Session
+from sqlalchemy import case, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from app.models.order import Order, OrderItem
 from app.models.product import Product
-from typing import List, Dict
+from app.services import catalog_cache, outbox_service, stock_service
+from datetime import datetime
+from typing import Callable, List, Dict, NamedTuple, Optional
+
+
+class OrderResult(NamedTuple):
+    """Lightweight summary of an order written by the bulk insert path."""
+    id: int
+    total_amount: float
+    payment_status: str
+    order_status: str
+
+
+def _customer_values(customer_data: dict) -> dict:
+    """Order column values for the customer's contact and shipping details."""
+    return {
+        "customer_name": customer_data["name"],
+        "customer_email": customer_data["email"],
+        "customer_phone": customer_data["phone"],
+        "shipping_address": customer_data["address"],
+        "city": customer_data["city"],
+        "state": customer_data["state"],
+        "pincode": customer_data["pincode"],
+    }
+
+
+def _order_values(customer_data: dict, cart_items: List[dict], payment_info: dict) -> dict:
+    """Column values for an order from customer, cart and payment details."""
+    # Calculate total amount
+    total_amount = sum(item["subtotal"] for item in cart_items)
+    
+    return {
+        **_customer_values(customer_data),
+        "total_amount": total_amount,
+        "razorpay_order_id": payment_info.get("order_id"),
+        "razorpay_payment_id": payment_info.get("payment_id"),
+        "razorpay_signature": payment_info.get("signature"),
+        "payment_status": "success" if payment_info.get("payment_id") else "pending",
+        "order_status": "confirmed" if payment_info.get("payment_id") else "pending"
+    }
+
+
+def _order_item_values(order_id: int, cart_items: List[dict]) -> List[dict]:
+    """Column values for each order item, snapshotting the cart product."""
+    order_items = []
+    for item in cart_items:
+        product = item["product"]
+        quantity = item["quantity"]
+        
+        order_items.append({
+            "order_id": order_id,
+            "product_id": product.id,
+            "product_name": product.name,
+            "product_brand": product.brand,
+            "product_weight": product.weight,
+            "product_image": product.image,
+            "quantity": quantity,
+            "price_per_unit": product.price,
+            "subtotal": item["subtotal"]
+        })
+    return order_items
+
+
+def _build_order_items(order_id: int, cart_items: List[dict]) -> List[OrderItem]:
+    """Build OrderItem rows snapshotting each cart product."""
+    return [OrderItem(**values) for values in _order_item_values(order_id, cart_items)]
 
 
 def create_order(
@@ -25,77 +99,454 @@ def create_order(
     
     Returns:
         Created Order object
+    
+    Raises:
+        OutOfStockError: if any item is short; nothing is written
     """
-    # Calculate total amount
-    total_amount = sum(item["subtotal"] for item in cart_items)
+    order_values = _order_values(customer_data, cart_items, payment_info)
+    order = Order(**order_values)
     
-    # Create order
-    order = Order(
-        customer_name=customer_data["name"],
-        customer_email=customer_data["email"],
-        customer_phone=customer_data["phone"],
-        shipping_address=customer_data["address"],
-        city=customer_data["city"],
-        state=customer_data["state"],
-        pincode=customer_data["pincode"],
-        total_amount=total_amount,
-        razorpay_order_id=payment_info.get("order_id"),
-        razorpay_payment_id=payment_info.get("payment_id"),
-        razorpay_signature=payment_info.get("signature"),
-        payment_status="success" if payment_info.get("payment_id") else "pending",
-        order_status="confirmed" if payment_info.get("payment_id") else "pending"
-    )
+    try:
+        stock_levels = stock_service.reserve_stock(db, cart_items)
+        
+        db.add(order)
+        db.flush()  # Get order ID
+        
+        # Create order items
+        db.add_all(_build_order_items(order.id, cart_items))
+        outbox_service.enqueue_order_notification(db, order.id, order_values, cart_items)
+        
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     
-    db.add(order)
-    db.flush()  # Get order ID
+    # Stock changed through a bulk UPDATE, which the session hooks don't see;
+    # patch the cached levels rather than dropping the catalog
+    catalog_cache.update_stock(stock_levels)
+    db.refresh(order)
     
-    # Create order items
-    for item in cart_items:
-        product = item["product"]
-        quantity = item["quantity"]
+    return order
+
+
+async def create_order_async(
+    db: AsyncSession,
+    customer_data: dict,
+    cart_items: List[dict],
+    payment_info: dict
+) -> Order:
+    """
+    Async variant of create_order.
+    The returned order has its items loaded, since lazy loading is unavailable on an AsyncSession.
+    """
+    order_values = _order_values(customer_data, cart_items, payment_info)
+    order = Order(**order_values)
+    
+    try:
+        stock_levels = await stock_service.reserve_stock_async(db, cart_items)
         
-        order_item = OrderItem(
-            order_id=order.id,
-            product_id=product.id,
-            product_name=product.name,
-            product_brand=product.brand,
-            product_weight=product.weight,
-            product_image=product.image,
-            quantity=quantity,
-            price_per_unit=product.price,
-            subtotal=item["subtotal"]
-        )
-        db.add(order_item)
+        db.add(order)
+        await db.flush()  # Get order ID
+        
+        order_items = _build_order_items(order.id, cart_items)
+        db.add_all(order_items)
+        await outbox_service.enqueue_order_notification_async(db, order.id, order_values, cart_items)
+        
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
     
-    db.commit()
-    db.refresh(order)
+    catalog_cache.update_stock(stock_levels)
+    
+    # Populate the relationship without another SELECT
+    set_committed_value(order, "items", order_items)
     
     return order
 
 
-def get_order_by_id(db: Session, order_id: int) -> Order:
+def create_order_bulk(
+    db: Session,
+    customer_data: dict,
+    cart_items: List[dict],
+    payment_info: dict
+) -> OrderResult:
+    """
+    Create a new order with one INSERT for the order and one executemany
+    INSERT for all of its items, in a single transaction.
+    Skips the ORM unit of work and the refresh SELECT of create_order.
+    
+    Args:
+        db: Database session
+        customer_data: Dict with customer details (name, email, phone, address, etc.)
+        cart_items: List of cart items with product and quantity
+        payment_info: Dict with Razorpay payment details
+    
+    Returns:
+        OrderResult with the new order id, total and statuses
+    
+    Raises:
+        OutOfStockError: if any item is short; nothing is written
+    """
+    order_values = _order_values(customer_data, cart_items, payment_info)
+    # Column defaults (created_at, updated_at) are applied by the Core insert
+    order_statement = insert(Order.__table__).values(**order_values)
+    
+    try:
+        stock_levels = stock_service.reserve_stock(db, cart_items)
+        order_id = db.execute(order_statement).inserted_primary_key[0]
+        if cart_items:
+            db.execute(insert(OrderItem.__table__), _order_item_values(order_id, cart_items))
+        outbox_service.enqueue_order_notification(db, order_id, order_values, cart_items)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    
+    catalog_cache.update_stock(stock_levels)
+    
+    return OrderResult(
+        id=order_id,
+        total_amount=order_values["total_amount"],
+        payment_status=order_values["payment_status"],
+        order_status=order_values["order_status"]
+    )
+
+
+async def create_order_bulk_async(
+    db: AsyncSession,
+    customer_data: dict,
+    cart_items: List[dict],
+    payment_info: dict
+) -> OrderResult:
+    """Async variant of create_order_bulk."""
+    order_values = _order_values(customer_data, cart_items, payment_info)
+    order_statement = insert(Order.__table__).values(**order_values)
+    
+    try:
+        stock_levels = await stock_service.reserve_stock_async(db, cart_items)
+        order_id = (await db.execute(order_statement)).inserted_primary_key[0]
+        if cart_items:
+            await db.execute(insert(OrderItem.__table__), _order_item_values(order_id, cart_items))
+        await outbox_service.enqueue_order_notification_async(db, order_id, order_values, cart_items)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    
+    catalog_cache.update_stock(stock_levels)
+    
+    return OrderResult(
+        id=order_id,
+        total_amount=order_values["total_amount"],
+        payment_status=order_values["payment_status"],
+        order_status=order_values["order_status"]
+    )
+
+
+# ---------------- PAYMENT STATUS ----------------
+# Razorpay orders only move forward: pending -> failed -> success. A failed
+# payment can be retried on the same Razorpay order; a paid order stays paid.
+# Orders never paid are eventually cancelled by reconciliation, releasing their stock.
+# A payment captured after that is recorded as PAID_AFTER_CANCEL: the order stays
+# cancelled (its stock is gone) and the payment is left for the shop to refund.
+
+orders = Order.__table__
+
+PAID_AFTER_CANCEL = "paid_after_cancel"
+
+
+class PaymentResult(NamedTuple):
+    """Order a verified payment was recorded against."""
+    order_id: int
+    payment_status: str  # "success", or PAID_AFTER_CANCEL if the order was already cancelled
+
+
+def _mark_paid_statement(payments: Dict[str, str], signature: Optional[str] = None):
+    """
+    UPDATE marking the orders for these {razorpay_order_id: payment_id} as paid
+    (PAID_AFTER_CANCEL for cancelled orders), returning their ids and new payment status.
+    """
+    values = {
+        "payment_status": case((orders.c.order_status == "cancelled", PAID_AFTER_CANCEL), else_="success"),
+        "order_status": case((orders.c.order_status == "pending", "confirmed"), else_=orders.c.order_status),
+        "razorpay_payment_id": case(payments, value=orders.c.razorpay_order_id),
+    }
+    if signature is not None:
+        values["razorpay_signature"] = signature
+    return (
+        update(orders)
+        .where(
+            orders.c.razorpay_order_id.in_(list(payments)),
+            orders.c.payment_status.not_in(("success", PAID_AFTER_CANCEL)),
+        )
+        .values(**values)
+        .returning(orders.c.id, orders.c.payment_status)
+    )
+
+
+def _paid_ids(rows) -> List[int]:
+    """Ids of the rows returned by _mark_paid_statement that are really paid (not cancelled)."""
+    return [row.id for row in rows if row.payment_status == "success"]
+
+
+def _mark_failed_statement(razorpay_order_ids: List[str]):
+    return (
+        update(orders)
+        .where(orders.c.razorpay_order_id.in_(razorpay_order_ids), orders.c.payment_status == "pending")
+        .values(payment_status="failed")
+    )
+
+
+def mark_orders_paid(db: Session, payments: Dict[str, str]) -> List[int]:
+    """
+    Mark Razorpay orders as paid with one UPDATE. Orders already paid are left alone,
+    and cancelled orders are marked PAID_AFTER_CANCEL (to be refunded, not shipped).
+    Runs inside the caller's transaction and queues notifications for newly paid orders.
+    
+    Args:
+        db: Database session
+        payments: Mapping of razorpay_order_id to the razorpay_payment_id that paid it
+    
+    Returns:
+        IDs of the orders that changed to paid
+    """
+    if not payments:
+        return []
+    
+    order_ids = _paid_ids(db.execute(_mark_paid_statement(payments)).all())
+    outbox_service.enqueue_paid_order_notifications(db, order_ids)
+    return order_ids
+
+
+def mark_orders_failed(db: Session, razorpay_order_ids: List[str]) -> int:
+    """
+    Mark pending Razorpay orders whose payment failed. Runs inside the caller's transaction.
+    
+    Returns:
+        Number of orders changed
+    """
+    if not razorpay_order_ids:
+        return 0
+    
+    return db.execute(_mark_failed_statement(razorpay_order_ids)).rowcount
+
+
+def _cancel_statement(order_ids: List[int]):
+    return (
+        update(orders)
+        .where(orders.c.id.in_(order_ids), orders.c.payment_status != "success", orders.c.order_status == "pending")
+        .values(order_status="cancelled")
+        .returning(orders.c.id)
+    )
+
+
+def _held_quantities_statement(order_ids: List[int]):
+    """Quantity of each product held by these orders."""
+    order_items = OrderItem.__table__
+    return (
+        select(order_items.c.product_id, func.sum(order_items.c.quantity))
+        .where(order_items.c.order_id.in_(order_ids))
+        .group_by(order_items.c.product_id)
+    )
+
+
+def cancel_unpaid_orders(db: Session, order_ids: List[int]) -> List[int]:
+    """
+    Cancel pending orders that were never paid and put their stock back.
+    Runs inside the caller's transaction. The stock release bumps the stock generation,
+    so every web worker (not just this process) refreshes its stock levels.
+    
+    Args:
+        db: Database session
+        order_ids: IDs of the orders to cancel; paid or already cancelled orders are skipped
+    
+    Returns:
+        IDs of the orders that were cancelled
+    """
+    if not order_ids:
+        return []
+    
+    cancelled = db.execute(_cancel_statement(order_ids)).scalars().all()
+    if cancelled:
+        quantities = db.execute(_held_quantities_statement(cancelled)).all()
+        stock_service.release_stock(db, dict(quantities))
+    return cancelled
+
+
+async def cancel_unpaid_orders_async(db: AsyncSession, order_ids: List[int]) -> List[int]:
+    """Async variant of cancel_unpaid_orders; commits, and patches this process's stock levels."""
+    if not order_ids:
+        return []
+    
+    try:
+        cancelled = (await db.execute(_cancel_statement(order_ids))).scalars().all()
+        stock_levels = {}
+        if cancelled:
+            quantities = (await db.execute(_held_quantities_statement(cancelled))).all()
+            stock_levels = await stock_service.release_stock_async(db, dict(quantities))
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    
+    catalog_cache.update_stock(stock_levels)
+    return cancelled
+
+
+async def renew_pending_order_async(
+    db: AsyncSession,
+    order_id: int,
+    customer_data: dict,
+    created_after: datetime
+) -> bool:
+    """
+    Take over a pending order for another payment attempt, updating its customer
+    details, and commit. Fails if the order was paid or cancelled in the meantime,
+    or was created before created_after (too close to expiring).
+    
+    Args:
+        db: Async database session
+        order_id: ID of the pending order
+        customer_data: Customer details from the latest checkout form
+        created_after: Oldest creation time still worth reusing
+    
+    Returns:
+        True if the order is still pending and can be paid
+    """
+    try:
+        result = await db.execute(
+            update(orders)
+            .where(
+                orders.c.id == order_id,
+                orders.c.payment_status != "success",
+                orders.c.order_status == "pending",
+                orders.c.created_at >= created_after,
+            )
+            .values(**_customer_values(customer_data))
+        )
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    
+    return result.rowcount == 1
+
+
+async def mark_order_paid_async(
+    db: AsyncSession,
+    razorpay_order_id: str,
+    payment_id: str,
+    signature: str
+) -> Optional[PaymentResult]:
+    """
+    Mark the order for a verified Razorpay payment as paid and commit.
+    Safe to repeat, and safe if a webhook already marked the order paid.
+    If the order was cancelled first, the payment is recorded as PAID_AFTER_CANCEL.
+    
+    Args:
+        db: Async database session
+        razorpay_order_id: Razorpay order ID
+        payment_id: Razorpay payment ID
+        signature: Verified payment signature
+    
+    Returns:
+        PaymentResult with the order ID and its payment status,
+        or None if no order has this Razorpay order ID
+    """
+    try:
+        rows = (await db.execute(_mark_paid_statement({razorpay_order_id: payment_id}, signature))).all()
+        await outbox_service.enqueue_paid_order_notifications_async(db, _paid_ids(rows))
+        if not rows:
+            rows = (await db.execute(
+                select(orders.c.id, orders.c.payment_status).where(orders.c.razorpay_order_id == razorpay_order_id)
+            )).all()
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    
+    return PaymentResult(rows[0].id, rows[0].payment_status) if rows else None
+
+
+# ---------------- ORDER RETRIEVAL ----------------
+# Loaders take an items_loader strategy (joinedload, selectinload, subqueryload...)
+# used for Order.items; None leaves items to lazy loading on first access.
+
+ItemsLoader = Optional[Callable]
+
+
+def _orders_query(items_loader: ItemsLoader):
+    query = select(Order)
+    if items_loader is not None:
+        query = query.options(items_loader(Order.items))
+    return query
+
+
+def get_order_by_id(db: Session, order_id: int, items_loader: ItemsLoader = joinedload) -> Optional[Order]:
     """
     Retrieve an order by ID with all items.
+    The default joinedload fetches the order and its items in a single query.
     
     Args:
         db: Database session
         order_id: Order ID
+        items_loader: Loading strategy for order items, or None for lazy loading
     
     Returns:
         Order object or None if not found
     """
-    return db.query(Order).filter(Order.id == order_id).first()
+    result = db.execute(_orders_query(items_loader).where(Order.id == order_id))
+    return result.unique().scalars().first()
 
 
-def get_orders_by_email(db: Session, email: str) -> List[Order]:
+def get_orders_by_email(db: Session, email: str, items_loader: ItemsLoader = selectinload) -> List[Order]:
     """
     Retrieve all orders for a customer email.
+    The default selectinload fetches the items of every order in one extra
+    query, so rendering many orders with their items costs two queries in total.
     
     Args:
         db: Database session
         email: Customer email
+        items_loader: Loading strategy for order items, or None for lazy loading
     
     Returns:
         List of Order objects
     """
-    return db.query(Order).filter(Order.customer_email == email).order_by(Order.created_at.desc()).all()
+    result = db.execute(
+        _orders_query(items_loader)
+        .where(Order.customer_email == email)
+        .order_by(Order.created_at.desc())
+    )
+    return list(result.unique().scalars())
+
+
+async def get_order_by_id_async(
+    db: AsyncSession,
+    order_id: int,
+    items_loader: Callable = joinedload
+) -> Optional[Order]:
+    """
+    Async variant of get_order_by_id.
+    Items must be loaded eagerly, since lazy loading is unavailable on an AsyncSession.
+    """
+    result = await db.execute(_orders_query(items_loader).where(Order.id == order_id))
+    return result.unique().scalars().first()
+
+
+async def get_orders_by_email_async(
+    db: AsyncSession,
+    email: str,
+    items_loader: Callable = selectinload
+) -> List[Order]:
+    """
+    Async variant of get_orders_by_email.
+    Items must be loaded eagerly, since lazy loading is unavailable on an AsyncSession.
+    """
+    result = await db.execute(
+        _orders_query(items_loader)
+        .where(Order.customer_email == email)
+        .order_by(Order.created_at.desc())
+    )
+    return list(result.unique().scalars())
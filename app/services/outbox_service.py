@@ -0,0 +1,327 @@
+"""
+Outbox Service - Durable, asynchronous order notification emails.
+Order creation (or, for Razorpay orders, the payment) writes a message row to
+the email_outbox table in its own transaction, so checkout never waits on SMTP. A background worker claims due
+messages in batches, sends them over one reused SMTP connection and records
+the outcome, retrying failures with exponential backoff.
+
+Claiming sets a lease (status "sending", next_attempt_at in the future), so
+messages held by a worker that died are picked up again once the lease expires.
+"""
+import random
+import threading
+import traceback
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+
+from app.core.config import (
+    ORDER_EMAIL_TO,
+    OUTBOX_BACKOFF_BASE,
+    OUTBOX_BACKOFF_MAX,
+    OUTBOX_BATCH_SIZE,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_POLL_INTERVAL,
+    SMTP_TIMEOUT,
+)
+from app.core.database import SessionLocal
+from app.models.order import Order
+from app.models.outbox import OutboxMessage
+from app.utils.email_sender import ORDER_EMAIL_SUBJECT, SMTPSender, build_message
+
+outbox = OutboxMessage.__table__
+
+# Order notifications are only queued when there is someone to send them to
+NOTIFICATIONS_ENABLED = bool(ORDER_EMAIL_TO)
+
+# How long a claimed batch is reserved for the worker that claimed it
+CLAIM_LEASE = timedelta(seconds=max(300, SMTP_TIMEOUT * 4))
+
+
+# ---------------- ENQUEUE ----------------
+
+class _ItemLine(NamedTuple):
+    quantity: int
+    name: str
+    brand: str
+    weight: str
+    price: float
+    subtotal: float
+
+
+def _cart_lines(cart_items: List[dict]) -> List[_ItemLine]:
+    return [
+        _ItemLine(item["quantity"], item["product"].name, item["product"].brand,
+                  item["product"].weight, item["product"].price, item["subtotal"])
+        for item in cart_items
+    ]
+
+
+def _order_notification_values(order_id: int, order_values: dict, items: List[_ItemLine]) -> dict:
+    lines = [
+        f"New order #{order_id}",
+        "",
+        f"Customer: {order_values['customer_name']} <{order_values['customer_email']}>, {order_values['customer_phone']}",
+        f"Ship to: {order_values['shipping_address']}, {order_values['city']}, "
+        f"{order_values['state']} - {order_values['pincode']}",
+        "",
+        "Items:",
+    ]
+    for item in items:
+        lines.append(
+            f"  - {item.quantity} x {item.name} ({item.brand}, {item.weight}) "
+            f"@ ₹{item.price} = ₹{item.subtotal}"
+        )
+    lines += [
+        "",
+        f"Total: ₹{order_values['total_amount']}",
+        f"Payment: {order_values['payment_status']} ({order_values.get('razorpay_payment_id') or 'n/a'})",
+    ]
+    return {
+        "kind": "order_notification",
+        "recipient": ORDER_EMAIL_TO,
+        "subject": f"{ORDER_EMAIL_SUBJECT} #{order_id}",
+        "body": "\n".join(lines),
+    }
+
+
+def _awaiting_online_payment(order_values: dict) -> bool:
+    # Razorpay orders are announced once paid (see enqueue_paid_order_notifications)
+    return bool(order_values.get("razorpay_order_id")) and order_values["payment_status"] != "success"
+
+
+def enqueue_order_notification(db: Session, order_id: int, order_values: dict, cart_items: List[dict]) -> None:
+    """
+    Queue the notification email for a new order.
+    Runs inside the order's transaction; nothing is sent until it commits.
+    Orders waiting for a Razorpay payment are skipped until they are paid.
+
+    Args:
+        db: Database session with the order transaction open
+        order_id: ID of the new order
+        order_values: Order column values (see order_service)
+        cart_items: List of cart items with product and quantity
+    """
+    if NOTIFICATIONS_ENABLED and not _awaiting_online_payment(order_values):
+        db.execute(insert(outbox).values(**_order_notification_values(order_id, order_values, _cart_lines(cart_items))))
+
+
+async def enqueue_order_notification_async(
+    db: AsyncSession,
+    order_id: int,
+    order_values: dict,
+    cart_items: List[dict]
+) -> None:
+    """Async variant of enqueue_order_notification."""
+    if NOTIFICATIONS_ENABLED and not _awaiting_online_payment(order_values):
+        await db.execute(insert(outbox).values(**_order_notification_values(order_id, order_values, _cart_lines(cart_items))))
+
+
+def _paid_orders_query(order_ids: List[int]):
+    return select(Order).where(Order.id.in_(order_ids)).options(selectinload(Order.items)).order_by(Order.id)
+
+
+def _paid_order_notifications(orders: List[Order]) -> List[dict]:
+    return [
+        _order_notification_values(
+            order.id,
+            {column.name: getattr(order, column.name) for column in Order.__table__.columns},
+            [_ItemLine(item.quantity, item.product_name, item.product_brand, item.product_weight,
+                       item.price_per_unit, item.subtotal) for item in order.items]
+        )
+        for order in orders
+    ]
+
+
+def enqueue_paid_order_notifications(db: Session, order_ids: List[int]) -> None:
+    """
+    Queue notification emails for Razorpay orders that have just been paid.
+    Runs inside the transaction that marked them paid.
+
+    Args:
+        db: Database session with that transaction open
+        order_ids: IDs of the orders that changed to paid
+    """
+    if NOTIFICATIONS_ENABLED and order_ids:
+        orders = db.execute(_paid_orders_query(order_ids)).scalars().all()
+        db.execute(insert(outbox), _paid_order_notifications(orders))
+
+
+async def enqueue_paid_order_notifications_async(db: AsyncSession, order_ids: List[int]) -> None:
+    """Async variant of enqueue_paid_order_notifications."""
+    if NOTIFICATIONS_ENABLED and order_ids:
+        orders = (await db.execute(_paid_orders_query(order_ids))).scalars().all()
+        await db.execute(insert(outbox), _paid_order_notifications(orders))
+
+
+# ---------------- DELIVERY ----------------
+
+class ClaimedMessage(NamedTuple):
+    id: int
+    recipient: str
+    subject: str
+    body: str
+    attempts: int
+
+
+def backoff_delay(attempts: int) -> float:
+    """Seconds to wait before the next attempt after `attempts` failures (with jitter)."""
+    delay = min(OUTBOX_BACKOFF_BASE * 2 ** (attempts - 1), OUTBOX_BACKOFF_MAX)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def claim_batch(db: Session, limit: int = OUTBOX_BATCH_SIZE) -> List[ClaimedMessage]:
+    """
+    Atomically claim up to `limit` due messages (oldest first) and commit the claim.
+
+    Returns:
+        Claimed messages, to be reported back with record_results
+    """
+    now = datetime.utcnow()
+    due = (
+        select(outbox.c.id)
+        .where(outbox.c.status.in_(("pending", "sending")), outbox.c.next_attempt_at <= now)
+        .order_by(outbox.c.id)
+        .limit(limit)
+        .scalar_subquery()
+    )
+    result = db.execute(
+        update(outbox)
+        .where(outbox.c.id.in_(due), outbox.c.status.in_(("pending", "sending")))
+        .values(status="sending", next_attempt_at=now + CLAIM_LEASE)
+        .returning(outbox.c.id, outbox.c.recipient, outbox.c.subject, outbox.c.body, outbox.c.attempts)
+    )
+    claimed = sorted((ClaimedMessage(*row) for row in result), key=lambda message: message.id)
+    db.commit()
+    return claimed
+
+
+def record_results(db: Session, sent_ids: List[int], failures: List[Tuple[ClaimedMessage, str]]) -> None:
+    """Mark sent messages, and reschedule (or give up on) failed ones, in one transaction."""
+    now = datetime.utcnow()
+    if sent_ids:
+        db.execute(
+            update(outbox)
+            .where(outbox.c.id.in_(sent_ids))
+            .values(status="sent", sent_at=now, last_error=None)
+        )
+    for message, error in failures:
+        attempts = message.attempts + 1
+        db.execute(
+            update(outbox)
+            .where(outbox.c.id == message.id)
+            .values(
+                status="failed" if attempts >= OUTBOX_MAX_ATTEMPTS else "pending",
+                attempts=attempts,
+                next_attempt_at=now + timedelta(seconds=backoff_delay(attempts)),
+                last_error=error[:2000]
+            )
+        )
+    db.commit()
+
+
+def deliver_batch(sender: SMTPSender, limit: int = OUTBOX_BATCH_SIZE) -> Tuple[int, int]:
+    """
+    Claim one batch of due messages and send it over the sender's connection.
+
+    Args:
+        sender: SMTPSender whose connection is reused across batches
+        limit: Maximum messages to claim
+
+    Returns:
+        Tuple of (sent_count, failed_count); (0, 0) when nothing was due
+    """
+    db = SessionLocal()
+    try:
+        claimed = claim_batch(db, limit)
+        if not claimed:
+            return 0, 0
+
+        sent_ids = []
+        failures = []
+        for message in claimed:
+            try:
+                sender.send(build_message(message.recipient, message.subject, message.body))
+                sent_ids.append(message.id)
+            except Exception as e:
+                failures.append((message, f"{e.__class__.__name__}: {e}"))
+
+        record_results(db, sent_ids, failures)
+        return len(sent_ids), len(failures)
+    finally:
+        db.close()
+
+
+class OutboxWorker:
+    """
+    Background thread draining the outbox.
+    Sends batches back to back while messages are due, and polls every
+    poll_interval seconds when the outbox is empty.
+    """
+
+    def __init__(
+        self,
+        sender: Optional[SMTPSender] = None,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        poll_interval: float = OUTBOX_POLL_INTERVAL
+    ):
+        self.sender = sender or SMTPSender()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.sent = 0
+        self.failed = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> Tuple[int, int]:
+        """Deliver one batch; returns (sent_count, failed_count)."""
+        sent, failed = deliver_batch(self.sender, self.batch_size)
+        self.sent += sent
+        self.failed += failed
+        return sent, failed
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                sent, failed = self.run_once()
+            except Exception:
+                traceback.print_exc()
+                sent = failed = 0
+            if not sent and not failed:
+                self.sender.close_if_idle()
+                self._stop.wait(self.poll_interval)
+        self.sender.close()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="outbox-worker", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+_worker: Optional[OutboxWorker] = None
+
+
+def start_worker() -> None:
+    """Start this process's outbox worker (called at app startup)."""
+    global _worker
+    if NOTIFICATIONS_ENABLED and _worker is None:
+        _worker = OutboxWorker()
+        _worker.start()
+        print(f"📧 Outbox worker started (notifications to {ORDER_EMAIL_TO})")
+
+
+def stop_worker() -> None:
+    """Stop the outbox worker and close its SMTP connection (called at app shutdown)."""
+    global _worker
+    if _worker is not None:
+        _worker.stop()
+        _worker = None
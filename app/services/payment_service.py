@@ -1,10 +1,36 @@
 """
 Payment Service - Razorpay integration for payment processing.
 Handles order creation and payment verification.
+
+The Razorpay SDK is synchronous. Async route handlers use the _async functions,
+which run SDK calls on a dedicated, bounded thread pool (never the event loop)
+with a concurrency limit and a per-call timeout. All calls share one keep-alive
+HTTP session, so connections to the gateway are reused. Payment signatures are
+checked locally by SignatureVerifier and never go through the SDK.
 """
+import asyncio
+import hashlib
+import hmac
 import razorpay
 import os
+import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+from weakref import WeakKeyDictionary
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from app.core.config import (
+    RAZORPAY_BASE_URL,
+    RAZORPAY_CALL_TIMEOUT,
+    RAZORPAY_CONNECT_TIMEOUT,
+    RAZORPAY_EXECUTOR_WORKERS,
+    RAZORPAY_MAX_CONCURRENCY,
+    RAZORPAY_POOL_MAXSIZE,
+    RAZORPAY_READ_TIMEOUT,
+)
 
 # Load environment variables
 load_dotenv()
@@ -13,10 +39,77 @@ load_dotenv()
 RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID", "")
 RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET", "")
 
+
+class PaymentGatewayError(Exception):
+    """Raised when a Razorpay call fails, times out or is rejected."""
+
+
+class _GatewaySession(requests.Session):
+    """requests.Session that applies default timeouts to every request."""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def _build_session() -> requests.Session:
+    session = _GatewaySession(timeout=(RAZORPAY_CONNECT_TIMEOUT, RAZORPAY_READ_TIMEOUT))
+    # One pool with room for every executor thread; retries are left to callers
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=RAZORPAY_POOL_MAXSIZE, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
 # Only initialize if keys are available
 razorpay_client = None
 if RAZORPAY_KEY_ID and RAZORPAY_KEY_SECRET:
-    razorpay_client = razorpay.Client(auth=(RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET))
+    razorpay_client = razorpay.Client(
+        session=_build_session(),
+        auth=(RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET),
+        base_url=RAZORPAY_BASE_URL
+    )
+
+# Gateway calls from async handlers run here, never on the event loop
+_executor = ThreadPoolExecutor(max_workers=RAZORPAY_EXECUTOR_WORKERS, thread_name_prefix="razorpay")
+
+# One semaphore per event loop (asyncio primitives can't be shared across loops)
+_semaphores: "WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = WeakKeyDictionary()
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(RAZORPAY_MAX_CONCURRENCY)
+    return semaphore
+
+
+async def _call_gateway(function: Callable, *args, **kwargs):
+    """
+    Run a blocking SDK call on the gateway executor.
+    Waits for a concurrency slot first; the whole call is bounded by RAZORPAY_CALL_TIMEOUT.
+    
+    Raises:
+        PaymentGatewayError: if the call fails or times out
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        async with _get_semaphore():
+            return await asyncio.wait_for(
+                loop.run_in_executor(_executor, partial(function, *args, **kwargs)),
+                timeout=RAZORPAY_CALL_TIMEOUT
+            )
+    except asyncio.TimeoutError:
+        raise PaymentGatewayError(f"Razorpay call timed out after {RAZORPAY_CALL_TIMEOUT:.0f}s") from None
+    except PaymentGatewayError:
+        raise
+    except Exception as e:
+        raise PaymentGatewayError(str(e)) from e
 
 
 def create_razorpay_order(amount: float, currency: str = "INR", receipt: str = None) -> dict:
@@ -32,10 +125,10 @@ def create_razorpay_order(amount: float, currency: str = "INR", receipt: str = N
         Dict with order details including order_id
     
     Raises:
-        Exception if Razorpay client not initialized or order creation fails
+        PaymentGatewayError if Razorpay client not initialized or order creation fails
     """
     if not razorpay_client:
-        raise Exception("Razorpay credentials not configured. Please add RAZORPAY_KEY_ID and RAZORPAY_KEY_SECRET to .env file")
+        raise PaymentGatewayError("Razorpay credentials not configured. Please add RAZORPAY_KEY_ID and RAZORPAY_KEY_SECRET to .env file")
     
     # Convert amount to paise (Razorpay uses smallest currency unit)
     amount_in_paise = int(amount * 100)
@@ -51,7 +144,137 @@ def create_razorpay_order(amount: float, currency: str = "INR", receipt: str = N
         order = razorpay_client.order.create(data=order_data)
         return order
     except Exception as e:
-        raise Exception(f"Failed to create Razorpay order: {str(e)}")
+        raise PaymentGatewayError(f"Failed to create Razorpay order: {str(e)}") from e
+
+
+async def create_razorpay_order_async(amount: float, currency: str = "INR", receipt: str = None) -> dict:
+    """
+    Async variant of create_razorpay_order.
+    The SDK call runs on the gateway thread pool, so a slow gateway doesn't block the event loop.
+    
+    Raises:
+        PaymentGatewayError if Razorpay is not configured, fails or times out
+    """
+    if not razorpay_client:
+        raise PaymentGatewayError("Razorpay credentials not configured. Please add RAZORPAY_KEY_ID and RAZORPAY_KEY_SECRET to .env file")
+    return await _call_gateway(create_razorpay_order, amount, currency, receipt)
+
+
+def fetch_order_payments(razorpay_order_id: str) -> List[dict]:
+    """
+    Fetch the payments made against a Razorpay order.
+    
+    Args:
+        razorpay_order_id: Razorpay order ID
+    
+    Returns:
+        List of payment dicts (id, status, amount, ...), oldest first
+    
+    Raises:
+        PaymentGatewayError if Razorpay is not configured or the fetch fails
+    """
+    if not razorpay_client:
+        raise PaymentGatewayError("Razorpay credentials not configured. Please add RAZORPAY_KEY_ID and RAZORPAY_KEY_SECRET to .env file")
+    
+    try:
+        result = razorpay_client.order.payments(razorpay_order_id)
+    except Exception as e:
+        raise PaymentGatewayError(f"Failed to fetch payments for {razorpay_order_id}: {str(e)}") from e
+    
+    return sorted(result.get("items", []), key=lambda payment: payment.get("created_at") or 0)
+
+
+async def fetch_order_payments_async(razorpay_order_id: str) -> List[dict]:
+    """
+    Async variant of fetch_order_payments, run on the gateway thread pool.
+    
+    Raises:
+        PaymentGatewayError if Razorpay is not configured, fails or times out
+    """
+    if not razorpay_client:
+        raise PaymentGatewayError("Razorpay credentials not configured. Please add RAZORPAY_KEY_ID and RAZORPAY_KEY_SECRET to .env file")
+    return await _call_gateway(fetch_order_payments, razorpay_order_id)
+
+
+def fetch_order_payments_many(
+    razorpay_order_ids: List[str],
+    max_concurrency: int = RAZORPAY_EXECUTOR_WORKERS
+) -> Dict[str, Union[List[dict], PaymentGatewayError]]:
+    """
+    Fetch payments for many Razorpay orders concurrently on the gateway thread pool,
+    with at most max_concurrency requests in flight. For jobs, not request handlers.
+    
+    Args:
+        razorpay_order_ids: Razorpay order IDs
+        max_concurrency: Upper bound on concurrent gateway calls (also bounded by the pool size)
+    
+    Returns:
+        Mapping of each order ID to its payments, or to the PaymentGatewayError its fetch raised
+    """
+    slots = threading.BoundedSemaphore(max(1, max_concurrency))
+    futures = {}
+    for razorpay_order_id in razorpay_order_ids:
+        slots.acquire()
+        future = _executor.submit(fetch_order_payments, razorpay_order_id)
+        future.add_done_callback(lambda _: slots.release())
+        futures[razorpay_order_id] = future
+    
+    results = {}
+    for razorpay_order_id, future in futures.items():
+        try:
+            results[razorpay_order_id] = future.result()
+        except PaymentGatewayError as e:
+            results[razorpay_order_id] = e
+    return results
+
+
+class SignatureVerifier:
+    """
+    HMAC-SHA256 signature checks for Razorpay payloads, without the SDK client.
+    The keyed HMAC state is computed once per secret; each check clones it,
+    so the key is never re-hashed. Digests are compared in constant time.
+    """
+
+    __slots__ = ("_mac",)
+
+    def __init__(self, secret: str):
+        self._mac = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+
+    def verify_message(self, message: bytes, signature: str) -> bool:
+        """
+        Check a hex signature over raw bytes (e.g. a webhook body).
+        
+        Returns:
+            True if the signature matches, False otherwise (including malformed signatures)
+        """
+        if not isinstance(signature, str) or len(signature) != 64:
+            return False
+        try:
+            expected = bytes.fromhex(signature)
+        except ValueError:
+            return False
+        mac = self._mac.copy()
+        mac.update(message)
+        return hmac.compare_digest(mac.digest(), expected)
+
+    def verify(self, order_id: str, payment_id: str, signature: str) -> bool:
+        """Check a checkout signature: HMAC over "order_id|payment_id"."""
+        return self.verify_message(f"{order_id}|{payment_id}".encode(), signature)
+
+    def verify_many(self, payments: Iterable[Tuple[str, str, str]]) -> List[bool]:
+        """
+        Check many (order_id, payment_id, signature) triples, e.g. for webhook
+        replays or reconciliation.
+        
+        Returns:
+            One result per triple, in order
+        """
+        verify = self.verify
+        return [verify(order_id, payment_id, signature) for order_id, payment_id, signature in payments]
+
+
+# Built once from the key secret; verification doesn't need the SDK client
+signature_verifier: Optional[SignatureVerifier] = SignatureVerifier(RAZORPAY_KEY_SECRET) if RAZORPAY_KEY_SECRET else None
 
 
 def verify_payment_signature(order_id: str, payment_id: str, signature: str) -> bool:
@@ -66,24 +289,26 @@ def verify_payment_signature(order_id: str, payment_id: str, signature: str) ->
     Returns:
         True if signature is valid, False otherwise
     """
-    if not razorpay_client:
+    if not signature_verifier:
         return False
     
-    try:
-        params_dict = {
-            'razorpay_order_id': order_id,
-            'razorpay_payment_id': payment_id,
-            'razorpay_signature': signature
-        }
-        
-        # This will raise SignatureVerificationError if invalid
-        razorpay_client.utility.verify_payment_signature(params_dict)
-        return True
-    except razorpay.errors.SignatureVerificationError:
-        return False
-    except Exception as e:
-        print(f"Payment verification error: {str(e)}")
-        return False
+    return signature_verifier.verify(order_id, payment_id, signature)
+
+
+def verify_payment_signatures(payments: Iterable[Tuple[str, str, str]]) -> List[bool]:
+    """
+    Batch variant of verify_payment_signature.
+    
+    Args:
+        payments: (order_id, payment_id, signature) triples
+    
+    Returns:
+        One result per triple, in order (all False if no key secret is configured)
+    """
+    if not signature_verifier:
+        return [False for _ in payments]
+    
+    return signature_verifier.verify_many(payments)
 
 
 def get_razorpay_key_id() -> str:
@@ -94,3 +319,10 @@ def get_razorpay_key_id() -> str:
         Razorpay Key ID
     """
     return RAZORPAY_KEY_ID
+
+
+def shutdown() -> None:
+    """Stop the gateway thread pool and close pooled gateway connections (called at app shutdown)."""
+    _executor.shutdown(wait=False, cancel_futures=True)
+    if razorpay_client:
+        razorpay_client.session.close()
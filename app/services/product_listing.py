@@ -0,0 +1,135 @@
+"""
+Product Listing - Keyset (cursor) pagination over the cached catalog.
+Each listing (whole catalog or one category, in one sort order) is a tuple of
+product snapshots plus a parallel list of sort keys, built once per catalog
+version. Only the current version's listings are kept: seeing a newer catalog
+drops them all, so memory stays at one set of listings however often the
+catalog changes. A page is found by bisecting the keys for the cursor, so its
+cost does not depend on how deep into the listing it is or how big the catalog is.
+
+Cursors are opaque strings naming the last product of the previous page:
+"<id>" when sorting by id, "<price>:<id>" when sorting by price.
+"""
+from bisect import bisect_right
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from app.core.config import PRODUCTS_MAX_PAGE_SIZE, PRODUCTS_PAGE_SIZE
+from app.services.catalog_cache import Catalog, ProductSnapshot
+
+SORTS = ("id", "price")
+
+Listing = Tuple[Tuple[ProductSnapshot, ...], List[tuple]]
+
+
+class _Listings(NamedTuple):
+    """Listings of one catalog version, keyed by (category, sort)."""
+    version: Optional[str]
+    loaded_at: float
+    entries: Dict[Tuple[Optional[str], str], Listing]
+
+
+# Replaced as a whole when a newer catalog version shows up
+_listings = _Listings(None, 0.0, {})
+
+
+class InvalidCursorError(ValueError):
+    """Raised for a cursor that doesn't match the requested sort order."""
+
+
+class ProductPage(NamedTuple):
+    """One page of a listing; next_cursor is None on the last page."""
+    products: Tuple[ProductSnapshot, ...]
+    next_cursor: Optional[str]
+
+
+def _sort_key(product: ProductSnapshot, sort: str) -> tuple:
+    if sort == "price":
+        return (product.price, product.id)
+    return (product.id,)
+
+
+def _build_listing(catalog: Catalog, category: Optional[str], sort: str) -> Listing:
+    # Sorting by id reuses the catalog's own tuples; only other orders need a sorted copy
+    products = catalog.get_category(category) if category else catalog.products
+    if sort != "id":
+        products = tuple(sorted(products, key=lambda product: _sort_key(product, sort)))
+    return products, [_sort_key(product, sort) for product in products]
+
+
+def _get_listing(catalog: Catalog, category: Optional[str], sort: str) -> Listing:
+    """Sorted products and their sort keys, cached for the current catalog version."""
+    global _listings
+
+    # Unknown categories list nothing; don't let arbitrary names fill the cache
+    if category and category not in catalog.by_category:
+        return (), []
+    category = category or None
+
+    listings = _listings
+    if listings.version != catalog.version:
+        if catalog.loaded_at < listings.loaded_at:
+            # A request still holding an older catalog than the cached listings
+            return _build_listing(catalog, category, sort)
+        listings = _listings = _Listings(catalog.version, catalog.loaded_at, {})
+
+    listing = listings.entries.get((category, sort))
+    if listing is None:
+        listing = listings.entries[(category, sort)] = _build_listing(catalog, category, sort)
+    return listing
+
+
+def encode_cursor(product: ProductSnapshot, sort: str = "id") -> str:
+    """Cursor pointing just after product in the given sort order."""
+    return ":".join(str(part) for part in _sort_key(product, sort))
+
+
+def decode_cursor(cursor: str, sort: str = "id") -> tuple:
+    """
+    Parse a cursor back into a sort key.
+
+    Raises:
+        InvalidCursorError: if the cursor is malformed for this sort order
+    """
+    parts = cursor.split(":")
+    if len(parts) != (2 if sort == "price" else 1):
+        raise InvalidCursorError(f"Invalid cursor for sort={sort}: {cursor!r}")
+    try:
+        return tuple(int(part) for part in parts)
+    except ValueError:
+        raise InvalidCursorError(f"Invalid cursor for sort={sort}: {cursor!r}") from None
+
+
+def get_page(
+    catalog: Catalog,
+    category: Optional[str] = None,
+    sort: str = "id",
+    after: Optional[str] = None,
+    limit: Optional[int] = None
+) -> ProductPage:
+    """
+    Get one page of products.
+
+    Args:
+        catalog: Catalog to list
+        category: Category to list, or None for every product
+        sort: "id" or "price" (ties broken by id)
+        after: Cursor from the previous page's next_cursor, or None for the first page
+        limit: Page size (defaults to PRODUCTS_PAGE_SIZE, capped at PRODUCTS_MAX_PAGE_SIZE)
+
+    Returns:
+        ProductPage with the products and the cursor for the next page
+
+    Raises:
+        InvalidCursorError: if after is malformed or sort is unknown
+    """
+    if sort not in SORTS:
+        raise InvalidCursorError(f"Unknown sort: {sort!r}")
+    limit = max(1, min(limit or PRODUCTS_PAGE_SIZE, PRODUCTS_MAX_PAGE_SIZE))
+
+    products, keys = _get_listing(catalog, category, sort)
+    start = bisect_right(keys, decode_cursor(after, sort)) if after else 0
+    page = products[start:start + limit]
+
+    has_more = start + limit < len(products)
+    next_cursor = encode_cursor(page[-1], sort) if page and has_more else None
+    return ProductPage(page, next_cursor)
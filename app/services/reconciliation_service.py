@@ -0,0 +1,349 @@
+"""
+Reconciliation Service - Catch up on Razorpay payments the app never heard about
+(closed tabs, missed or failed webhooks).
+
+Orders with a Razorpay order that are not paid yet (pending or failed) are
+scanned oldest first in keyset chunks of order ids. Each chunk's payments are
+fetched from the gateway concurrently (payment_service.fetch_order_payments_many)
+and the chunk is applied in one transaction with bulk UPDATEs:
+- a captured payment marks the order paid
+- only failed attempts mark it failed
+- no payments, or only failed ones, after expire_after cancels it and
+  releases its stock
+Orders whose fetch failed, or with a payment still in progress (created or
+authorized, not yet captured), are left as they are for the next run.
+
+This usually runs in its own process (reconcile_payments.py), so it can't touch
+the web workers' catalog caches. Releasing stock bumps the stock generation
+instead, and the workers pick the new levels up within CATALOG_STOCK_CHECK_INTERVAL.
+
+After each chunk the last order id is saved to a checkpoint file, so an
+interrupted run resumes where it stopped. A finished run removes the file.
+
+Web workers also run a PendingOrderSweeper: a reconcile() limited to orders
+older than CHECKOUT_PENDING_EXPIRE, which expires them, so abandoned checkouts
+hold stock for minutes rather than until the next reconcile_payments.py run.
+"""
+import json
+import os
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    CHECKOUT_PENDING_EXPIRE,
+    CHECKOUT_SWEEP_INTERVAL,
+    RECONCILE_CHECKPOINT,
+    RECONCILE_CHUNK_SIZE,
+    RECONCILE_CONCURRENCY,
+    RECONCILE_EXPIRE_AFTER,
+    RECONCILE_MIN_AGE,
+)
+from app.core.database import SessionLocal
+from app.models.order import Order
+from app.services import order_service, payment_service
+
+orders = Order.__table__
+
+# Payment states that still need reconciling
+UNSETTLED = ("pending", "failed")
+
+
+class PendingOrder(NamedTuple):
+    id: int
+    razorpay_order_id: str
+    created_at: datetime
+
+
+class ReconcileReport:
+    """Counters and timings for one reconciliation run."""
+
+    def __init__(self, resumed_after: int = 0):
+        self.resumed_after = resumed_after
+        self.last_order_id = resumed_after
+        self.chunks = 0
+        self.checked = 0
+        self.paid = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.errors = 0
+        self.gateway_seconds = 0.0
+        self.db_seconds = 0.0
+        self.elapsed = 0.0
+        self.complete = False
+
+    @property
+    def unchanged(self) -> int:
+        return self.checked - self.paid - self.failed - self.cancelled - self.errors
+
+    @property
+    def orders_per_second(self) -> float:
+        return self.checked / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "last_order_id": self.last_order_id,
+            "chunks": self.chunks,
+            "checked": self.checked,
+            "paid": self.paid,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "errors": self.errors,
+            "unchanged": self.unchanged,
+            "gateway_seconds": round(self.gateway_seconds, 3),
+            "db_seconds": round(self.db_seconds, 3),
+            "elapsed": round(self.elapsed, 3),
+            "orders_per_second": round(self.orders_per_second, 1),
+        }
+
+
+# ---------------- CHECKPOINT ----------------
+
+def load_checkpoint(path: str) -> int:
+    """Last order id recorded in the checkpoint file, or 0 to start from the beginning."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return int(json.load(f)["last_order_id"])
+    except FileNotFoundError:
+        return 0
+
+
+def save_checkpoint(path: str, report: ReconcileReport) -> None:
+    """Write the checkpoint atomically, so a crash never leaves a torn file."""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({**report.as_dict(), "saved_at": datetime.utcnow().isoformat()}, f)
+    os.replace(temp_path, path)
+
+
+# ---------------- RECONCILIATION ----------------
+
+def _pending_chunk(db: Session, after_id: int, limit: int, created_before: datetime) -> List[PendingOrder]:
+    """Next `limit` unsettled Razorpay orders with id > after_id (keyset pagination on the primary key)."""
+    rows = db.execute(
+        select(orders.c.id, orders.c.razorpay_order_id, orders.c.created_at)
+        .where(
+            orders.c.id > after_id,
+            orders.c.razorpay_order_id.is_not(None),
+            orders.c.payment_status.in_(UNSETTLED),
+            orders.c.order_status == "pending",
+            orders.c.created_at <= created_before,
+        )
+        .order_by(orders.c.id)
+        .limit(limit)
+    )
+    return [PendingOrder(*row) for row in rows]
+
+
+def classify_payments(payments: List[dict]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Decide an order's payment state from its gateway payments.
+
+    Returns:
+        ("paid", payment_id), ("failed", None) when every attempt failed,
+        ("in_progress", None) while a payment is created or authorized but not captured,
+        or (None, None) when there are no payments yet
+    """
+    for payment in payments:
+        if payment.get("status") == "captured":
+            return "paid", payment["id"]
+    if not payments:
+        return None, None
+    if all(payment.get("status") == "failed" for payment in payments):
+        return "failed", None
+    # Authorized payments are still being captured; don't call those failed or expire them
+    return "in_progress", None
+
+
+def reconcile_chunk(
+    db: Session,
+    chunk: List[PendingOrder],
+    expire_before: Optional[datetime],
+    concurrency: int
+) -> Tuple[int, int, int, int, float]:
+    """
+    Fetch a chunk's payments from the gateway and apply them in one transaction.
+
+    Returns:
+        Tuple of (paid, failed, cancelled, errors, gateway_seconds)
+    """
+    start = time.perf_counter()
+    results = payment_service.fetch_order_payments_many(
+        [order.razorpay_order_id for order in chunk], max_concurrency=concurrency
+    )
+    gateway_seconds = time.perf_counter() - start
+
+    paid = {}
+    failed = []
+    expired_failed = []
+    expired = []
+    errors = 0
+    for order in chunk:
+        payments = results[order.razorpay_order_id]
+        if isinstance(payments, payment_service.PaymentGatewayError):
+            errors += 1
+            continue
+        state, payment_id = classify_payments(payments)
+        if state == "paid":
+            paid[order.razorpay_order_id] = payment_id
+            continue
+        if state == "in_progress":
+            continue
+        is_expired = expire_before is not None and order.created_at <= expire_before
+        if is_expired:
+            expired.append(order.id)
+        if state == "failed":
+            (expired_failed if is_expired else failed).append(order.razorpay_order_id)
+
+    try:
+        paid_count = len(order_service.mark_orders_paid(db, paid))
+        failed_count = order_service.mark_orders_failed(db, failed)
+        # Expired orders keep an accurate payment status but are reported as cancelled
+        order_service.mark_orders_failed(db, expired_failed)
+        cancelled_count = len(order_service.cancel_unpaid_orders(db, expired))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return paid_count, failed_count, cancelled_count, errors, gateway_seconds
+
+
+def reconcile(
+    checkpoint_path: Optional[str] = RECONCILE_CHECKPOINT,
+    chunk_size: int = RECONCILE_CHUNK_SIZE,
+    concurrency: int = RECONCILE_CONCURRENCY,
+    min_age: float = RECONCILE_MIN_AGE,
+    expire_after: float = RECONCILE_EXPIRE_AFTER,
+    max_chunks: Optional[int] = None,
+    restart: bool = False,
+    on_chunk: Optional[Callable[[ReconcileReport, float], None]] = None
+) -> ReconcileReport:
+    """
+    Reconcile unsettled Razorpay orders against the gateway.
+
+    Args:
+        checkpoint_path: JSON checkpoint file to resume from and update, or None for no checkpoint
+        chunk_size: Orders per chunk (one gateway fan-out and one transaction each)
+        concurrency: Maximum gateway requests in flight
+        min_age: Skip orders younger than this many minutes (customers may still be paying)
+        expire_after: Cancel orders with no successful payment after this many minutes (0 never cancels)
+        max_chunks: Stop after this many chunks, leaving the checkpoint for the next run
+        restart: Ignore the checkpoint and start from the first order
+        on_chunk: Called with the report and the chunk's duration after each chunk
+
+    Returns:
+        ReconcileReport for this run; report.complete is False if it stopped at max_chunks
+    """
+    if not payment_service.razorpay_client:
+        raise payment_service.PaymentGatewayError("Razorpay credentials not configured")
+
+    last_order_id = load_checkpoint(checkpoint_path) if checkpoint_path and not restart else 0
+    report = ReconcileReport(resumed_after=last_order_id)
+    now = datetime.utcnow()
+    created_before = now - timedelta(minutes=min_age)
+    expire_before = now - timedelta(minutes=expire_after) if expire_after > 0 else None
+
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        while max_chunks is None or report.chunks < max_chunks:
+            chunk_start = time.perf_counter()
+            chunk = _pending_chunk(db, report.last_order_id, chunk_size, created_before)
+            if not chunk:
+                report.complete = True
+                break
+
+            paid, failed, cancelled, errors, gateway_seconds = reconcile_chunk(db, chunk, expire_before, concurrency)
+            chunk_seconds = time.perf_counter() - chunk_start
+
+            report.chunks += 1
+            report.checked += len(chunk)
+            report.paid += paid
+            report.failed += failed
+            report.cancelled += cancelled
+            report.errors += errors
+            report.gateway_seconds += gateway_seconds
+            report.db_seconds += chunk_seconds - gateway_seconds
+            report.last_order_id = chunk[-1].id
+            report.elapsed = time.perf_counter() - start
+
+            if checkpoint_path:
+                save_checkpoint(checkpoint_path, report)
+            if on_chunk:
+                on_chunk(report, chunk_seconds)
+    finally:
+        db.close()
+
+    report.elapsed = time.perf_counter() - start
+    if report.complete and checkpoint_path and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return report
+
+
+# ---------------- PENDING ORDER EXPIRY ----------------
+
+class PendingOrderSweeper:
+    """
+    Background thread cancelling this app's abandoned Razorpay checkouts.
+    Every interval seconds it reconciles orders older than expire_after minutes
+    (no checkpoint), so each is marked paid if a payment was captured and
+    cancelled, releasing its stock, if it has no payments or only failed ones
+    (payments still being captured are left alone). Safe to run in every worker:
+    settling an order twice changes nothing.
+    """
+
+    def __init__(self, expire_after: float = CHECKOUT_PENDING_EXPIRE, interval: float = CHECKOUT_SWEEP_INTERVAL):
+        self.expire_after = expire_after
+        self.interval = interval
+        self.cancelled = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> ReconcileReport:
+        report = reconcile(checkpoint_path=None, min_age=self.expire_after, expire_after=self.expire_after)
+        self.cancelled += report.cancelled
+        return report
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                traceback.print_exc()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="pending-order-sweeper", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+_sweeper: Optional[PendingOrderSweeper] = None
+
+
+def start_sweeper() -> None:
+    """Start this process's pending order sweeper (called at app startup)."""
+    global _sweeper
+    if payment_service.razorpay_client and CHECKOUT_PENDING_EXPIRE > 0 and _sweeper is None:
+        _sweeper = PendingOrderSweeper()
+        _sweeper.start()
+        print(f"⌛ Pending order sweeper started (unpaid checkouts expire after {CHECKOUT_PENDING_EXPIRE:g} min)")
+
+
+def stop_sweeper() -> None:
+    """Stop the pending order sweeper (called at app shutdown)."""
+    global _sweeper
+    if _sweeper is not None:
+        _sweeper.stop()
+        _sweeper = None
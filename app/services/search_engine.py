@@ -0,0 +1,376 @@
+"""
+Search Engine - Product search over name, brand, category and description.
+Supports three backends selected by SEARCH_BACKEND in app/core/config.py:
+- memory: in-memory inverted index with prefix matching and relevance ranking
+- fts5: SQLite FTS5 table mirroring products, kept in sync by triggers, ranked with bm25
+- ilike: case-insensitive LIKE scan over name and brand
+"""
+import bisect
+import math
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import or_, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import SEARCH_BACKEND
+from app.core.database import engine
+from app.models.product import Product
+from app.services import catalog_cache
+from app.services.catalog_cache import Catalog, ProductSnapshot
+
+SEARCH_BACKENDS = ("memory", "fts5", "ilike")
+
+# Relevance weight of a token match in each field
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "brand": 2.0,
+    "category": 1.5,
+    "description": 1.0,
+}
+
+# Score multiplier for a prefix match ("whe" -> "whey") vs an exact token match
+PREFIX_MATCH_WEIGHT = 0.5
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into lowercase alphanumeric tokens."""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SearchIndex:
+    """
+    Inverted index mapping tokens to the products that contain them.
+    
+    Products can be added and removed individually, so a catalog change only
+    re-indexes the products that actually changed. synced() does that on a
+    copy that shares every unchanged postings list, leaving the original
+    untouched for searches still using it.
+    """
+
+    def __init__(self):
+        self.version: Optional[str] = None
+        self._products: Dict[int, ProductSnapshot] = {}
+        # token -> {product_id: field-weighted term frequency}
+        self._postings: Dict[str, Dict[int, float]] = {}
+        # product_id -> tokens it was indexed under (for removal)
+        self._doc_tokens: Dict[int, List[str]] = {}
+        # Sorted token list for prefix lookups with bisect
+        self._tokens: List[str] = []
+        # Tokens whose postings dict belongs to this index; the rest are shared with
+        # the index this one was copied from and are copied before being changed
+        self._owned: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def _writable_postings(self, token: str) -> Dict[int, float]:
+        postings = self._postings[token]
+        if token not in self._owned:
+            postings = self._postings[token] = dict(postings)
+            self._owned.add(token)
+        return postings
+
+    def add(self, product: ProductSnapshot) -> None:
+        """Index a product, replacing any previous version of it."""
+        if product.id in self._products:
+            self.remove(product.id)
+
+        weights: Dict[str, float] = {}
+        for field, field_weight in FIELD_WEIGHTS.items():
+            for token in tokenize(getattr(product, field)):
+                weights[token] = weights.get(token, 0.0) + field_weight
+
+        for token, weight in weights.items():
+            if token in self._postings:
+                postings = self._writable_postings(token)
+            else:
+                postings = self._postings[token] = {}
+                self._owned.add(token)
+                bisect.insort(self._tokens, token)
+            postings[product.id] = weight
+
+        self._products[product.id] = product
+        self._doc_tokens[product.id] = list(weights)
+
+    def remove(self, product_id: int) -> None:
+        """Remove a product from the index if present."""
+        if self._products.pop(product_id, None) is None:
+            return
+
+        for token in self._doc_tokens.pop(product_id):
+            postings = self._writable_postings(token)
+            del postings[product_id]
+            if not postings:
+                del self._postings[token]
+                self._owned.discard(token)
+                del self._tokens[bisect.bisect_left(self._tokens, token)]
+
+    def sync(self, catalog: Catalog) -> None:
+        """
+        Bring the index in line with a catalog, re-indexing only changed products.
+        
+        Args:
+            catalog: Catalog to mirror
+        """
+        for product_id in [pid for pid in self._products if pid not in catalog.by_id]:
+            self.remove(product_id)
+
+        for product in catalog.products:
+            if self._products.get(product.id) != product:
+                self.add(product)
+
+        self.version = catalog.version
+
+    def synced(self, catalog: Catalog) -> "SearchIndex":
+        """
+        A new index mirroring catalog, built from a copy of this one.
+        This index is not modified, so it can keep serving searches meanwhile.
+        
+        Args:
+            catalog: Catalog to mirror
+        
+        Returns:
+            Synced copy (or this index if it already mirrors catalog)
+        """
+        if self.version == catalog.version:
+            return self
+
+        index = SearchIndex()
+        index._products = dict(self._products)
+        index._postings = dict(self._postings)
+        index._doc_tokens = dict(self._doc_tokens)
+        index._tokens = list(self._tokens)
+        index.sync(catalog)
+        return index
+
+    def _prefix_tokens(self, prefix: str) -> Iterable[str]:
+        start = bisect.bisect_left(self._tokens, prefix)
+        for token in self._tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            yield token
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[ProductSnapshot]:
+        """
+        Find products matching every term of the query.
+        
+        Each term matches tokens it equals or is a prefix of. Matches are scored by
+        field weight and token rarity, exact matches ranking above prefix matches.
+        
+        Args:
+            query: Free text search query
+            limit: Maximum number of results (default: all)
+        
+        Returns:
+            Matching products, most relevant first
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        total_docs = len(self._products)
+        scores: Optional[Dict[int, float]] = None
+
+        for term in dict.fromkeys(terms):
+            term_scores: Dict[int, float] = {}
+            for token in self._prefix_tokens(term):
+                postings = self._postings[token]
+                idf = math.log(1 + total_docs / len(postings))
+                multiplier = idf if token == term else idf * PREFIX_MATCH_WEIGHT
+                for product_id, weight in postings.items():
+                    score = weight * multiplier
+                    if score > term_scores.get(product_id, 0.0):
+                        term_scores[product_id] = score
+
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {
+                    product_id: score + term_scores[product_id]
+                    for product_id, score in scores.items()
+                    if product_id in term_scores
+                }
+            if not scores:
+                return []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self._products[product_id] for product_id, _ in ranked]
+
+
+# ---------------- MEMORY BACKEND ----------------
+
+# The published index is never mutated: a catalog change publishes a synced
+# copy instead, so searches use whichever index they picked up without locking
+_index = SearchIndex()
+# Serializes syncs, so a catalog change is indexed once
+_lock = threading.Lock()
+
+
+def _current_index() -> SearchIndex:
+    global _index
+
+    catalog = catalog_cache.get_catalog()
+    index = _index
+    if index.version == catalog.version:
+        return index
+
+    with _lock:
+        # Another thread may have synced while we waited for the lock
+        if _index.version != catalog.version:
+            _index = _index.synced(catalog)
+        return _index
+
+
+def build_index() -> None:
+    """Build (or refresh) the shared search index from the catalog cache."""
+    _current_index()
+
+
+def search_memory(query: str, limit: Optional[int] = None) -> List[ProductSnapshot]:
+    """Search the in-memory index, first syncing it if the catalog changed."""
+    return _current_index().search(query, limit)
+
+
+# ---------------- FTS5 BACKEND ----------------
+
+# Column order matches bm25() weights below: name, brand, category, description
+FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, brand, category, description,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, brand, category, description)
+        VALUES (new.id, new.name, new.brand, new.category, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, brand, category, description)
+        VALUES ('delete', old.id, old.name, old.brand, old.category, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_au
+    AFTER UPDATE OF name, brand, category, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, brand, category, description)
+        VALUES ('delete', old.id, old.name, old.brand, old.category, old.description);
+        INSERT INTO products_fts(rowid, name, brand, category, description)
+        VALUES (new.id, new.name, new.brand, new.category, new.description);
+    END
+    """,
+]
+
+FTS_QUERY = text(f"""
+    SELECT rowid FROM products_fts
+    WHERE products_fts MATCH :match
+    ORDER BY bm25(products_fts, {", ".join(str(weight) for weight in FIELD_WEIGHTS.values())})
+    LIMIT :limit
+""")
+
+
+def init_fts(bind: Engine = engine) -> None:
+    """
+    Create the FTS5 mirror of the products table and its sync triggers.
+    The index is populated from existing rows the first time it is created.
+    
+    Args:
+        bind: Engine to create the table on (default: application engine)
+    """
+    with bind.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'")
+        ).first()
+        for statement in FTS_DDL:
+            conn.execute(text(statement))
+        if not exists:
+            conn.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+
+
+def fts_match_expression(query: str) -> Optional[str]:
+    """Build an FTS5 MATCH expression requiring every term, each as a prefix."""
+    terms = tokenize(query)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in dict.fromkeys(terms))
+
+
+def search_fts(db: Session, query: str, limit: Optional[int] = None) -> List[ProductSnapshot]:
+    """
+    Search the FTS5 table, ranked by bm25 with the same field weights as the memory index.
+    
+    Args:
+        db: Database session
+        query: Free text search query
+        limit: Maximum number of results (default: all)
+    
+    Returns:
+        Matching products, most relevant first
+    """
+    match = fts_match_expression(query)
+    if match is None:
+        return []
+
+    product_ids = db.execute(FTS_QUERY, {"match": match, "limit": -1 if limit is None else limit}).scalars()
+    catalog = catalog_cache.get_catalog(db)
+    return [catalog.by_id[product_id] for product_id in product_ids if product_id in catalog.by_id]
+
+
+# ---------------- ILIKE BACKEND ----------------
+
+def search_ilike(db: Session, query: str, limit: Optional[int] = None) -> List[Product]:
+    """Case-insensitive substring match on product name or brand."""
+    products = db.query(Product).filter(
+        or_(
+            Product.name.ilike(f"%{query}%"),
+            Product.brand.ilike(f"%{query}%")
+        )
+    )
+    if limit is not None:
+        products = products.limit(limit)
+    return products.all()
+
+
+# ---------------- DISPATCH ----------------
+
+def init_search() -> None:
+    """Prepare the configured search backend at startup."""
+    if SEARCH_BACKEND not in SEARCH_BACKENDS:
+        raise ValueError(f"Unknown SEARCH_BACKEND {SEARCH_BACKEND!r}, expected one of {SEARCH_BACKENDS}")
+
+    if SEARCH_BACKEND == "memory":
+        build_index()
+    elif SEARCH_BACKEND == "fts5":
+        init_fts()
+
+
+def search(query: str, db: Session, limit: Optional[int] = None) -> list:
+    """
+    Search the catalog with the configured backend.
+    
+    Args:
+        query: Free text search query
+        db: Database session (unused by the memory backend)
+        limit: Maximum number of results (default: all)
+    
+    Returns:
+        Matching products, most relevant first (ilike returns them in table order)
+    """
+    if SEARCH_BACKEND == "fts5":
+        return search_fts(db, query, limit)
+    if SEARCH_BACKEND == "ilike":
+        return search_ilike(db, query, limit)
+    return search_memory(query, limit)
@@ -0,0 +1,179 @@
+"""
+Stock Service - Atomic stock reservation for order placement.
+Stock is decremented with a single conditional UPDATE covering every product
+in the cart, so concurrent checkouts never read-then-write stock in Python.
+The reservation runs inside the caller's transaction: if any product is short,
+the caller rolls back and no stock is taken. Both reservation and release
+return the new stock levels, which the caller hands to
+catalog_cache.update_stock() after committing. Releases also bump the
+stock_generation counter, so web workers that didn't make the change (or
+another process, such as reconcile_payments.py, did) refresh their stock.
+
+Functions ending in _async are equivalents for async route handlers.
+"""
+from typing import Dict, List, NamedTuple
+
+from sqlalchemy import case, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.models.stock_generation import StockGeneration
+
+products = Product.__table__
+generations = StockGeneration.__table__
+
+
+class StockShortage(NamedTuple):
+    """A product that could not be reserved."""
+    product_id: int
+    name: str
+    requested: int
+    available: int
+
+
+class OutOfStockError(Exception):
+    """Raised when one or more cart products don't have enough stock."""
+
+    def __init__(self, shortages: List[StockShortage]):
+        self.shortages = shortages
+        details = ", ".join(
+            f"{shortage.name} (requested {shortage.requested}, available {shortage.available})"
+            for shortage in shortages
+        )
+        super().__init__(f"Insufficient stock for: {details}")
+
+
+def _requested_quantities(cart_items: List[dict]) -> Dict[int, int]:
+    quantities: Dict[int, int] = {}
+    for item in cart_items:
+        product_id = item["product"].id
+        quantities[product_id] = quantities.get(product_id, 0) + item["quantity"]
+    return quantities
+
+
+def _reserve_statement(quantities: Dict[int, int]):
+    """
+    UPDATE products SET stock = stock - <qty> WHERE id IN (...) AND stock >= <qty>
+    RETURNING id, stock, with <qty> picked per row by a CASE on the product id.
+    """
+    requested = case(quantities, value=products.c.id)
+    return (
+        update(products)
+        .where(products.c.id.in_(list(quantities)), products.c.stock >= requested)
+        .values(stock=products.c.stock - requested)
+        .returning(products.c.id, products.c.stock)
+    )
+
+
+def _shortages_statement(product_ids: List[int]):
+    return select(products.c.id, products.c.name, products.c.stock).where(products.c.id.in_(product_ids))
+
+
+def _build_shortages(quantities: Dict[int, int], rows) -> List[StockShortage]:
+    found = {row.id: row for row in rows}
+    shortages = []
+    for product_id, requested in quantities.items():
+        row = found.get(product_id)
+        shortages.append(StockShortage(
+            product_id=product_id,
+            name=row.name if row else f"Product #{product_id}",
+            requested=requested,
+            available=(row.stock or 0) if row else 0
+        ))
+    return shortages
+
+
+def reserve_stock(db: Session, cart_items: List[dict]) -> Dict[int, int]:
+    """
+    Decrement stock for every product in the cart, or for none of them.
+    Must run inside the transaction that creates the order; the caller
+    commits on success and rolls back on OutOfStockError.
+
+    Args:
+        db: Database session
+        cart_items: List of cart items with product and quantity
+
+    Returns:
+        Mapping of product id to its stock after the reservation
+
+    Raises:
+        OutOfStockError: listing each product that is short
+    """
+    quantities = _requested_quantities(cart_items)
+    if not quantities:
+        return {}
+
+    reserved = dict(db.execute(_reserve_statement(quantities)).all())
+
+    if len(reserved) != len(quantities):
+        failed = [product_id for product_id in quantities if product_id not in reserved]
+        rows = db.execute(_shortages_statement(failed)).all()
+        raise OutOfStockError(_build_shortages({pid: quantities[pid] for pid in failed}, rows))
+    return reserved
+
+
+async def reserve_stock_async(db: AsyncSession, cart_items: List[dict]) -> Dict[int, int]:
+    """Async variant of reserve_stock."""
+    quantities = _requested_quantities(cart_items)
+    if not quantities:
+        return {}
+
+    reserved = dict((await db.execute(_reserve_statement(quantities))).all())
+
+    if len(reserved) != len(quantities):
+        failed = [product_id for product_id in quantities if product_id not in reserved]
+        rows = (await db.execute(_shortages_statement(failed))).all()
+        raise OutOfStockError(_build_shortages({pid: quantities[pid] for pid in failed}, rows))
+    return reserved
+
+
+def _release_statement(quantities: Dict[int, int]):
+    return (
+        update(products)
+        .where(products.c.id.in_(list(quantities)))
+        .values(stock=products.c.stock + case(quantities, value=products.c.id))
+        .returning(products.c.id, products.c.stock)
+    )
+
+
+def _bump_generation_statement():
+    return (
+        sqlite_insert(generations)
+        .values(id=1, generation=1)
+        .on_conflict_do_update(index_elements=["id"], set_={"generation": generations.c.generation + 1})
+    )
+
+
+def current_generation_statement():
+    """SELECT of the stock generation (no row until the first release)."""
+    return select(generations.c.generation).where(generations.c.id == 1)
+
+
+def release_stock(db: Session, quantities: Dict[int, int]) -> Dict[int, int]:
+    """
+    Return stock held by orders that will not be fulfilled (e.g. cancelled unpaid orders),
+    with one UPDATE, and bump the stock generation. Runs inside the caller's transaction.
+
+    Args:
+        db: Database session
+        quantities: Mapping of product id to the quantity to put back
+
+    Returns:
+        Mapping of product id to its stock after the release
+    """
+    if not quantities:
+        return {}
+    released = dict(db.execute(_release_statement(quantities)).all())
+    db.execute(_bump_generation_statement())
+    return released
+
+
+async def release_stock_async(db: AsyncSession, quantities: Dict[int, int]) -> Dict[int, int]:
+    """Async variant of release_stock."""
+    if not quantities:
+        return {}
+    released = dict((await db.execute(_release_statement(quantities))).all())
+    await db.execute(_bump_generation_statement())
+    return released
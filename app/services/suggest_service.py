@@ -0,0 +1,178 @@
+"""
+Suggest Service - Typeahead suggestions for the header search box.
+Serves product name and brand completions from a prefix trie built over the
+catalog cache, memoizing results per prefix in a bounded LRU.
+
+When the catalog version changes, a new trie is built on a background thread
+and swapped in once ready; until then suggestions keep coming from the
+previous trie, so no request waits for a rebuild.
+"""
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+from app.core.config import SUGGEST_CACHE_SIZE, SUGGEST_LIMIT, SUGGEST_MAX_LIMIT
+from app.services import catalog_cache
+from app.services.catalog_cache import Catalog
+from app.services.search_engine import tokenize
+from app.utils.lru import LRUCache
+
+
+def normalize(text: str) -> str:
+    """Lowercase text and collapse punctuation and whitespace to single spaces."""
+    return " ".join(tokenize(text))
+
+
+class _TrieNode:
+    __slots__ = ("children", "entries")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.entries: List[dict] = []
+
+
+class PrefixTrie:
+    """
+    Character trie where every node keeps its top `capacity` completions.
+    
+    Entries must be inserted best-first; each node then holds the highest ranked
+    matches for its prefix, so a lookup costs O(len(prefix)) regardless of catalog size.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._root = _TrieNode()
+
+    def insert(self, key: str, entry: dict) -> None:
+        node = self._root
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            if len(node.entries) < self.capacity and entry not in node.entries:
+                node.entries.append(entry)
+
+    def lookup(self, prefix: str) -> List[dict]:
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.entries
+
+
+def build_trie(catalog: Catalog) -> PrefixTrie:
+    """
+    Build a suggestion trie over product names and brands.
+    Each phrase is reachable from the start of any of its words, so "whey"
+    completes "Gold Standard Whey". Brands rank first, then shorter phrases.
+    
+    Args:
+        catalog: Catalog to index
+    
+    Returns:
+        Populated PrefixTrie
+    """
+    entries = {}
+    for product in catalog.products:
+        for kind, value in (("brand", product.brand), ("product", product.name)):
+            text = (value or "").strip()
+            if text and (kind, text.lower()) not in entries:
+                entries[(kind, text.lower())] = {"text": text, "type": kind}
+
+    ranked = sorted(
+        entries.values(),
+        key=lambda entry: (entry["type"] != "brand", len(entry["text"]), entry["text"].lower()),
+    )
+
+    trie = PrefixTrie(SUGGEST_MAX_LIMIT)
+    for entry in ranked:
+        words = tokenize(entry["text"])
+        for start in range(len(words)):
+            trie.insert(" ".join(words[start:]), entry)
+    return trie
+
+
+class _PublishedTrie(NamedTuple):
+    version: str
+    trie: PrefixTrie
+
+
+# Replaced as a whole, never mutated, so readers need no lock
+_current: Optional[_PublishedTrie] = None
+_rebuilding = False
+# Guards _rebuilding only; never held while a trie is being built
+_lock = threading.Lock()
+# Serializes the first build, when there is no trie to serve yet
+_initial_build_lock = threading.Lock()
+
+# (trie version, normalized prefix, limit) -> suggestions
+_cache = LRUCache(SUGGEST_CACHE_SIZE)
+
+
+def _publish(catalog: Catalog) -> _PublishedTrie:
+    global _current
+    published = _PublishedTrie(catalog.version, build_trie(catalog))
+    _current = published
+    return published
+
+
+def _rebuild(catalog: Catalog) -> None:
+    global _rebuilding
+    try:
+        _publish(catalog)
+    finally:
+        with _lock:
+            _rebuilding = False
+
+
+def _start_rebuild(catalog: Catalog) -> None:
+    """Build a trie for catalog in the background, unless a rebuild is already running."""
+    global _rebuilding
+    with _lock:
+        if _rebuilding:
+            return
+        _rebuilding = True
+    threading.Thread(target=_rebuild, args=(catalog,), name="suggest-trie", daemon=True).start()
+
+
+def _get_trie(catalog: Catalog) -> _PublishedTrie:
+    """The trie for catalog if built, otherwise the previous one while a new one is built."""
+    current = _current
+    if current is not None:
+        if current.version != catalog.version:
+            _start_rebuild(catalog)
+        return current
+
+    with _initial_build_lock:
+        if _current is None:
+            return _publish(catalog)
+        return _current
+
+
+def suggest(prefix: str, limit: int = SUGGEST_LIMIT) -> List[dict]:
+    """
+    Get completions for a search box prefix.
+    
+    Args:
+        prefix: Text typed so far
+        limit: Maximum number of suggestions (capped at SUGGEST_MAX_LIMIT)
+    
+    Returns:
+        List of {"text", "type"} dicts, type being "brand" or "product"
+    """
+    normalized = normalize(prefix)
+    if not normalized:
+        return []
+
+    limit = max(1, min(limit, SUGGEST_MAX_LIMIT))
+    published = _get_trie(catalog_cache.get_catalog())
+    key = (published.version, normalized, limit)
+
+    suggestions = _cache.get(key)
+    if suggestions is None:
+        suggestions = published.trie.lookup(normalized)[:limit]
+        _cache.set(key, suggestions)
+    return suggestions
+
+
+def cache_stats() -> dict:
+    """Return hit/miss counters of the per-prefix suggestion cache."""
+    return _cache.stats()
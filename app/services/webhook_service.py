@@ -0,0 +1,257 @@
+"""
+Webhook Service - Razorpay webhook ingestion and processing.
+/payment/webhook only verifies the signature and appends the raw event to
+payment_events (redeliveries with the same event id are dropped by a unique
+constraint), so Razorpay gets its acknowledgement immediately.
+
+A background consumer reads events after its cursor in id order and applies a
+whole batch to orders in one transaction: one UPDATE for orders that were
+paid, one for payments that failed, and the cursor advance. A burst of
+webhooks therefore costs a few short write transactions instead of one per
+event, leaving the database free for checkout writes.
+"""
+import hashlib
+import json
+import threading
+import traceback
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import RAZORPAY_WEBHOOK_SECRET, WEBHOOK_BATCH_SIZE, WEBHOOK_POLL_INTERVAL
+from app.core.database import SessionLocal
+from app.models.payment_event import PaymentEvent, PaymentEventCursor
+from app.services import order_service
+from app.services.payment_service import SignatureVerifier
+
+events = PaymentEvent.__table__
+cursors = PaymentEventCursor.__table__
+
+# Webhooks are signed with their own secret, not the API key secret
+webhook_verifier: Optional[SignatureVerifier] = (
+    SignatureVerifier(RAZORPAY_WEBHOOK_SECRET) if RAZORPAY_WEBHOOK_SECRET else None
+)
+
+ORDERS_CONSUMER = "orders"
+
+# Events that settle an order's payment; everything else is stored but ignored
+PAID_EVENTS = ("payment.captured", "order.paid")
+FAILED_EVENTS = ("payment.failed",)
+
+
+# ---------------- INGESTION ----------------
+
+def _event_values(event_id: str, body: bytes) -> dict:
+    """
+    Column values for a raw webhook body.
+
+    Raises:
+        ValueError: if the body is not a Razorpay event
+    """
+    data = json.loads(body)
+    if not isinstance(data, dict) or not isinstance(data.get("event"), str):
+        raise ValueError("Not a Razorpay webhook event")
+
+    payload = data.get("payload") or {}
+    payment = (payload.get("payment") or {}).get("entity") or {}
+    order = (payload.get("order") or {}).get("entity") or {}
+    return {
+        "event_id": event_id or hashlib.sha256(body).hexdigest(),
+        "event": data["event"],
+        "razorpay_order_id": payment.get("order_id") or order.get("id"),
+        "razorpay_payment_id": payment.get("id"),
+        "payload": body.decode(),
+    }
+
+
+def _insert_event(values: dict):
+    return sqlite_insert(events).values(**values).on_conflict_do_nothing(index_elements=["event_id"])
+
+
+def record_event(db: Session, event_id: str, body: bytes) -> bool:
+    """
+    Append a verified webhook event and commit.
+
+    Args:
+        db: Database session
+        event_id: X-Razorpay-Event-Id header (a digest of the body is used if missing)
+        body: Raw request body
+
+    Returns:
+        True if stored, False if this event was already received
+
+    Raises:
+        ValueError: if the body is not a Razorpay event
+    """
+    result = db.execute(_insert_event(_event_values(event_id, body)))
+    db.commit()
+    return result.rowcount == 1
+
+
+async def record_event_async(db: AsyncSession, event_id: str, body: bytes) -> bool:
+    """Async variant of record_event."""
+    result = await db.execute(_insert_event(_event_values(event_id, body)))
+    await db.commit()
+    return result.rowcount == 1
+
+
+# ---------------- PROCESSING ----------------
+
+class BatchResult(NamedTuple):
+    events: int
+    paid: int
+    failed: int
+
+
+class _EventRow(NamedTuple):
+    id: int
+    event: str
+    razorpay_order_id: Optional[str]
+    razorpay_payment_id: Optional[str]
+
+
+def _settle(batch: List[_EventRow]) -> tuple:
+    """Reduce a batch to ({razorpay_order_id: payment_id} paid, [razorpay_order_id] failed)."""
+    paid: Dict[str, str] = {}
+    failed = set()
+    for event in batch:
+        if not event.razorpay_order_id:
+            continue
+        if event.event in PAID_EVENTS:
+            # order.paid carries the payment too; keep the first payment id seen
+            paid.setdefault(event.razorpay_order_id, event.razorpay_payment_id)
+        elif event.event in FAILED_EVENTS:
+            failed.add(event.razorpay_order_id)
+    # A payment can fail and a retry on the same order succeed
+    return paid, sorted(failed - paid.keys())
+
+
+def apply_batch(db: Session, limit: int = WEBHOOK_BATCH_SIZE, consumer: str = ORDERS_CONSUMER) -> BatchResult:
+    """
+    Apply the next `limit` events after the consumer's cursor to orders, and
+    advance the cursor, in one transaction. If another consumer advanced the
+    cursor meanwhile, nothing is applied.
+
+    Returns:
+        BatchResult with the number of events consumed and orders changed
+    """
+    try:
+        last_event_id = db.scalar(select(cursors.c.last_event_id).where(cursors.c.consumer == consumer))
+        if last_event_id is None:
+            db.execute(sqlite_insert(cursors).values(consumer=consumer, last_event_id=0).on_conflict_do_nothing())
+            last_event_id = 0
+
+        # Raw payloads stay in the table; the ids extracted on ingestion are all that's needed
+        batch = [_EventRow(*row) for row in db.execute(
+            select(events.c.id, events.c.event, events.c.razorpay_order_id, events.c.razorpay_payment_id)
+            .where(events.c.id > last_event_id)
+            .order_by(events.c.id)
+            .limit(limit)
+        )]
+        if not batch:
+            db.rollback()
+            return BatchResult(0, 0, 0)
+
+        paid, failed = _settle(batch)
+        paid_ids = order_service.mark_orders_paid(db, paid)
+        failed_count = order_service.mark_orders_failed(db, failed)
+
+        advanced = db.execute(
+            update(cursors)
+            .where(cursors.c.consumer == consumer, cursors.c.last_event_id == last_event_id)
+            .values(last_event_id=batch[-1].id)
+        ).rowcount
+        if not advanced:
+            db.rollback()
+            return BatchResult(0, 0, 0)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return BatchResult(len(batch), len(paid_ids), failed_count)
+
+
+class WebhookConsumer:
+    """
+    Background thread applying stored webhook events to orders.
+    Applies batches back to back while events are waiting; otherwise sleeps
+    for poll_interval seconds or until notify() is called.
+    """
+
+    def __init__(self, batch_size: int = WEBHOOK_BATCH_SIZE, poll_interval: float = WEBHOOK_POLL_INTERVAL):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.events = 0
+        self.batches = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> BatchResult:
+        """Apply one batch; returns its BatchResult."""
+        db = SessionLocal()
+        try:
+            result = apply_batch(db, self.batch_size)
+        finally:
+            db.close()
+        if result.events:
+            self.events += result.events
+            self.batches += 1
+        return result
+
+    def notify(self) -> None:
+        """Wake the consumer because new events were stored."""
+        self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                consumed = self.run_once().events
+            except Exception:
+                traceback.print_exc()
+                consumed = 0
+            if not consumed:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="webhook-consumer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+_consumer: Optional[WebhookConsumer] = None
+
+
+def notify_consumer() -> None:
+    """Wake this process's consumer (called after an event is stored)."""
+    if _consumer is not None:
+        _consumer.notify()
+
+
+def start_consumer() -> None:
+    """Start this process's webhook consumer (called at app startup)."""
+    global _consumer
+    if webhook_verifier and _consumer is None:
+        _consumer = WebhookConsumer()
+        _consumer.start()
+        print("🪝 Webhook consumer started")
+
+
+def stop_consumer() -> None:
+    """Stop the webhook consumer (called at app shutdown)."""
+    global _consumer
+    if _consumer is not None:
+        _consumer.stop()
+        _consumer = None
@@ -68,7 +68,7 @@ document.addEventListener("DOMContentLoaded", function () {
                     const verifyResult = await verifyRes.json();
 
                     if (!verifyResult.success) {
-                        alert("Payment verification failed!");
+                        alert(verifyResult.message || "Payment verification failed!");
                         window.location.href = "/payment/failure";
                         return;
                     }
@@ -0,0 +1,47 @@
+/**
+ * Search JavaScript - Typeahead suggestions for the header search box
+ */
+
+document.addEventListener('DOMContentLoaded', function() {
+    const input = document.querySelector('input[list="search-suggestions"]');
+    const datalist = document.getElementById('search-suggestions');
+    
+    if (!input || !datalist) {
+        return;
+    }
+    
+    let debounceTimer = null;
+    let lastQuery = '';
+    
+    input.addEventListener('input', function() {
+        clearTimeout(debounceTimer);
+        
+        debounceTimer = setTimeout(async function() {
+            const query = input.value.trim();
+            
+            if (!query || query === lastQuery) {
+                return;
+            }
+            lastQuery = query;
+            
+            try {
+                const response = await fetch(`/search/suggest?q=${encodeURIComponent(query)}`);
+                const data = await response.json();
+                
+                // Ignore responses that arrive after the user kept typing
+                if (data.query !== input.value.trim()) {
+                    return;
+                }
+                
+                datalist.innerHTML = '';
+                data.suggestions.forEach(suggestion => {
+                    const option = document.createElement('option');
+                    option.value = suggestion.text;
+                    datalist.appendChild(option);
+                });
+            } catch (error) {
+                console.error('Error fetching suggestions:', error);
+            }
+        }, 150);
+    });
+});
@@ -1,22 +1,130 @@
+"""
+SMTP sending for order notifications.
+SMTPSender keeps one authenticated connection open and sends many messages
+over it, reconnecting only when the server drops it.
+"""
 import smtplib
-import os
-from email.mime.text import MIMEText
+import time
+from email.message import EmailMessage
+from typing import Optional
 
+from app.core.config import (
+    ORDER_EMAIL_FROM,
+    ORDER_EMAIL_TO,
+    SMTP_HOST,
+    SMTP_IDLE_TIMEOUT,
+    SMTP_PASSWORD,
+    SMTP_PORT,
+    SMTP_STARTTLS,
+    SMTP_TIMEOUT,
+    SMTP_USERNAME,
+)
 
-EMAIL = os.getenv("proteinperks@gmail.com")
-PASSWORD = os.getenv("ghzq kbze pzzp lpwn")
+ORDER_EMAIL_SUBJECT = "🛒 New Order - ProteinPerks"
 
 
-def send_order_email(message):
+def build_message(recipient: str, subject: str, body: str, sender: str = ORDER_EMAIL_FROM) -> EmailMessage:
+    msg = EmailMessage()
+    msg["Subject"] = subject
+    msg["From"] = sender
+    msg["To"] = recipient
+    msg.set_content(body)
+    return msg
+
+
+class SMTPSender:
+    """
+    Reusable SMTP connection.
+    The connection (TCP, STARTTLS, login) is opened on the first send and reused
+    until close() or until it has been idle for longer than idle_timeout.
+    """
+
+    def __init__(
+        self,
+        host: str = SMTP_HOST,
+        port: int = SMTP_PORT,
+        username: str = SMTP_USERNAME,
+        password: str = SMTP_PASSWORD,
+        starttls: bool = SMTP_STARTTLS,
+        timeout: float = SMTP_TIMEOUT,
+        idle_timeout: float = SMTP_IDLE_TIMEOUT
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.connections_opened = 0
+        self._server: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        self.connections_opened += 1
+        return server
+
+    def send(self, msg: EmailMessage) -> None:
+        """
+        Send one message over the shared connection.
+        A connection the server already closed is reopened once and the send retried.
 
-    msg = MIMEText(message)
-    msg["Subject"] = "🛒 New Order - ProteinPerks"
-    msg["From"] = EMAIL
-    msg["To"] = EMAIL
+        Raises:
+            smtplib.SMTPException or OSError if the message could not be sent
+        """
+        if self._server is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self.close()
 
-    server = smtplib.SMTP("smtp.gmail.com", 587)
-    server.starttls()
-    server.login(EMAIL, PASSWORD)
+        if self._server is None:
+            self._server = self._connect()
 
-    server.send_message(msg)
-    server.quit()
+        try:
+            self._server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self._server = None
+            self._server = self._connect()
+            self._server.send_message(msg)
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            # The server refused this message; the connection is still usable
+            self._last_used = time.monotonic()
+            raise
+        except Exception:
+            self.close()
+            raise
+
+        self._last_used = time.monotonic()
+
+    def close_if_idle(self) -> None:
+        """Close the connection if it has not been used for idle_timeout seconds."""
+        if self._server is not None and time.monotonic() - self._last_used > self.idle_timeout:
+            self.close()
+
+    def close(self) -> None:
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
+
+
+def send_order_email(message):
+    """
+    Send an order notification immediately over a one-off connection.
+    Orders don't call this; they go through the email outbox (see outbox_service).
+    """
+    sender = SMTPSender()
+    try:
+        sender.send(build_message(ORDER_EMAIL_TO, ORDER_EMAIL_SUBJECT, message))
+    finally:
+        sender.close()
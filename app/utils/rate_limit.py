@@ -0,0 +1,36 @@
+"""
+Per-key fixed-window rate limiter, kept in process memory.
+"""
+import threading
+import time
+from typing import Hashable
+
+from app.utils.lru import LRUCache
+
+
+class RateLimiter:
+    """
+    Allows at most `limit` calls per key in each window of `window` seconds.
+    Windows are kept in an LRUCache of max_keys entries, so memory stays
+    bounded; an evicted key simply starts a fresh window.
+    """
+
+    def __init__(self, limit: int, window: float, max_keys: int = 10000):
+        self.limit = limit
+        self.window = window
+        self.rejected = 0
+        self._windows = LRUCache(max_keys)
+        self._lock = threading.Lock()
+
+    def allow(self, key: Hashable) -> bool:
+        """Count a call for key; returns False if the key is over its limit."""
+        now = time.monotonic()
+        with self._lock:
+            started, calls = self._windows.get(key, (now, 0))
+            if now - started >= self.window:
+                started, calls = now, 0
+            if calls >= self.limit:
+                self.rejected += 1
+                return False
+            self._windows.set(key, (started, calls + 1))
+            return True
@@ -0,0 +1,127 @@
+"""
+Benchmark cart resolution: one query per line item, a single batched IN (...) query,
+and the catalog cache used by cart_service.get_cart_items.
+Run from the project root: python -m benchmarks.bench_cart_items
+"""
+import os
+import time
+
+# Keep benchmark carts and catalog stock checks out of the app database:
+# the catalog is loaded from the benchmark's own database below
+os.environ["CART_BACKEND"] = "memory"
+os.environ["CATALOG_STOCK_CHECK_INTERVAL"] = "inf"
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.core.database import Base  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.services import cart_service, catalog_cache  # noqa: E402
+
+CART_SIZES = [1, 10, 30, 60]
+ROUNDS = 200
+
+
+def get_cart_items_per_item(session: dict, db) -> tuple:
+    """The previous implementation: one SELECT per cart entry."""
+    cart = cart_service.get_cart_from_session(session)
+    cart_items = []
+    total = 0.0
+    for product_id_str, quantity in cart.items():
+        product = db.query(Product).filter(Product.id == int(product_id_str)).first()
+        if product:
+            subtotal = product.price * quantity
+            cart_items.append({"product": product, "quantity": quantity, "subtotal": subtotal})
+            total += subtotal
+    return cart_items, total
+
+
+def get_cart_items_batched(session: dict, db) -> tuple:
+    """Load every product in the cart with one IN (...) query."""
+    cart = cart_service.get_cart_from_session(session)
+    product_ids = [int(product_id_str) for product_id_str in cart]
+    products_by_id = {
+        product.id: product
+        for product in db.query(Product).filter(Product.id.in_(product_ids)).all()
+    }
+    cart_items = []
+    total = 0.0
+    for product_id_str, quantity in cart.items():
+        product = products_by_id.get(int(product_id_str))
+        if product:
+            subtotal = product.price * quantity
+            cart_items.append({"product": product, "quantity": quantity, "subtotal": subtotal})
+            total += subtotal
+    return cart_items, total
+
+
+def build_database():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all([
+        Product(
+            name=f"Product {i}", brand="Bench", category="protein", description="",
+            price=100 + i, weight="1kg", stock=100, image=f"/static/images/{i}.jpg"
+        )
+        for i in range(max(CART_SIZES))
+    ])
+    db.commit()
+    db.close()
+    return engine
+
+
+def measure(engine, resolver, cart_size: int) -> tuple[int, float]:
+    """Return (queries per call, mean latency in ms) for a resolver."""
+    queries = 0
+
+    def count_query(*args):
+        nonlocal queries
+        queries += 1
+
+    session = {"cart": {str(i + 1): 2 for i in range(cart_size)}}
+    event.listen(engine, "before_cursor_execute", count_query)
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        # Fresh session each round so the identity map doesn't hide queries
+        db = sessionmaker(bind=engine)()
+        resolver(session, db)
+        db.close()
+    elapsed = time.perf_counter() - start
+    event.remove(engine, "before_cursor_execute", count_query)
+
+    return queries // ROUNDS, elapsed / ROUNDS * 1000
+
+
+def main():
+    engine = build_database()
+
+    # Warm the catalog cache from the benchmark database
+    db = sessionmaker(bind=engine)()
+    catalog_cache.get_catalog(db)
+    db.close()
+
+    resolvers = [
+        ("per-item", get_cart_items_per_item),
+        ("batched", get_cart_items_batched),
+        ("cached", cart_service.get_cart_items),
+    ]
+
+    header = f"{'items':>6}"
+    for name, _ in resolvers:
+        header += f" | {name + ' queries':>16} | {name + ' ms':>11}"
+    print(header)
+    print("-" * len(header))
+    for size in CART_SIZES:
+        row = f"{size:>6}"
+        for _, resolver in resolvers:
+            queries, ms = measure(engine, resolver, size)
+            row += f" | {queries:>16} | {ms:>11.3f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
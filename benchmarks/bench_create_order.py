@@ -0,0 +1,84 @@
+"""
+Benchmark order creation: the ORM path (order_service.create_order) vs the
+Core bulk insert path (order_service.create_order_bulk), for small and large carts.
+Run from the project root: python -m benchmarks.bench_create_order
+"""
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import SQLITE_PRAGMAS
+from app.core.database import Base, sqlite_pragma_listener
+from app.models.product import Product
+from app.services import order_service
+
+ITEM_COUNTS = [1, 10, 50]
+ORDERS = 300
+
+CUSTOMER = {
+    "name": "Bench Customer", "email": "bench@example.com", "phone": "9999999999",
+    "address": "1 Bench Street", "city": "Pune", "state": "MH", "pincode": "411001",
+}
+PAYMENT = {"order_id": "order_bench", "payment_id": "pay_bench", "signature": "sig"}
+
+
+def build_engine(path: str):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", sqlite_pragma_listener(SQLITE_PRAGMAS))
+    Base.metadata.create_all(bind=engine)
+
+    db = sessionmaker(bind=engine)()
+    db.add_all([
+        Product(
+            name=f"Product {i}", brand="Bench", category="protein",
+            description="Synthetic product", price=100 + i, weight="1kg", stock=10_000_000,
+            image=f"/static/images/{i}.jpg"
+        )
+        for i in range(max(ITEM_COUNTS))
+    ])
+    db.commit()
+    db.close()
+    return engine
+
+
+def orders_per_second(Session, create, cart_items) -> float:
+    db = Session()
+    start = time.perf_counter()
+    for _ in range(ORDERS):
+        create(db, CUSTOMER, cart_items, PAYMENT)
+        db.expunge_all()
+    elapsed = time.perf_counter() - start
+    db.close()
+    return ORDERS / elapsed
+
+
+def main():
+    print(f"{ORDERS} orders per run, file database with the configured PRAGMA profile\n")
+    print(f"{'items':>5} | {'orm orders/s':>12} | {'bulk orders/s':>13} | {'speedup':>7}")
+    print("-" * 48)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(os.path.join(tmp, "bench.db"))
+        Session = sessionmaker(bind=engine)
+
+        db = Session()
+        products = db.query(Product).order_by(Product.id).all()
+        db.close()
+
+        for item_count in ITEM_COUNTS:
+            cart_items = [
+                {"product": product, "quantity": 2, "subtotal": product.price * 2}
+                for product in products[:item_count]
+            ]
+            orm = orders_per_second(Session, order_service.create_order, cart_items)
+            bulk = orders_per_second(Session, order_service.create_order_bulk, cart_items)
+            print(f"{item_count:>5} | {orm:>12.0f} | {bulk:>13.0f} | {bulk / orm:>6.1f}x")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark order notification delivery through the email outbox against
+debug_smtp_server.py: one SMTP connection per email (the old send_order_email)
+vs the outbox worker reusing one connection across batches. The debug server
+rejects some messages with a temporary error, so retries are exercised too.
+Run from the project root: python -m benchmarks.bench_outbox
+"""
+import os
+import socket
+import tempfile
+import time
+
+# Point the app at a throwaway database and the local debug SMTP server
+# before any app module reads its configuration
+_tmp = tempfile.TemporaryDirectory()
+with socket.socket() as _probe:
+    _probe.bind(("127.0.0.1", 0))
+    SMTP_PORT = _probe.getsockname()[1]
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}",
+    SMTP_HOST="127.0.0.1",
+    SMTP_PORT=str(SMTP_PORT),
+    SMTP_STARTTLS="false",
+    SMTP_USERNAME="",
+    ORDER_EMAIL_TO="orders@example.com",
+    ORDER_EMAIL_FROM="shop@example.com",
+    OUTBOX_BACKOFF_BASE="0.05",
+    OUTBOX_BACKOFF_MAX="0.5",
+)
+
+from sqlalchemy import func, select  # noqa: E402
+
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.models.outbox import OutboxMessage  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.services import order_service, outbox_service  # noqa: E402
+from app.utils.email_sender import SMTPSender, send_order_email  # noqa: E402
+from debug_smtp_server import DebugSMTPServer  # noqa: E402
+
+ORDERS = 300
+FAIL_RATE = 0.1
+
+CUSTOMER = {
+    "name": "Bench Customer", "email": "bench@example.com", "phone": "9999999999",
+    "address": "1 Bench Street", "city": "Pune", "state": "MH", "pincode": "411001",
+}
+PAYMENT = {"order_id": "order_bench", "payment_id": "pay_bench", "signature": "sig"}
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add_all([
+        Product(
+            name=f"Product {i}", brand="Bench", category="protein", description="Synthetic product",
+            price=100 + i, weight="1kg", stock=1_000_000, image=f"/static/images/{i}.jpg"
+        )
+        for i in range(5)
+    ])
+    db.commit()
+    products = db.query(Product).all()
+    cart_items = [{"product": p, "quantity": 1, "subtotal": p.price} for p in products]
+
+    # Placing orders only writes outbox rows; no SMTP on the checkout path
+    start = time.perf_counter()
+    for _ in range(ORDERS):
+        order_service.create_order_bulk(db, CUSTOMER, cart_items, PAYMENT)
+    order_elapsed = time.perf_counter() - start
+    db.close()
+    print(f"Placed {ORDERS} orders in {order_elapsed:.2f}s "
+          f"({order_elapsed / ORDERS * 1000:.2f} ms/order including the outbox write)\n")
+
+    # Old behaviour: a fresh connection per email
+    server = DebugSMTPServer("127.0.0.1", SMTP_PORT, quiet=True).start()
+    start = time.perf_counter()
+    for n in range(ORDERS):
+        send_order_email(f"Order #{n}")
+    direct_elapsed = time.perf_counter() - start
+    direct_connections = server.connections
+    server.stop()
+
+    # Outbox worker: one connection, batches, retries for temporary failures
+    server = DebugSMTPServer("127.0.0.1", SMTP_PORT, fail_rate=FAIL_RATE, quiet=True).start()
+    worker = outbox_service.OutboxWorker(sender=SMTPSender(), poll_interval=0.05)
+    start = time.perf_counter()
+    worker.start()
+    while True:
+        db = SessionLocal()
+        pending = db.scalar(
+            select(func.count(OutboxMessage.id)).where(OutboxMessage.status.in_(("pending", "sending")))
+        )
+        db.close()
+        if not pending or time.perf_counter() - start > 60:
+            break
+        time.sleep(0.05)
+    outbox_elapsed = time.perf_counter() - start
+    worker.stop()
+    server.stop()
+
+    db = SessionLocal()
+    statuses = dict(db.execute(
+        select(OutboxMessage.status, func.count(OutboxMessage.id)).group_by(OutboxMessage.status)
+    ).all())
+    db.close()
+
+    print(f"{'delivery':<28} | {'emails/sec':>10} | {'connections':>11}")
+    print("-" * 56)
+    print(f"{'connection per email':<28} | {ORDERS / direct_elapsed:>10.0f} | {direct_connections:>11}")
+    print(f"{'outbox worker':<28} | {ORDERS / outbox_elapsed:>10.0f} | {server.connections:>11}")
+    print(f"\nOutbox: {statuses} — {worker.failed} temporary failures retried "
+          f"(debug server fail rate {FAIL_RATE:.0%}), {len(server.messages)} emails received")
+
+    ok = statuses.get("sent") == ORDERS and len(server.messages) == ORDERS
+    print(f"{'✅' if ok else '❌'} every order notification delivered exactly once")
+    engine.dispose()
+    _tmp.cleanup()
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+Benchmark payment reconciliation (reconciliation_service.reconcile) against
+fake_razorpay_server.py answering with GATEWAY_LATENCY seconds of delay.
+ORDERS unsettled Razorpay orders get a mix of captured, failed, failed then
+retried, authorized (not yet captured) and missing payments, and some are old
+enough to expire; authorized ones must never be cancelled.
+
+Compares gateway concurrency 1 (one order at a time) with concurrent fetches,
+then checks that every order ends in the right state, that a run interrupted
+after a few chunks resumes from its checkpoint, that a run with gateway errors
+leaves those orders for the next run, that reconciling again changes
+nothing (no double stock release), and that a payment captured after its
+order expired is recorded for refund without confirming the cancelled order.
+Run from the project root: python -m benchmarks.bench_reconcile
+"""
+import os
+import random
+import socket
+import tempfile
+from datetime import datetime, timedelta
+
+# Point the app at a throwaway database and the fake gateway
+# before any app module reads its configuration
+_tmp = tempfile.TemporaryDirectory()
+with socket.socket() as _probe:
+    _probe.bind(("127.0.0.1", 0))
+    GATEWAY_PORT = _probe.getsockname()[1]
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}",
+    RAZORPAY_KEY_ID="rzp_test_bench",
+    RAZORPAY_KEY_SECRET="bench_secret",
+    RAZORPAY_BASE_URL=f"http://127.0.0.1:{GATEWAY_PORT}",
+    ORDER_EMAIL_TO="",
+    SMTP_USERNAME="",
+)
+
+from sqlalchemy import select, update  # noqa: E402
+
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.models.order import Order  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.services import order_service, payment_service  # noqa: E402
+from app.services.reconciliation_service import reconcile  # noqa: E402
+from fake_razorpay_server import FakeRazorpayServer  # noqa: E402
+
+ORDERS = 1000
+GATEWAY_LATENCY = 0.02
+CHUNK_SIZE = 200
+EXPIRE_AFTER = 24 * 60  # minutes
+STOCK = 1_000_000
+CHECKPOINT = os.path.join(_tmp.name, "reconcile_checkpoint.json")
+
+CUSTOMER = {
+    "name": "Bench Customer", "email": "bench@example.com", "phone": "9999999999",
+    "address": "1 Bench Street", "city": "Pune", "state": "MH", "pincode": "411001",
+}
+
+
+def seed(gateway: FakeRazorpayServer) -> dict:
+    """Create the orders and their gateway payments; returns {order id: expected (payment_status, order_status)}."""
+    rng = random.Random(42)
+    db = SessionLocal()
+    db.add_all([
+        Product(
+            name=f"Product {i}", brand="Bench", category="protein", description="Synthetic product",
+            price=100 + i, weight="1kg", stock=STOCK, image=f"/static/images/{i}.jpg"
+        )
+        for i in range(3)
+    ])
+    db.commit()
+    cart_items = [{"product": p, "quantity": 1, "subtotal": p.price} for p in db.query(Product).all()]
+    amount = sum(item["subtotal"] for item in cart_items)
+
+    expected = {}
+    now = datetime.utcnow()
+    for _ in range(ORDERS):
+        _, razorpay_order = gateway.create_order({"amount": int(amount * 100)})
+        razorpay_order_id = razorpay_order["id"]
+        order = order_service.create_order_bulk(
+            db, CUSTOMER, cart_items, {"order_id": razorpay_order_id, "payment_id": None, "signature": None}
+        )
+
+        kind = rng.random()
+        if kind < 0.60:
+            attempts = ["captured"]
+        elif kind < 0.70:
+            attempts = ["failed"]
+        elif kind < 0.75:
+            attempts = ["failed", "captured"]
+        elif kind < 0.80:
+            attempts = ["authorized"]
+        else:
+            attempts = []
+        for status in attempts:
+            gateway.pay_order({"status": status}, razorpay_order_id)
+
+        expired = rng.random() < 0.3
+        age = timedelta(minutes=EXPIRE_AFTER * 2 if expired else 60)
+        db.execute(update(Order).where(Order.id == order.id).values(created_at=now - age))
+
+        if "captured" in attempts:
+            expected[order.id] = ("success", "confirmed")
+        elif "authorized" in attempts:
+            expected[order.id] = ("pending", "pending")
+        elif expired:
+            expected[order.id] = ("failed" if attempts else "pending", "cancelled")
+        else:
+            expected[order.id] = ("failed" if attempts else "pending", "pending")
+    db.commit()
+    db.close()
+    return expected
+
+
+def reset() -> None:
+    db = SessionLocal()
+    db.execute(update(Order).values(payment_status="pending", order_status="pending", razorpay_payment_id=None))
+    db.execute(update(Product).values(stock=STOCK - ORDERS))
+    db.commit()
+    db.close()
+
+
+def check(expected: dict) -> bool:
+    db = SessionLocal()
+    states = {row.id: (row.payment_status, row.order_status) for row in db.execute(
+        select(Order.id, Order.payment_status, Order.order_status)
+    )}
+    stocks = db.scalars(select(Product.stock)).all()
+    db.close()
+    held = sum(1 for _, order_status in expected.values() if order_status != "cancelled")
+    return states == expected and all(stock == STOCK - held for stock in stocks)
+
+
+def main():
+    gateway = FakeRazorpayServer(
+        port=GATEWAY_PORT, key_secret="bench_secret", latency=GATEWAY_LATENCY, quiet=True
+    ).start()
+    Base.metadata.create_all(bind=engine)
+    expected = seed(gateway)
+
+    counts = {"paid": 0, "failed": 0, "cancelled": 0, "unchanged": 0}
+    for payment_status, order_status in expected.values():
+        if order_status == "cancelled":
+            counts["cancelled"] += 1
+        elif payment_status == "success":
+            counts["paid"] += 1
+        elif payment_status == "failed":
+            counts["failed"] += 1
+        else:
+            counts["unchanged"] += 1
+    print(f"{ORDERS} unsettled orders ({', '.join(f'{v} {k}' for k, v in counts.items())} expected), "
+          f"{GATEWAY_LATENCY * 1000:.0f} ms gateway latency, chunks of {CHUNK_SIZE}\n")
+
+    ok = True
+    results = {}
+    for concurrency in (1, 4, payment_service.RAZORPAY_EXECUTOR_WORKERS):
+        reset()
+        report = reconcile(CHECKPOINT, chunk_size=CHUNK_SIZE, concurrency=concurrency, expire_after=EXPIRE_AFTER)
+        results[concurrency] = report
+        ok &= check(expected) and report.complete and not os.path.exists(CHECKPOINT)
+        ok &= all(getattr(report, key) == value for key, value in counts.items())
+
+    print(f"{'concurrency':>11} | {'orders/s':>8} | {'total s':>7} | {'gateway s':>9} | {'database s':>10} | {'speedup':>7}")
+    print("-" * 68)
+    baseline = results[1].elapsed
+    for concurrency, report in results.items():
+        print(f"{concurrency:>11} | {report.orders_per_second:>8.0f} | {report.elapsed:>7.2f} | "
+              f"{report.gateway_seconds:>9.2f} | {report.db_seconds:>10.2f} | {baseline / report.elapsed:>6.1f}x")
+
+    # Interrupted after two chunks, then resumed from the checkpoint
+    reset()
+    first = reconcile(CHECKPOINT, chunk_size=CHUNK_SIZE, expire_after=EXPIRE_AFTER, max_chunks=2)
+    resumable = not first.complete and os.path.exists(CHECKPOINT)
+    second = reconcile(CHECKPOINT, chunk_size=CHUNK_SIZE, expire_after=EXPIRE_AFTER)
+    resumed = (resumable and second.complete and second.resumed_after == first.last_order_id
+               and first.checked + second.checked == ORDERS and check(expected))
+    print(f"\n{'✅' if resumed else '❌'} interrupted after {first.checked} orders, "
+          f"resumed after order #{second.resumed_after} and checked the other {second.checked}")
+
+    # Gateway errors leave orders for the next run
+    reset()
+    gateway.fail_rate = 0.2
+    flaky = reconcile(CHECKPOINT, chunk_size=CHUNK_SIZE, expire_after=EXPIRE_AFTER)
+    gateway.fail_rate = 0.0
+    retry = reconcile(CHECKPOINT, chunk_size=CHUNK_SIZE, expire_after=EXPIRE_AFTER)
+    retried = flaky.errors > 0 and retry.errors == 0 and check(expected)
+    print(f"{'✅' if retried else '❌'} {flaky.errors} gateway errors left for the next run, which settled them")
+
+    # Nothing is applied twice
+    again = reconcile(CHECKPOINT, chunk_size=CHUNK_SIZE, expire_after=EXPIRE_AFTER, restart=True)
+    idempotent = again.paid == again.failed == again.cancelled == 0 and check(expected)
+    print(f"{'✅' if idempotent else '❌'} reconciling again changed nothing and released no stock twice")
+
+    # A customer pays after their order expired: the capture (applied as the webhook
+    # consumer would) must not confirm the cancelled order, whose stock is already released
+    late_id = next(order_id for order_id, (_, order_status) in expected.items() if order_status == "cancelled")
+    db = SessionLocal()
+    late_razorpay_id = db.scalar(select(Order.razorpay_order_id).where(Order.id == late_id))
+    stocks_before = db.scalars(select(Product.stock)).all()
+    payment = gateway.pay_order({"status": "captured"}, late_razorpay_id)[1]["payment"]
+    newly_paid = order_service.mark_orders_paid(db, {late_razorpay_id: payment["id"]})
+    db.commit()
+    late_state = db.execute(select(Order.payment_status, Order.order_status).where(Order.id == late_id)).one()
+    late_ok = (not newly_paid and tuple(late_state) == (order_service.PAID_AFTER_CANCEL, "cancelled")
+               and db.scalars(select(Product.stock)).all() == stocks_before)
+    db.close()
+    after_late = reconcile(CHECKPOINT, chunk_size=CHUNK_SIZE, expire_after=EXPIRE_AFTER, restart=True)
+    late_ok &= after_late.paid == after_late.cancelled == 0
+    print(f"{'✅' if late_ok else '❌'} a payment captured after its order expired was recorded as "
+          f"{late_state[0]} and the cancelled order kept its stock released")
+
+    print(f"{'✅' if ok else '❌'} every run settled every order correctly")
+
+    payment_service.shutdown()
+    gateway.stop()
+    engine.dispose()
+    _tmp.cleanup()
+    if not (ok and resumed and retried and idempotent and late_ok):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark product search backends on a synthetic catalog: SQL ILIKE scan,
+SQLite FTS5 with bm25 ranking, and the in-memory inverted index.
+Run from the project root: python -m benchmarks.bench_search
+"""
+import random
+import statistics
+import time
+
+from sqlalchemy import create_engine, or_
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models.product import Product
+from app.services.catalog_cache import load_catalog
+from app.services import search_engine
+from app.services.search_engine import SearchIndex
+
+CATALOG_SIZE = 50_000
+ROUNDS = 50
+
+BRANDS = ["Optimum Nutrition", "MuscleBlaze", "Avvatar", "Big Muscles", "Alpha Labz",
+          "Pintola", "Yogabar", "Saffola", "Quaker", "MyFitness", "Alpino", "Dymatize"]
+CATEGORIES = ["protein", "oats", "muesli", "peanut"]
+WORDS = ["whey", "isolate", "gold", "standard", "chocolate", "vanilla", "crunchy", "organic",
+         "rolled", "steel", "cut", "fruit", "nut", "creatine", "gainer", "hydrolyzed",
+         "performance", "natural", "premium", "blend", "recovery", "energy", "fiber", "butter"]
+QUERIES = ["whey", "gold", "pintola", "choco", "organic peanut", "muscleblaze whey",
+           "creat", "steel cut oats", "vanilla isolate", "zzz"]
+
+
+def synthetic_products(count: int) -> list:
+    rng = random.Random(42)
+    products = []
+    for i in range(1, count + 1):
+        products.append(Product(
+            id=i,
+            name=" ".join(rng.sample(WORDS, 3)).title(),
+            brand=rng.choice(BRANDS),
+            category=rng.choice(CATEGORIES),
+            description=" ".join(rng.choices(WORDS, k=12)),
+            price=rng.randint(199, 5999),
+            weight=rng.choice(["500g", "1kg", "2kg"]),
+            stock=rng.randint(0, 100),
+            image=f"/static/images/{i}.jpg",
+        ))
+    return products
+
+
+def percentiles(samples: list) -> tuple[float, float]:
+    cuts = statistics.quantiles(samples, n=100)
+    return cuts[49] * 1000, cuts[98] * 1000
+
+
+def time_queries(run) -> dict:
+    results = {}
+    for query in QUERIES:
+        samples = []
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            run(query)
+            samples.append(time.perf_counter() - start)
+        results[query] = percentiles(samples)
+    return results
+
+
+def main():
+    print(f"Building synthetic catalog of {CATALOG_SIZE} products...")
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all(synthetic_products(CATALOG_SIZE))
+    db.commit()
+
+    catalog = load_catalog(db)
+
+    start = time.perf_counter()
+    index = SearchIndex()
+    index.sync(catalog)
+    print(f"Memory index built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    search_engine.init_fts(engine)
+    print(f"FTS5 index built in {(time.perf_counter() - start) * 1000:.0f} ms\n")
+
+    def ilike(query):
+        db.expunge_all()
+        return db.query(Product).filter(
+            or_(Product.name.ilike(f"%{query}%"), Product.brand.ilike(f"%{query}%"))
+        ).all()
+
+    def fts5(query):
+        # Same statement search_fts runs; rows are then mapped through the catalog
+        match = search_engine.fts_match_expression(query)
+        product_ids = db.execute(search_engine.FTS_QUERY, {"match": match, "limit": -1}).scalars()
+        return [catalog.by_id[product_id] for product_id in product_ids]
+
+    backends = [("ILIKE", time_queries(ilike)), ("FTS5", time_queries(fts5)), ("index", time_queries(index.search))]
+
+    header = f"{'query':<20}"
+    for name, _ in backends:
+        header += f" | {name + ' p50':>10} | {name + ' p99':>10}"
+    print(header)
+    print("-" * len(header))
+    for query in QUERIES:
+        row = f"{query:<20}"
+        for _, results in backends:
+            p50, p99 = results[query]
+            row += f" | {p50:>8.2f}ms | {p99:>8.2f}ms"
+        print(row)
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
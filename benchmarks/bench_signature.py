@@ -0,0 +1,89 @@
+"""
+Benchmark Razorpay payment signature verification: the SDK path
+(razorpay_client.utility.verify_payment_signature with a params dict) vs the
+local SignatureVerifier, one call at a time and through the batch API.
+Both must agree on every valid, tampered and malformed signature.
+Run from the project root: python -m benchmarks.bench_signature
+"""
+import hashlib
+import hmac
+import random
+import time
+
+import razorpay
+
+from app.services.payment_service import SignatureVerifier
+
+SECRET = "bench_key_secret_1234567890"
+PAYMENTS = 20_000
+ROUNDS = 5
+
+
+def sign(order_id: str, payment_id: str) -> str:
+    return hmac.new(SECRET.encode(), f"{order_id}|{payment_id}".encode(), hashlib.sha256).hexdigest()
+
+
+def sample_payments(count: int) -> list:
+    rng = random.Random(42)
+    payments = []
+    for n in range(count):
+        order_id, payment_id = f"order_{n:014d}", f"pay_{n:014d}"
+        signature = sign(order_id, payment_id)
+        kind = rng.random()
+        if kind < 0.1:
+            signature = signature[:-1] + ("0" if signature[-1] != "0" else "1")  # Tampered
+        elif kind < 0.12:
+            signature = "not-a-signature"  # Malformed
+        payments.append((order_id, payment_id, signature))
+    return payments
+
+
+def sdk_verify(client: razorpay.Client, order_id: str, payment_id: str, signature: str) -> bool:
+    try:
+        client.utility.verify_payment_signature({
+            "razorpay_order_id": order_id,
+            "razorpay_payment_id": payment_id,
+            "razorpay_signature": signature,
+        })
+        return True
+    except razorpay.errors.SignatureVerificationError:
+        return False
+
+
+def best_of(rounds: int, function) -> tuple:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    payments = sample_payments(PAYMENTS)
+    client = razorpay.Client(auth=("rzp_test_bench", SECRET))
+    verifier = SignatureVerifier(SECRET)
+
+    timings = {
+        "SDK utility": best_of(ROUNDS, lambda: [sdk_verify(client, *payment) for payment in payments]),
+        "SignatureVerifier.verify": best_of(ROUNDS, lambda: [verifier.verify(*payment) for payment in payments]),
+        "SignatureVerifier.verify_many": best_of(ROUNDS, lambda: verifier.verify_many(payments)),
+    }
+
+    baseline = timings["SDK utility"][0]
+    print(f"{PAYMENTS} signatures, best of {ROUNDS} rounds\n")
+    print(f"{'verifier':<30} | {'µs/signature':>12} | {'speedup':>7}")
+    print("-" * 56)
+    for label, (elapsed, _) in timings.items():
+        print(f"{label:<30} | {elapsed / PAYMENTS * 1e6:>12.2f} | {baseline / elapsed:>6.1f}x")
+
+    expected = timings["SDK utility"][1]
+    ok = all(result == expected for _, result in timings.values())
+    print(f"\n{'✅' if ok else '❌'} all verifiers agree "
+          f"({sum(expected)} valid, {PAYMENTS - sum(expected)} rejected)")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark catalog read throughput while checkout writes are running,
+with SQLite defaults vs the PRAGMA profile from app/core/config.py.
+Run from the project root: python -m benchmarks.bench_sqlite_pragmas
+"""
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import SQLITE_PRAGMAS
+from app.core.database import Base, sqlite_pragma_listener
+from app.models.product import Product
+from app.services import order_service
+
+READERS = 4
+DURATION = 5.0
+CATEGORIES = ["protein", "oats", "muesli", "peanut"]
+
+CUSTOMER = {
+    "name": "Bench Customer", "email": "bench@example.com", "phone": "9999999999",
+    "address": "1 Bench Street", "city": "Pune", "state": "MH", "pincode": "411001",
+}
+
+
+def build_engine(path: str, pragmas: dict):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    if pragmas:
+        event.listen(engine, "connect", sqlite_pragma_listener(pragmas))
+    Base.metadata.create_all(bind=engine)
+
+    db = sessionmaker(bind=engine)()
+    db.add_all([
+        Product(
+            name=f"Product {i}", brand="Bench", category=CATEGORIES[i % len(CATEGORIES)],
+            description="Synthetic product", price=100 + i, weight="1kg", stock=10_000_000,
+            image=f"/static/images/{i}.jpg"
+        )
+        for i in range(2000)
+    ])
+    db.commit()
+    db.close()
+    return engine
+
+
+def run_profile(name: str, pragmas: dict) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(os.path.join(tmp, "bench.db"), pragmas)
+        Session = sessionmaker(bind=engine)
+        stop = threading.Event()
+        reads = [0] * READERS
+        orders = [0]
+        errors = [0]
+
+        def reader(slot):
+            i = 0
+            while not stop.is_set():
+                try:
+                    with engine.connect() as conn:
+                        conn.execute(
+                            text("SELECT * FROM products WHERE category = :category"),
+                            {"category": CATEGORIES[i % len(CATEGORIES)]}
+                        ).fetchall()
+                    reads[slot] += 1
+                except Exception:
+                    errors[0] += 1
+                i += 1
+
+        def writer():
+            db = Session()
+            products = db.query(Product).limit(10).all()
+            cart_items = [{"product": p, "quantity": 1, "subtotal": p.price} for p in products]
+            while not stop.is_set():
+                try:
+                    order_service.create_order(db, CUSTOMER, cart_items, {"payment_id": "pay_bench"})
+                    orders[0] += 1
+                except Exception:
+                    db.rollback()
+                    errors[0] += 1
+            db.close()
+
+        threads = [threading.Thread(target=reader, args=(slot,)) for slot in range(READERS)]
+        threads.append(threading.Thread(target=writer))
+        for thread in threads:
+            thread.start()
+        time.sleep(DURATION)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    print(f"{name:<10} | {sum(reads) / DURATION:>12.0f} | {orders[0] / DURATION:>10.0f} | {errors[0]:>6}")
+
+
+def main():
+    print(f"{READERS} readers + 1 order writer for {DURATION:.0f}s per profile")
+    print(f"Tuned profile: {SQLITE_PRAGMAS}\n")
+    print(f"{'profile':<10} | {'reads/sec':>12} | {'orders/sec':>10} | {'errors':>6}")
+    print("-" * 48)
+    run_profile("defaults", {})
+    run_profile("tuned", SQLITE_PRAGMAS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark cold-start latency of the first page requests after a worker starts,
+depending on the template bytecode cache and the startup precompile step.
+Each run is a fresh Python process using a copy of protein_perks.db.
+Run from the project root: python -m benchmarks.bench_template_cold_start
+"""
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RUNS = 5
+PAGES = ["/", "/products", "/cart", "/search?q=whey"]
+
+# Runs inside the child process: start the app, then time the first request to each page
+CHILD = """
+import json, time
+start = time.perf_counter()
+from fastapi.testclient import TestClient
+from app.main import app
+timings = {}
+with TestClient(app) as client:
+    timings["startup"] = time.perf_counter() - start
+    for page in PAGES:
+        t = time.perf_counter()
+        client.get(page)
+        timings[page] = time.perf_counter() - t
+print("TIMINGS " + json.dumps(timings))
+"""
+
+SCENARIOS = [
+    # (name, precompile at startup, reuse the bytecode cache across runs)
+    ("no bytecode cache, compile on first request", False, False),
+    ("bytecode cache, compile on first request", False, True),
+    ("bytecode cache + precompile at startup", True, True),
+]
+
+
+def run_child(env: dict) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", f"PAGES = {PAGES!r}\n" + CHILD],
+        env=env, capture_output=True, text=True, check=True
+    )
+    line = next(line for line in result.stdout.splitlines() if line.startswith("TIMINGS "))
+    return json.loads(line[len("TIMINGS "):])
+
+
+def main():
+    print(f"Median of {RUNS} fresh processes per scenario (ms)\n")
+    columns = ["startup"] + PAGES
+    print(f"{'scenario':<46} | " + " | ".join(f"{column:>14}" for column in columns))
+    print("-" * (49 + 17 * len(columns)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        shutil.copy("protein_perks.db", db_path)
+
+        for name, precompile, reuse_cache in SCENARIOS:
+            cache_dir = os.path.join(tmp, f"jinja-{name}")
+            if reuse_cache:
+                # Fill the bytecode cache the way a previous worker would have
+                os.makedirs(cache_dir, exist_ok=True)
+
+            samples = []
+            for _ in range(RUNS + (1 if reuse_cache else 0)):
+                if not reuse_cache:
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+                env = dict(
+                    os.environ,
+                    DATABASE_URL=f"sqlite:///{db_path}",
+                    TEMPLATE_CACHE_DIR=cache_dir,
+                    TEMPLATE_PRECOMPILE="true" if precompile else "false",
+                )
+                samples.append(run_child(env))
+            if reuse_cache:
+                # The first run only warmed the cache
+                samples = samples[1:]
+
+            medians = [statistics.median(sample[column] for sample in samples) * 1000 for column in columns]
+            print(f"{name:<46} | " + " | ".join(f"{value:>14.1f}" for value in medians))
+
+
+if __name__ == "__main__":
+    main()
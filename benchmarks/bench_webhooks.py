@@ -0,0 +1,224 @@
+"""
+Benchmark Razorpay webhook ingestion: a burst of signed webhooks (captured,
+paid, failed and redelivered events for ORDERS pending orders) is posted to
+/payment/webhook while another process keeps placing orders. Some orders are
+cancelled (expired) before their payment arrives; those must be recorded as
+paid after cancel, not confirmed.
+
+Compares applying events one transaction each (batch size 1, like updating
+the order inside the webhook request) with the consumer's batched
+transactions: webhook acknowledgement latency, time until every event is
+applied, and the latency of checkouts placed while the burst arrives.
+Run from the project root: python -m benchmarks.bench_webhooks
+"""
+import asyncio
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+
+# Point the app at a throwaway database before any app module reads its configuration
+_tmp = tempfile.TemporaryDirectory()
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}",
+    RAZORPAY_WEBHOOK_SECRET="bench_webhook_secret",
+    ORDER_EMAIL_TO="",
+    SMTP_USERNAME="",
+)
+
+import httpx  # noqa: E402
+from sqlalchemy import delete, func, select, update  # noqa: E402
+
+from app.core.database import Base, SessionLocal, async_engine, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.order import Order  # noqa: E402
+from app.models.payment_event import PaymentEvent, PaymentEventCursor  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.services import order_service, webhook_service  # noqa: E402
+from fake_razorpay_server import sign_webhook, webhook_event  # noqa: E402
+
+ORDERS = 1000
+FAILED_FIRST = 0.1  # Share of orders whose first payment attempt fails
+REDELIVERED = 0.2  # Share of deliveries Razorpay sends twice
+CANCELLED_EVERY = 20  # Every Nth order expires before its payment is captured
+CONCURRENCY = 100
+
+CUSTOMER = {
+    "name": "Bench Customer", "email": "bench@example.com", "phone": "9999999999",
+    "address": "1 Bench Street", "city": "Pune", "state": "MH", "pincode": "411001",
+}
+
+
+def percentile(values: list, fraction: float) -> float:
+    values = sorted(values)
+    return values[max(0, int(len(values) * fraction) - 1)] if values else 0.0
+
+
+def build_deliveries(razorpay_order_ids: list) -> tuple:
+    rng = random.Random(42)
+    deliveries = []
+    for n, order_id in enumerate(razorpay_order_ids):
+        if rng.random() < FAILED_FIRST:
+            failed = {"id": f"pay_failed_{n}", "order_id": order_id, "status": "failed"}
+            deliveries.append(webhook_event("payment.failed", failed))
+        payment = {"id": f"pay_{n}", "order_id": order_id, "status": "captured"}
+        order = {"id": order_id, "status": "paid"}
+        deliveries.append(webhook_event("payment.captured", payment))
+        deliveries.append(webhook_event("order.paid", payment, order))
+    unique = len(deliveries)
+    deliveries += rng.sample(deliveries, int(unique * REDELIVERED))
+    rng.shuffle(deliveries)
+    return deliveries, unique
+
+
+async def post_webhooks(deliveries: list) -> list:
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://shop.test") as client:
+        async def post(event_id: str, body: bytes) -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.post("/payment/webhook", content=body, headers={
+                    "X-Razorpay-Event-Id": event_id,
+                    "X-Razorpay-Signature": sign_webhook(body, "bench_webhook_secret"),
+                })
+                latencies.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.text
+
+        await asyncio.gather(*(post(event_id, body) for event_id, body in deliveries))
+    await async_engine.dispose()
+    return latencies
+
+
+def place_orders(cart_items: list, stop, results) -> None:
+    # Runs in a separate process, like another app worker, so it competes
+    # for the database and not for this process's GIL
+    engine.dispose(close=False)
+    latencies = []
+    db = SessionLocal()
+    while not stop.is_set():
+        start = time.monotonic()
+        order_service.create_order_bulk(
+            db, CUSTOMER, cart_items, {"order_id": None, "payment_id": "pay_manual", "signature": None}
+        )
+        latencies.append((start, time.monotonic() - start))
+        time.sleep(0.005)
+    db.close()
+    results.put(latencies)
+
+
+def reset(razorpay_order_ids: list) -> None:
+    db = SessionLocal()
+    db.execute(delete(PaymentEvent))
+    db.execute(delete(PaymentEventCursor))
+    db.execute(
+        update(Order)
+        .where(Order.razorpay_order_id.in_(razorpay_order_ids))
+        .values(payment_status="pending", order_status="pending", razorpay_payment_id=None)
+    )
+    expired = db.scalars(select(Order.id).where(
+        Order.razorpay_order_id.in_(razorpay_order_ids[::CANCELLED_EVERY])
+    )).all()
+    order_service.cancel_unpaid_orders(db, expired)
+    db.commit()
+    db.close()
+
+
+def run(batch_size: int, deliveries: list, unique: int, cart_items: list) -> dict:
+    consumer = webhook_service.WebhookConsumer(batch_size=batch_size, poll_interval=0.005)
+    context = multiprocessing.get_context("fork")
+    stop = context.Event()
+    checkout_results = context.Queue()
+    writer = context.Process(target=place_orders, args=(cart_items, stop, checkout_results))
+
+    writer.start()
+    consumer.start()
+    start = time.monotonic()
+    ack_latencies = asyncio.run(post_webhooks(deliveries))
+    acked = time.monotonic()
+    while consumer.events < unique and time.monotonic() - start < 120:
+        time.sleep(0.005)
+    applied = time.monotonic() - start
+    consumer.stop()
+    stop.set()
+    # Checkouts placed while the burst arrived: the same load in every run
+    checkout_latencies = [latency for started, latency in checkout_results.get() if start <= started < acked]
+    writer.join()
+
+    db = SessionLocal()
+    paid = db.scalar(select(func.count(Order.id)).where(
+        Order.razorpay_order_id.is_not(None), Order.payment_status == "success", Order.order_status == "confirmed"
+    ))
+    paid_after_cancel = db.scalar(select(func.count(Order.id)).where(
+        Order.payment_status == order_service.PAID_AFTER_CANCEL, Order.order_status == "cancelled"
+    ))
+    stored = db.scalar(select(func.count(PaymentEvent.id)))
+    db.close()
+    expired = len(range(0, ORDERS, CANCELLED_EVERY))
+    return {
+        "ack_p50": statistics.median(ack_latencies),
+        "ack_p99": percentile(ack_latencies, 0.99),
+        "applied": applied,
+        "transactions": consumer.batches,
+        "checkout_p50": statistics.median(checkout_latencies),
+        "checkout_p99": percentile(checkout_latencies, 0.99),
+        "ok": (paid == ORDERS - expired and paid_after_cancel == expired
+               and stored == unique and consumer.events == unique),
+    }
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add_all([
+        Product(
+            name=f"Product {i}", brand="Bench", category="protein", description="Synthetic product",
+            price=100 + i, weight="1kg", stock=10_000_000, image=f"/static/images/{i}.jpg"
+        )
+        for i in range(3)
+    ])
+    db.commit()
+    products = db.query(Product).all()
+    cart_items = [{"product": p, "quantity": 1, "subtotal": p.price} for p in products]
+
+    razorpay_order_ids = [f"order_bench_{n:06d}" for n in range(ORDERS)]
+    for order_id in razorpay_order_ids:
+        order_service.create_order_bulk(db, CUSTOMER, cart_items, {"order_id": order_id, "payment_id": None})
+    # The checkout thread uses its own session; detached products keep their loaded values
+    cart_items = [{"product": p, "quantity": 1, "subtotal": p.price} for p in db.query(Product).all()]
+    db.expunge_all()
+    db.close()
+
+    deliveries, unique = build_deliveries(razorpay_order_ids)
+    print(f"{len(deliveries)} webhook deliveries ({unique} unique events) for {ORDERS} pending orders, "
+          f"{CONCURRENCY} in flight, with checkouts running alongside\n")
+
+    results = {}
+    for label, batch_size in (("one event per transaction", 1),
+                              (f"batches of {webhook_service.WEBHOOK_BATCH_SIZE}", webhook_service.WEBHOOK_BATCH_SIZE)):
+        reset(razorpay_order_ids)
+        results[label] = run(batch_size, deliveries, unique, cart_items)
+
+    print(f"{'consumer':<26} | {'ack p50/p99 ms':>14} | {'all applied s':>13} | {'transactions':>12} | "
+          f"{'checkout p50/p99 ms':>19}")
+    print("-" * 98)
+    for label, r in results.items():
+        print(f"{label:<26} | {r['ack_p50'] * 1000:>6.1f}/{r['ack_p99'] * 1000:<7.1f} | {r['applied']:>13.2f} | "
+              f"{r['transactions']:>12} | {r['checkout_p50'] * 1000:>8.1f}/{r['checkout_p99'] * 1000:<10.1f}")
+
+    engine.dispose()
+    _tmp.cleanup()
+
+    ok = all(r["ok"] for r in results.values())
+    print(f"\n{'✅' if ok else '❌'} every order paid (expired ones as paid after cancel), "
+          f"every event stored and applied exactly once, duplicates dropped")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
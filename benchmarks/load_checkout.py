@@ -0,0 +1,173 @@
+"""
+Load test for Razorpay order creation: CHECKOUTS concurrent shoppers each add
+a product to their cart and POST /checkout/create-order, against
+fake_razorpay_server.py answering with GATEWAY_LATENCY seconds of delay.
+
+Compares the old approach (the synchronous SDK call made directly in the async
+handler) with the gateway thread pool (create_razorpay_order_async), and
+reports request latency, throughput and how long the event loop was stalled.
+Each checkout also saves its pending order, so database work is included.
+Run from the project root: python -m benchmarks.load_checkout
+"""
+import asyncio
+import os
+import socket
+import statistics
+import tempfile
+import time
+
+# Point the app at a throwaway database and the fake gateway
+# before any app module reads its configuration
+_tmp = tempfile.TemporaryDirectory()
+with socket.socket() as _probe:
+    _probe.bind(("127.0.0.1", 0))
+    GATEWAY_PORT = _probe.getsockname()[1]
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{os.path.join(_tmp.name, 'bench.db')}",
+    CART_BACKEND="memory",
+    # every simulated customer shares the transport's client address
+    CHECKOUT_RATE_LIMIT="1000000",
+    RAZORPAY_KEY_ID="rzp_test_bench",
+    RAZORPAY_KEY_SECRET="bench_secret",
+    RAZORPAY_BASE_URL=f"http://127.0.0.1:{GATEWAY_PORT}",
+    ORDER_EMAIL_TO="",
+    SMTP_USERNAME="",
+)
+
+import httpx  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+
+from app.core.database import Base, SessionLocal, async_engine, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.order import Order  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.services import payment_service  # noqa: E402
+from fake_razorpay_server import FakeRazorpayServer  # noqa: E402
+
+CHECKOUTS = 500
+GATEWAY_LATENCY = 0.05
+TICK = 0.01
+
+CUSTOMER = {
+    "name": "Load Customer", "email": "load@example.com", "phone": "9999999999",
+    "address": "1 Load Street", "city": "Pune", "state": "MH", "pincode": "411001",
+}
+
+
+async def _blocking_create_order(amount, currency="INR", receipt=None):
+    # The pre-thread-pool behaviour: the SDK call runs on the event loop
+    return payment_service.create_razorpay_order(amount, currency, receipt)
+
+
+async def fill_cart(client: httpx.AsyncClient, product_id: int) -> None:
+    response = await client.post("/cart/add", data={"product_id": product_id, "quantity": 1})
+    assert response.json()["success"], response.text
+
+
+async def create_order(client: httpx.AsyncClient) -> tuple:
+    start = time.perf_counter()
+    response = await client.post("/checkout/create-order", data=CUSTOMER)
+    return time.perf_counter() - start, response.status_code == 200
+
+
+async def watch_loop(stop: asyncio.Event, lags: list) -> None:
+    # How late a TICK-second sleep wakes up = how long the loop was blocked
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def run(product_ids: list) -> dict:
+    # One client (cookie jar, so one cart) per shopper; carts are filled first
+    # Unhandled errors (e.g. database pool timeouts) become 500s, as behind a real server
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    clients = [httpx.AsyncClient(transport=transport, base_url="http://shop.test") for _ in range(CHECKOUTS)]
+    for n, client in enumerate(clients):
+        await fill_cart(client, product_ids[n % len(product_ids)])
+
+    stop = asyncio.Event()
+    lags = []
+    watcher = asyncio.create_task(watch_loop(stop, lags))
+    start = time.perf_counter()
+    results = await asyncio.gather(*(create_order(client) for client in clients))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await watcher
+
+    for client in clients:
+        await client.aclose()
+    # Pooled aiosqlite connections belong to this event loop
+    await async_engine.dispose()
+
+    latencies = sorted(latency for latency, _ in results)
+    return {
+        "ok": sum(1 for _, ok in results if ok),
+        "throughput": CHECKOUTS / elapsed,
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+        "max_lag": max(lags, default=0.0),
+    }
+
+
+def count_pending_orders() -> int:
+    db = SessionLocal()
+    try:
+        return db.scalar(select(func.count(Order.id)).where(Order.razorpay_order_id.is_not(None)))
+    finally:
+        db.close()
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add_all([
+        Product(
+            name=f"Product {i}", brand="Bench", category="protein", description="Synthetic product",
+            price=500 + i, weight="1kg", stock=1_000_000, image=f"/static/images/{i}.jpg"
+        )
+        for i in range(10)
+    ])
+    db.commit()
+    product_ids = [product.id for product in db.query(Product).all()]
+    db.close()
+
+    gateway = FakeRazorpayServer(
+        "127.0.0.1", GATEWAY_PORT, key_secret="bench_secret", latency=GATEWAY_LATENCY, quiet=True
+    ).start()
+
+    print(f"{CHECKOUTS} concurrent checkouts, gateway latency {GATEWAY_LATENCY * 1000:.0f} ms\n")
+    results = {}
+    threaded = payment_service.create_razorpay_order_async
+    for label, create_order in (("SDK call on event loop", _blocking_create_order),
+                                ("gateway thread pool", threaded)):
+        payment_service.create_razorpay_order_async = create_order
+        connections_before = gateway.connections
+        orders_before = count_pending_orders()
+        results[label] = asyncio.run(run(product_ids))
+        results[label]["connections"] = gateway.connections - connections_before
+        results[label]["saved"] = count_pending_orders() - orders_before
+    payment_service.create_razorpay_order_async = threaded
+
+    print(f"{'create-order':<24} | {'ok':>4} | {'req/s':>6} | {'p50 ms':>7} | {'p99 ms':>7} | "
+          f"{'max loop stall ms':>17} | {'connections':>11}")
+    print("-" * 96)
+    for label, r in results.items():
+        print(f"{label:<24} | {r['ok']:>4} | {r['throughput']:>6.0f} | {r['p50'] * 1000:>7.0f} | "
+              f"{r['p99'] * 1000:>7.0f} | {r['max_lag'] * 1000:>17.0f} | {r['connections']:>11}")
+
+    payment_service.shutdown()
+    gateway.stop()
+    engine.dispose()
+    _tmp.cleanup()
+
+    pooled = results["gateway thread pool"]
+    ok = pooled["ok"] == CHECKOUTS and pooled["saved"] == CHECKOUTS
+    print(f"\n{'✅' if ok else '❌'} with the thread pool every checkout got a Razorpay order "
+          f"and a pending order ({pooled['saved']} saved)")
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
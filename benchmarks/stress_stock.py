@@ -0,0 +1,123 @@
+"""
+Stress test for stock reservation: many parallel checkouts compete for a
+product with little stock. Exactly as many orders as there is stock must
+succeed, every other checkout must fail with OutOfStockError, and stock
+must never go negative.
+Run from the project root: python -m benchmarks.stress_stock
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import SQLITE_PRAGMAS
+from app.core.database import Base, sqlite_pragma_listener
+from app.models.order import Order, OrderItem
+from app.models.product import Product
+from app.services import order_service
+from app.services.stock_service import OutOfStockError
+
+CHECKOUTS = 500
+WORKERS = 32
+SCARCE_STOCK = 37
+PLENTIFUL_STOCK = 10_000
+
+CUSTOMER = {
+    "name": "Stress Customer", "email": "stress@example.com", "phone": "9999999999",
+    "address": "1 Stress Street", "city": "Pune", "state": "MH", "pincode": "411001",
+}
+PAYMENT = {"order_id": None, "payment_id": "pay_stress", "signature": None}
+
+
+def build_engine(path: str):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", sqlite_pragma_listener(SQLITE_PRAGMAS))
+    Base.metadata.create_all(bind=engine)
+
+    db = sessionmaker(bind=engine)()
+    db.add_all([
+        Product(
+            name="Scarce Whey", brand="Stress", category="protein", description="Flash sale",
+            price=999, weight="1kg", stock=SCARCE_STOCK, image="/static/images/scarce.jpg"
+        ),
+        Product(
+            name="Plentiful Oats", brand="Stress", category="oats", description="Always around",
+            price=199, weight="1kg", stock=PLENTIFUL_STOCK, image="/static/images/oats.jpg"
+        ),
+    ])
+    db.commit()
+    db.close()
+    return engine
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(os.path.join(tmp, "stress.db"))
+        Session = sessionmaker(bind=engine)
+
+        db = Session()
+        scarce, plentiful = db.query(Product).order_by(Product.id).all()
+        db.expunge_all()
+        db.close()
+
+        cart_items = [
+            {"product": scarce, "quantity": 1, "subtotal": scarce.price},
+            {"product": plentiful, "quantity": 2, "subtotal": plentiful.price * 2},
+        ]
+
+        def checkout(_):
+            db = Session()
+            try:
+                order_service.create_order_bulk(db, CUSTOMER, cart_items, PAYMENT)
+                return "ok"
+            except OutOfStockError:
+                return "out_of_stock"
+            except Exception as e:
+                return f"error: {e.__class__.__name__}"
+            finally:
+                db.close()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            outcomes = list(pool.map(checkout, range(CHECKOUTS)))
+        elapsed = time.perf_counter() - start
+
+        db = Session()
+        scarce_left, plentiful_left = db.execute(
+            select(Product.stock).order_by(Product.id)
+        ).scalars().all()
+        order_count = db.scalar(select(func.count(Order.id)))
+        item_count = db.scalar(select(func.count(OrderItem.id)))
+        db.close()
+        engine.dispose()
+
+    succeeded = outcomes.count("ok")
+    out_of_stock = outcomes.count("out_of_stock")
+    errors = len(outcomes) - succeeded - out_of_stock
+
+    print(f"{CHECKOUTS} checkouts on {WORKERS} threads in {elapsed:.2f}s "
+          f"({CHECKOUTS / elapsed:.0f} checkouts/sec)")
+    print(f"  succeeded:     {succeeded} (stock was {SCARCE_STOCK})")
+    print(f"  out of stock:  {out_of_stock}")
+    print(f"  other errors:  {errors}")
+    print(f"  stock left:    scarce={scarce_left}, plentiful={plentiful_left}")
+    print(f"  orders/items:  {order_count}/{item_count}")
+
+    checks = [
+        ("no other errors", errors == 0),
+        ("sold exactly the available stock", succeeded == SCARCE_STOCK and scarce_left == 0),
+        ("failed checkouts took no stock", plentiful_left == PLENTIFUL_STOCK - 2 * succeeded),
+        ("one order per successful checkout", order_count == succeeded and item_count == 2 * succeeded),
+    ]
+    for label, passed in checks:
+        print(f"{'✅' if passed else '❌'} {label}")
+
+    if not all(passed for _, passed in checks):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
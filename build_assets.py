@@ -0,0 +1,86 @@
+"""
+Build fingerprinted static assets for production.
+Copies every file under app/static to app/static/dist with a content hash in
+its name (css/main.css -> css/main.<hash>.css), writes precompressed .gz and,
+if the optional brotli package is installed, .br siblings for text assets,
+and writes dist/manifest.json, which static_url() uses in templates.
+Run from the project root before starting the app: python build_assets.py
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+
+from app.core.assets import DIST_DIRNAME, MANIFEST_PATH, STATIC_DIR
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Already-compressed formats (images) gain nothing from gzip/brotli
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".html", ".map"}
+
+DIST_DIR = os.path.join(STATIC_DIR, DIST_DIRNAME)
+
+
+def fingerprint(relative_path: str, content: bytes) -> str:
+    """css/main.css -> css/main.<hash>.css"""
+    digest = hashlib.blake2b(content, digest_size=6).hexdigest()
+    stem, extension = os.path.splitext(relative_path)
+    return f"{stem}.{digest}{extension}"
+
+
+def write_file(path: str, content: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as output:
+        output.write(content)
+
+
+def main():
+    # Start from a clean dist so removed or changed assets don't linger
+    shutil.rmtree(DIST_DIR, ignore_errors=True)
+
+    manifest = {}
+    original_bytes = compressed_bytes = compressed_files = 0
+
+    for root, dirs, files in os.walk(STATIC_DIR):
+        if os.path.abspath(root) == os.path.abspath(STATIC_DIR) and DIST_DIRNAME in dirs:
+            dirs.remove(DIST_DIRNAME)
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            relative_path = os.path.relpath(source, STATIC_DIR).replace(os.sep, "/")
+            with open(source, "rb") as source_file:
+                content = source_file.read()
+
+            built = fingerprint(relative_path, content)
+            target = os.path.join(DIST_DIR, built)
+            write_file(target, content)
+            manifest[relative_path] = built
+
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE:
+                gzipped = gzip.compress(content, compresslevel=9, mtime=0)
+                write_file(target + ".gz", gzipped)
+                smallest = len(gzipped)
+                if brotli is not None:
+                    brotlied = brotli.compress(content, quality=11)
+                    write_file(target + ".br", brotlied)
+                    smallest = min(smallest, len(brotlied))
+                original_bytes += len(content)
+                compressed_bytes += smallest
+                compressed_files += 1
+
+    write_file(MANIFEST_PATH, json.dumps(manifest, indent=2, sort_keys=True).encode())
+
+    print(f"✅ Built {len(manifest)} assets into {DIST_DIR}")
+    if compressed_files:
+        print(f"🗜️  Precompressed {compressed_files} text assets: "
+              f"{original_bytes / 1024:.1f} KB -> {compressed_bytes / 1024:.1f} KB")
+    if brotli is None:
+        print("ℹ️  brotli is not installed; only .gz variants were written (pip install brotli)")
+    print(f"📄 Manifest: {MANIFEST_PATH}")
+
+
+if __name__ == "__main__":
+    main()
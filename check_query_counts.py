@@ -0,0 +1,114 @@
+"""
+Check how many SQL queries the order loaders issue when their items are rendered,
+for each items loading strategy. Guards the confirmation page and order history
+against N+1 queries. Runs against a throwaway in-memory database.
+"""
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import joinedload, selectinload, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models.order import Order, OrderItem
+from app.services import order_service
+
+ORDERS = 20
+ITEMS_PER_ORDER = 5
+EMAIL = "history@example.com"
+
+engine = create_engine(
+    "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+)
+Base.metadata.create_all(bind=engine)
+
+statements = []
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    statements.append(statement)
+
+
+Session = sessionmaker(bind=engine)
+
+db = Session()
+for n in range(ORDERS):
+    order = Order(
+        customer_name="History Customer", customer_email=EMAIL, customer_phone="9999999999",
+        shipping_address="1 History Street", city="Pune", state="MH", pincode="411001",
+        total_amount=100.0 * ITEMS_PER_ORDER, payment_status="success", order_status="confirmed"
+    )
+    order.items = [
+        OrderItem(
+            product_id=i, product_name=f"Product {i}", product_brand="Brand", product_weight="1kg",
+            product_image=f"/static/images/{i}.jpg", quantity=1, price_per_unit=100.0, subtotal=100.0
+        )
+        for i in range(ITEMS_PER_ORDER)
+    ]
+    db.add(order)
+db.commit()
+db.close()
+
+
+def render(orders) -> int:
+    """Touch every attribute success.html / an order history page would."""
+    rows = 0
+    for order in orders:
+        for item in order.items:
+            rows += bool(item.product_name) + bool(item.subtotal)
+    return rows
+
+
+def count_queries(load) -> int:
+    db = Session()
+    statements.clear()
+    render(load(db))
+    db.close()
+    return len(statements)
+
+
+# (description, loader call, maximum queries)
+CHECKS = [
+    (
+        "get_order_by_id (default: joinedload)",
+        lambda db: [order_service.get_order_by_id(db, 1)],
+        1,
+    ),
+    (
+        "get_order_by_id with selectinload",
+        lambda db: [order_service.get_order_by_id(db, 1, items_loader=selectinload)],
+        2,
+    ),
+    (
+        f"get_orders_by_email, {ORDERS} orders (default: selectinload)",
+        lambda db: order_service.get_orders_by_email(db, EMAIL),
+        2,
+    ),
+    (
+        f"get_orders_by_email, {ORDERS} orders with joinedload",
+        lambda db: order_service.get_orders_by_email(db, EMAIL, items_loader=joinedload),
+        1,
+    ),
+]
+
+failures = 0
+
+print("=" * 80)
+print("QUERY COUNTS:")
+print("=" * 80)
+
+lazy = count_queries(lambda db: order_service.get_orders_by_email(db, EMAIL, items_loader=None))
+print(f"\nℹ️  get_orders_by_email with lazy loading: {lazy} queries (for comparison)")
+
+for description, load, limit in CHECKS:
+    count = count_queries(load)
+    ok = count <= limit
+    failures += not ok
+    print(f"{'✅' if ok else '❌'} {description}: {count} quer{'y' if count == 1 else 'ies'} (max {limit})")
+
+engine.dispose()
+
+print(f"\n{'=' * 80}")
+if failures:
+    print(f"❌ {failures} loader{'s' if failures > 1 else ''} issued more queries than expected")
+    raise SystemExit(1)
+print("✅ All order loaders are free of N+1 queries!")
@@ -0,0 +1,60 @@
+"""
+Check that the hot catalog and order queries use indexes instead of full table scans.
+Runs the app's own queries through EXPLAIN QUERY PLAN against protein_perks.db.
+"""
+from sqlalchemy import select
+
+from app.core.database import engine, init_db
+from app.models.product import Product
+from app.models.order import Order, OrderItem
+
+# (description, query, index the plan must use)
+CHECKS = [
+    (
+        "Category listing",
+        select(Product).where(Product.category == "protein"),
+        "ix_products_category",
+    ),
+    (
+        "Order history by email",
+        select(Order).where(Order.customer_email == "customer@example.com").order_by(Order.created_at.desc()),
+        "ix_orders_customer_email_created_at",
+    ),
+    (
+        "Order items for an order",
+        select(OrderItem).where(OrderItem.order_id == 1),
+        "ix_order_items_order_id",
+    ),
+]
+
+# Make sure existing databases have the indexes
+init_db()
+
+failures = 0
+
+print("=" * 80)
+print("QUERY PLANS:")
+print("=" * 80)
+
+with engine.connect() as conn:
+    for description, query, index_name in CHECKS:
+        compiled = query.compile(engine)
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+        plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).fetchall()
+        details = [row[-1] for row in plan]
+
+        uses_index = any(index_name in detail for detail in details)
+        # A temp B-tree means rows are sorted after the lookup instead of read in index order
+        sorts_rows = any("TEMP B-TREE" in detail for detail in details)
+        ok = uses_index and not sorts_rows
+        failures += not ok
+
+        print(f"\n{'✅' if ok else '❌'} {description} (expects {index_name})")
+        for detail in details:
+            print(f"   {detail}")
+
+print(f"\n{'=' * 80}")
+if failures:
+    print(f"❌ {failures} quer{'y' if failures == 1 else 'ies'} not using the expected index")
+    raise SystemExit(1)
+print("✅ All queries use their indexes!")
@@ -0,0 +1,130 @@
+"""
+Local debugging SMTP server: accepts mail and prints it instead of delivering it.
+A stand-in for the real SMTP server when developing or testing order emails
+(the standard library's smtpd module no longer exists). No TLS or AUTH, so run
+the app with SMTP_STARTTLS=false and no SMTP_USERNAME:
+
+    python debug_smtp_server.py --port 1025
+    SMTP_HOST=localhost SMTP_PORT=1025 SMTP_STARTTLS=false ORDER_EMAIL_TO=orders@example.com \\
+        uvicorn app.main:app --port 8001
+
+--fail-rate makes the server reject that fraction of messages with a temporary
+451 error, to exercise the outbox retry path.
+"""
+import argparse
+import random
+import socketserver
+import threading
+from email import message_from_bytes
+from email.policy import default as default_policy
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self) -> None:
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply("220 debug-smtp ready")
+        mail_from, recipients = None, []
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip()
+            verb = command[:4].upper()
+
+            if verb in ("HELO", "EHLO"):
+                self.reply("250 debug-smtp" if verb == "HELO" else "250-debug-smtp\r\n250 8BITMIME")
+            elif verb == "MAIL":
+                mail_from, recipients = command[10:].strip(), []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command[8:].strip())
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = bytearray()
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b".\r\n", b".\n"):
+                        break
+                    # Undo dot-stuffing
+                    data += data_line[1:] if data_line.startswith(b"..") else data_line
+                if random.random() < server.fail_rate:
+                    self.reply("451 Temporary failure, try again later")
+                else:
+                    server.deliver(mail_from, recipients, bytes(data))
+                    self.reply("250 OK: queued")
+                mail_from, recipients = None, []
+            elif verb == "RSET":
+                mail_from, recipients = None, []
+                self.reply("250 OK")
+            elif verb == "NOOP":
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class DebugSMTPServer(socketserver.ThreadingTCPServer):
+    """
+    Threaded SMTP sink. Counts connections and messages; prints each message
+    unless quiet. Usable in-process via start()/stop().
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 1025, fail_rate: float = 0.0, quiet: bool = False):
+        super().__init__((host, port), _SMTPHandler)
+        self.fail_rate = fail_rate
+        self.quiet = quiet
+        self.connections = 0
+        self.messages = []
+        self.lock = threading.Lock()
+        self._thread = None
+
+    def deliver(self, mail_from: str, recipients: list, data: bytes) -> None:
+        message = message_from_bytes(data, policy=default_policy)
+        with self.lock:
+            self.messages.append(message)
+        if not self.quiet:
+            print("=" * 80)
+            print(f"From: {mail_from}  To: {', '.join(recipients)}")
+            print(f"Subject: {message['Subject']}")
+            print("-" * 80)
+            print(message.get_content().rstrip())
+
+    def start(self) -> "DebugSMTPServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="debug-smtp", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print mail instead of delivering it")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = DebugSMTPServer(args.host, args.port, args.fail_rate)
+    print(f"📭 Debug SMTP server listening on {args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Local fake of the Razorpay Orders/Payments API, for load tests and development
+without real gateway credentials. Speaks enough of the REST API for the
+Razorpay SDK (keep-alive HTTP/1.1, Basic auth, JSON error bodies):
+
+    POST /v1/orders                     create an order
+    GET  /v1/orders/{id}                fetch an order
+    GET  /v1/orders/{id}/payments       payments made against an order
+    GET  /v1/payments/{id}              fetch a payment
+
+plus a test hook that plays the customer paying, and returns what Razorpay
+Checkout would hand the browser (ids and signature):
+
+    POST /_test/orders/{id}/pay
+
+    python fake_razorpay_server.py --port 9010 --latency 0.2
+    RAZORPAY_BASE_URL=http://127.0.0.1:9010 RAZORPAY_KEY_ID=rzp_test_fake RAZORPAY_KEY_SECRET=secret \\
+        uvicorn app.main:app --port 8001
+
+--latency delays every API response, --fail-rate answers that fraction of
+requests with a 500 SERVER_ERROR. With --webhook-url, paying an order also
+delivers signed payment.captured/order.paid (or payment.failed) webhooks there;
+--webhook-secret must match the app's RAZORPAY_WEBHOOK_SECRET.
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import random
+import re
+import threading
+import time
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}_{uuid.uuid4().hex[:14]}"
+
+
+def webhook_event(event: str, payment: dict, order: dict = None) -> tuple:
+    """
+    Build a Razorpay webhook delivery.
+
+    Returns:
+        Tuple of (event_id, raw JSON body)
+    """
+    payload = {"payment": {"entity": payment}}
+    if order is not None:
+        payload["order"] = {"entity": order}
+    body = {
+        "entity": "event",
+        "account_id": "acc_fake",
+        "event": event,
+        "contains": list(payload),
+        "payload": payload,
+        "created_at": int(time.time()),
+    }
+    return _new_id("evt"), json.dumps(body).encode()
+
+
+def sign_webhook(body: bytes, secret: str) -> str:
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+class _RazorpayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+
+    ROUTES = [
+        ("POST", re.compile(r"^/v1/orders$"), "create_order"),
+        ("GET", re.compile(r"^/v1/orders/(?P<order_id>[\w-]+)$"), "fetch_order"),
+        ("GET", re.compile(r"^/v1/orders/(?P<order_id>[\w-]+)/payments$"), "order_payments"),
+        ("GET", re.compile(r"^/v1/payments/(?P<payment_id>[\w-]+)$"), "fetch_payment"),
+        ("POST", re.compile(r"^/_test/orders/(?P<order_id>[\w-]+)/pay$"), "pay_order"),
+    ]
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def reply(self, status: int, body: dict) -> None:
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def error(self, status: int, code: str, description: str) -> None:
+        self.reply(status, {"error": {"code": code, "description": description}})
+
+    def read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def dispatch(self, method: str) -> None:
+        server = self.server
+        path = self.path.split("?", 1)[0]
+        body = self.read_json()
+
+        for route_method, pattern, action in self.ROUTES:
+            match = pattern.match(path)
+            if route_method == method and match:
+                break
+        else:
+            return self.error(404, "BAD_REQUEST_ERROR", "The requested URL was not found on the server.")
+
+        if action != "pay_order":
+            if not self.headers.get("Authorization", "").startswith("Basic "):
+                return self.error(401, "BAD_REQUEST_ERROR", "The api key provided is invalid")
+            if server.latency:
+                time.sleep(server.latency)
+            with server.lock:
+                server.requests += 1
+            if random.random() < server.fail_rate:
+                return self.error(500, "SERVER_ERROR", "We are facing some trouble completing your request at the moment.")
+
+        status, result = getattr(server, action)(body=body, **match.groupdict())
+        self.reply(status, result)
+
+    def do_GET(self) -> None:
+        self.dispatch("GET")
+
+    def do_POST(self) -> None:
+        self.dispatch("POST")
+
+
+class FakeRazorpayServer(ThreadingHTTPServer):
+    """
+    In-memory Razorpay stand-in. Counts connections and API requests.
+    Payments are signed with key_secret the same way Razorpay signs them,
+    so the app's signature verification works unchanged. Usable in-process
+    via start()/stop().
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 1024
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 9010,
+        key_secret: str = "secret",
+        latency: float = 0.0,
+        fail_rate: float = 0.0,
+        quiet: bool = False,
+        webhook_url: str = None,
+        webhook_secret: str = "webhook_secret"
+    ):
+        super().__init__((host, port), _RazorpayHandler)
+        self.key_secret = key_secret
+        self.webhook_url = webhook_url
+        self.webhook_secret = webhook_secret
+        self.webhooks_sent = 0
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.quiet = quiet
+        self.connections = 0
+        self.requests = 0
+        self.orders = {}
+        self.payments = {}
+        self.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def sign(self, order_id: str, payment_id: str) -> str:
+        return hmac.new(
+            self.key_secret.encode(), f"{order_id}|{payment_id}".encode(), hashlib.sha256
+        ).hexdigest()
+
+    # ---------------- API ----------------
+
+    def create_order(self, body: dict):
+        amount = body.get("amount")
+        if not isinstance(amount, int) or amount < 100:
+            return 400, {"error": {"code": "BAD_REQUEST_ERROR", "description": "The amount must be atleast INR 1.00"}}
+        order = {
+            "id": _new_id("order"),
+            "entity": "order",
+            "amount": amount,
+            "amount_paid": 0,
+            "amount_due": amount,
+            "currency": body.get("currency", "INR"),
+            "receipt": body.get("receipt"),
+            "status": "created",
+            "attempts": 0,
+            "notes": body.get("notes") or [],
+            "created_at": int(time.time()),
+        }
+        with self.lock:
+            self.orders[order["id"]] = order
+        return 200, order
+
+    def fetch_order(self, body: dict, order_id: str):
+        order = self.orders.get(order_id)
+        if order is None:
+            return 400, {"error": {"code": "BAD_REQUEST_ERROR", "description": "The id provided does not exist"}}
+        return 200, order
+
+    def order_payments(self, body: dict, order_id: str):
+        if order_id not in self.orders:
+            return 400, {"error": {"code": "BAD_REQUEST_ERROR", "description": "The id provided does not exist"}}
+        with self.lock:
+            items = [payment for payment in self.payments.values() if payment["order_id"] == order_id]
+        return 200, {"entity": "collection", "count": len(items), "items": items}
+
+    def fetch_payment(self, body: dict, payment_id: str):
+        payment = self.payments.get(payment_id)
+        if payment is None:
+            return 400, {"error": {"code": "BAD_REQUEST_ERROR", "description": "The id provided does not exist"}}
+        return 200, payment
+
+    def pay_order(self, body: dict, order_id: str):
+        """Test hook: record a payment for the order (captured unless body gives another status, e.g. "failed")."""
+        with self.lock:
+            order = self.orders.get(order_id)
+            if order is None:
+                return 400, {"error": {"code": "BAD_REQUEST_ERROR", "description": "The id provided does not exist"}}
+            status = body.get("status", "captured")
+            payment = {
+                "id": _new_id("pay"),
+                "entity": "payment",
+                "amount": order["amount"],
+                "currency": order["currency"],
+                "status": status,
+                "order_id": order_id,
+                "method": body.get("method", "upi"),
+                "captured": status == "captured",
+                "created_at": int(time.time()),
+            }
+            self.payments[payment["id"]] = payment
+            order["attempts"] += 1
+            if status == "captured":
+                order.update(status="paid", amount_paid=order["amount"], amount_due=0)
+            else:
+                order["status"] = "attempted"
+            order = dict(order)
+        if self.webhook_url:
+            if status == "captured":
+                deliveries = [webhook_event("payment.captured", payment), webhook_event("order.paid", payment, order)]
+            else:
+                deliveries = [webhook_event(f"payment.{status}", payment)]
+            threading.Thread(target=self.deliver_webhooks, args=(deliveries,), daemon=True).start()
+        return 200, {
+            "razorpay_order_id": order_id,
+            "razorpay_payment_id": payment["id"],
+            "razorpay_signature": self.sign(order_id, payment["id"]),
+            "payment": payment,
+        }
+
+    def deliver_webhooks(self, deliveries: list) -> None:
+        for event_id, body in deliveries:
+            request = urllib.request.Request(self.webhook_url, data=body, method="POST", headers={
+                "Content-Type": "application/json",
+                "X-Razorpay-Event-Id": event_id,
+                "X-Razorpay-Signature": sign_webhook(body, self.webhook_secret),
+            })
+            try:
+                with urllib.request.urlopen(request, timeout=10) as response:
+                    response.read()
+                with self.lock:
+                    self.webhooks_sent += 1
+            except OSError as e:
+                if not self.quiet:
+                    print(f"Webhook delivery failed: {e}")
+
+    # ---------------- LIFECYCLE ----------------
+
+    def start(self) -> "FakeRazorpayServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-razorpay", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Razorpay API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9010)
+    parser.add_argument("--key-secret", default="secret", help="Must match the app's RAZORPAY_KEY_SECRET")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every API response")
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--webhook-url", help="e.g. http://127.0.0.1:8001/payment/webhook")
+    parser.add_argument("--webhook-secret", default="webhook_secret")
+    args = parser.parse_args()
+
+    server = FakeRazorpayServer(
+        args.host, args.port, args.key_secret, args.latency, args.fail_rate,
+        webhook_url=args.webhook_url, webhook_secret=args.webhook_secret
+    )
+    print(f"💳 Fake Razorpay API listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
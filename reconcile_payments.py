@@ -0,0 +1,89 @@
+"""
+Reconcile unsettled Razorpay orders against the gateway: marks orders paid or
+failed when their webhook or browser verification never arrived, and cancels
+orders left unpaid past --expire-after, releasing their stock. Running web
+workers show the released stock within CATALOG_STOCK_CHECK_INTERVAL seconds.
+Progress is checkpointed after every chunk, so an interrupted run picks up
+where it stopped. Run from the project root: python reconcile_payments.py
+(add --every 300 to keep reconciling every five minutes).
+Against the local fake gateway: RAZORPAY_BASE_URL=http://127.0.0.1:9010
+RAZORPAY_KEY_ID=rzp_test_fake RAZORPAY_KEY_SECRET=secret python reconcile_payments.py
+"""
+import argparse
+import time
+
+from app.core.config import (
+    RECONCILE_CHECKPOINT,
+    RECONCILE_CHUNK_SIZE,
+    RECONCILE_CONCURRENCY,
+    RECONCILE_EXPIRE_AFTER,
+    RECONCILE_MIN_AGE,
+)
+from app.core.database import init_db
+from app.services import payment_service
+from app.services.reconciliation_service import ReconcileReport, reconcile
+
+
+def print_progress(report: ReconcileReport, chunk_seconds: float) -> None:
+    print(f"🔄 Chunk {report.chunks}: up to order #{report.last_order_id} in {chunk_seconds:.2f}s "
+          f"({report.checked} checked, {report.orders_per_second:.0f} orders/s)")
+
+
+def print_report(report: ReconcileReport) -> None:
+    if report.resumed_after:
+        print(f"↪️  Resumed after order #{report.resumed_after}")
+    print(f"✅ Checked {report.checked} orders in {report.elapsed:.2f}s ({report.orders_per_second:.0f} orders/s)")
+    print(f"   💰 paid: {report.paid}   ❌ failed: {report.failed}   🗑️  cancelled: {report.cancelled}   "
+          f"⏳ unchanged: {report.unchanged}")
+    print(f"   ⏱️  gateway {report.gateway_seconds:.2f}s, database {report.db_seconds:.2f}s")
+    if report.errors:
+        print(f"⚠️  {report.errors} orders could not be fetched from Razorpay; they will be retried next run")
+    if not report.complete:
+        print("⏸️  Stopped early; run again to resume from the checkpoint")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcile unsettled Razorpay orders")
+    parser.add_argument("--chunk-size", type=int, default=RECONCILE_CHUNK_SIZE, help="Orders per transaction")
+    parser.add_argument("--concurrency", type=int, default=RECONCILE_CONCURRENCY, help="Gateway requests in flight")
+    parser.add_argument("--min-age", type=float, default=RECONCILE_MIN_AGE,
+                        help="Skip orders younger than this many minutes")
+    parser.add_argument("--expire-after", type=float, default=RECONCILE_EXPIRE_AFTER,
+                        help="Cancel orders unpaid after this many minutes (0 never cancels)")
+    parser.add_argument("--checkpoint", default=RECONCILE_CHECKPOINT)
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start from the first order")
+    parser.add_argument("--max-chunks", type=int, help="Stop after this many chunks")
+    parser.add_argument("--every", type=float, help="Keep running, reconciling every this many seconds")
+    args = parser.parse_args()
+
+    if not payment_service.razorpay_client:
+        print("❌ Razorpay credentials not configured. Please add RAZORPAY_KEY_ID and RAZORPAY_KEY_SECRET to .env file")
+        raise SystemExit(1)
+
+    init_db()
+    restart = args.restart
+    try:
+        while True:
+            report = reconcile(
+                checkpoint_path=args.checkpoint,
+                chunk_size=args.chunk_size,
+                concurrency=args.concurrency,
+                min_age=args.min_age,
+                expire_after=args.expire_after,
+                max_chunks=args.max_chunks,
+                on_chunk=print_progress,
+                restart=restart,
+            )
+            print_report(report)
+            restart = False
+            if not args.every:
+                break
+            time.sleep(args.every)
+    except KeyboardInterrupt:
+        print(f"\n⏸️  Interrupted; progress is saved in {args.checkpoint}")
+    finally:
+        payment_service.shutdown()
+
+
+if __name__ == "__main__":
+    main()